@@ -11,8 +11,15 @@ from .api_camera_homography import point_ns
 from .api_camera_pitch import point_ns
 from .api_undistort_points import undistort_points_ns
 from .api_setup_all_config import setup_ns
+from .api_setup_export import setup_ns
 from .api_user import user_ns
 from .api_camera_config_path import cam_cfg_path_ns
+from .api_camera_upload import upload_ns
+from .api_projection_preview import preview_ns
+from .api_metrics import metrics_ns
+from .api_jobs import job_ns
+from .api_changes import change_ns
 
 __all__ = ["camera_ns", "detector_ns", "setup_ns", "team_detector_ns", "field_ns",
-           "crop_ns", "point_ns", "undistortion_ns", "undistort_points_ns", "user_ns", "cam_cfg_path_ns"]
+           "crop_ns", "point_ns", "undistortion_ns", "undistort_points_ns", "user_ns", "cam_cfg_path_ns",
+           "upload_ns", "preview_ns", "metrics_ns", "job_ns", "change_ns"]
@@ -36,6 +36,12 @@ class CameraRes(Resource):
     def delete(self, camera_id):
         session_db = start_session()
         camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
+
+        if camera is None:
+            session_db.close()
+            return {"message": "Camera not found"}, HTTPStatus.NOT_FOUND
+
+        # The database cascades the delete to the projections, points and crops of the camera
         session_db.delete(camera)
         session_db.commit()
         session_db.close()
@@ -1,32 +1,265 @@
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import ResourceExistsError
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
 from flask_restx import Resource, Namespace
 from flask import request, Response
+from werkzeug.http import parse_etags, parse_if_range_header, parse_range_header, quote_etag, unquote_etag
 from database.session import start_session
 from data_classes import Camera
 from data_classes.camera import camera_config_img_path_parser
+from processing.blob_cache import blob_cache, revalidate_cached_blob, read_file_range
+from processing.thumbnails import PYRAMID_WIDTHS, PYRAMID_FORMAT, build_pyramid, variant_path
+from jobs.queue import submit_job, run_in_process, JobQueueFull
+from settings import UPLOAD_BLOCK_SIZE, UPLOAD_CONCURRENCY
+from lazy_import import lazy_import
+from threading import Lock
 import os
 from http import HTTPStatus
 
+storage_blob = lazy_import("azure.storage.blob")
+
 STORAGE_ACCOUNT_CONNECTION = os.getenv('STORAGE_ACCOUNT_CONNECTION')
 STORAGE_ACCOUNT_CONTAINER = os.getenv('STORAGE_ACCOUNT_CONTAINER')
 
+# Size of the requests a download is split in, a streamed download holds at most one chunk in memory
+BLOB_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Blobs uploaded without a content type were always config images stored as png
+DEFAULT_CONFIG_IMG_TYPE = "image/png"
+
+# Metadata of a variant blob holding the ETag of the original it was made from
+VARIANT_SOURCE_METADATA = "source_etag"
+
+
+_blob_service_client = None
+_blob_client_lock = Lock()
+
+
+def get_blob_service_client():
+    # Return the blob client, created on first use so the app starts without loading the storage sdk
+    global _blob_service_client
+    if _blob_service_client is None:
+        with _blob_client_lock:
+            if _blob_service_client is None:
+                _blob_service_client = storage_blob.BlobServiceClient.from_connection_string(
+                    STORAGE_ACCOUNT_CONNECTION, max_single_get_size=BLOB_CHUNK_SIZE,
+                    max_chunk_get_size=BLOB_CHUNK_SIZE, max_block_size=UPLOAD_BLOCK_SIZE,
+                    max_single_put_size=UPLOAD_BLOCK_SIZE
+                )
+    return _blob_service_client
+
+
+def get_container_client():
+    # Return the client of the container the config imgs are stored in
+    return get_blob_service_client().get_container_client(STORAGE_ACCOUNT_CONTAINER)
 
-blob_service_client = BlobServiceClient.from_connection_string(STORAGE_ACCOUNT_CONNECTION)
-container_client = blob_service_client.get_container_client(STORAGE_ACCOUNT_CONTAINER)
 
 def ensure_container():
     try:
-        container_client.create_container()
+        get_container_client().create_container()
     except ResourceExistsError:
         pass
     except Exception as e:
         print("Container creation failed:", e)
 
 
+def get_config_img_etag(config_path):
+    # Return the ETag of a config img blob without downloading it
+    return get_config_blob_client(config_path).get_blob_properties().etag
+
+
+def download_config_img(config_path):
+    # Return the content of a config img blob, from the local blob cache when it is still current
+    blob_client = get_config_blob_client(config_path)
+    properties, file = revalidate_cached_blob(blob_client, config_path)
+    if file is not None:
+        with file:
+            return file.read()
+
+    downloader = blob_client.download_blob(etag=properties.etag, match_condition=MatchConditions.IfNotModified)
+    return b"".join(blob_cache.store(config_path, properties, downloader.chunks()))
+
+
+def config_img_path(setup_name, camera_name):
+    # Return the blob path of the config img of a camera
+    return setup_name.lower().replace(" ", "_") + "/" + camera_name.lower().replace(" ", "_")
+
+
+def get_config_blob_client(config_path):
+    # Return the client of a config img blob
+    return get_container_client().get_blob_client(config_path)
+
+
+def blob_content_type(properties):
+    # Return the content type stored with a blob
+    content_type = properties.content_settings.content_type
+    if not content_type or content_type == "application/octet-stream":
+        return DEFAULT_CONFIG_IMG_TYPE
+    return content_type
+
+
+def plan_blob_download(properties, headers):
+    """Decides how to answer the download of a blob from the conditional and Range headers of the request
+
+        A single byte range is answered with 206, a range past the end of the blob with 416 and a matching
+        If-None-Match with 304. Multiple ranges, or a range whose If-Range no longer matches, get the whole blob.
+
+        Args:
+            properties: properties of the blob
+            headers: headers of the request
+
+        Returns:
+            status, response headers and the offset and length of the bytes to send, None when there is no body
+    """
+
+    size = properties.size
+    etag, _ = unquote_etag(properties.etag)
+    response_headers = {
+        "ETag": quote_etag(etag),
+        "Accept-Ranges": "bytes",
+        "Content-Type": blob_content_type(properties),
+        "Content-Disposition": "inline",
+        "Cache-Control": "no-cache"
+    }
+
+    if parse_etags(headers.get("If-None-Match")).contains_weak(etag):
+        return HTTPStatus.NOT_MODIFIED, response_headers, None
+
+    byte_range = parse_range_header(headers.get("Range"))
+    if_range = parse_if_range_header(headers.get("If-Range"))
+    if if_range.etag is not None:
+        range_valid = if_range.etag == etag
+    elif if_range.date is not None:
+        range_valid = properties.last_modified is not None and properties.last_modified <= if_range.date
+    else:
+        range_valid = True
+
+    if byte_range is not None and len(byte_range.ranges) == 1 and range_valid:
+        content_range = byte_range.make_content_range(size)
+        if content_range is None:
+            response_headers["Content-Range"] = f"bytes */{size}"
+            return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, response_headers, None
+
+        response_headers["Content-Range"] = content_range.to_header()
+        response_headers["Content-Length"] = str(content_range.stop - content_range.start)
+        return HTTPStatus.PARTIAL_CONTENT, response_headers, (content_range.start, content_range.stop - content_range.start)
+
+    response_headers["Content-Length"] = str(size)
+    return HTTPStatus.OK, response_headers, (0, size) if size else None
+
+
+def blob_download_response(blob_path):
+    """Answers the download of a blob, from the local blob cache when the cached version is still current
+
+        Args:
+            blob_path: path of the blob
+
+        Returns:
+            streamed response
+
+        Raises:
+            ResourceNotFoundError: when the blob doesn't exist
+    """
+
+    blob_client = get_config_blob_client(blob_path)
+    try:
+        properties, file = revalidate_cached_blob(blob_client, blob_path)
+    except ResourceNotFoundError:
+        blob_cache.discard(blob_path)
+        raise
+
+    status, headers, byte_range = plan_blob_download(properties, request.headers)
+    if byte_range is None:
+        if file is not None:
+            file.close()
+        return Response(status=status, headers=headers)
+
+    offset, length = byte_range
+    if file is not None:
+        return Response(read_file_range(file, offset, length), status=status, headers=headers, direct_passthrough=True)
+
+    # Pin the download to the ETag the headers were made for, a blob replaced meanwhile fails instead of mixing
+    downloader = blob_client.download_blob(offset=offset, length=length, etag=properties.etag,
+                                           match_condition=MatchConditions.IfNotModified)
+    chunks = downloader.chunks()
+    if status == HTTPStatus.OK:
+        # Whole downloads are cached while they are streamed, so the next view is read from local disk
+        chunks = blob_cache.store(blob_path, properties, chunks)
+    return Response(chunks, status=status, headers=headers, direct_passthrough=True)
+
+
+def delete_config_img_variants(config_path, source_etag=None):
+    # Remove the downscaled variants of a config image, until new ones are made the original is served instead
+    # With a source ETag only the variants made from that version of the original are removed
+    for width in PYRAMID_WIDTHS:
+        blob_client = get_config_blob_client(variant_path(config_path, width))
+        try:
+            if source_etag is None:
+                blob_client.delete_blob()
+                continue
+
+            properties = blob_client.get_blob_properties()
+            if (properties.metadata or {}).get(VARIANT_SOURCE_METADATA) == source_etag:
+                # A variant of a newer original uploaded in between changes the ETag and is kept
+                blob_client.delete_blob(etag=properties.etag, match_condition=MatchConditions.IfNotModified)
+        except (ResourceNotFoundError, ResourceModifiedError):
+            pass
+
+
+def build_config_img_variants(session_db, config_path):
+    """Background job storing the downscaled variants of a config image next to the original blob
+
+        Every variant is tagged with the ETag of the original it was made from. When the original is replaced
+        while the job runs, the job stops and removes only its own variants, not the ones of the newer image.
+
+        Args:
+            session_db: session of the job, not used
+            config_path: path of the original blob
+
+        Returns:
+            dictionary with the widths of the stored variants
+    """
+
+    etag = get_config_img_etag(config_path)
+    # Decoding and resizing runs in a worker process, the job thread shares the GIL with the request threads
+    variants = run_in_process(build_pyramid, download_config_img(config_path))
+
+    for width, data in variants.items():
+        if get_config_img_etag(config_path) != etag:
+            break
+        get_config_blob_client(variant_path(config_path, width)).upload_blob(
+            data, overwrite=True, metadata={VARIANT_SOURCE_METADATA: etag},
+            content_settings=storage_blob.ContentSettings(content_type=PYRAMID_FORMAT[1])
+        )
+    else:
+        if get_config_img_etag(config_path) == etag:
+            return {"config_path": config_path, "widths": sorted(variants)}
+
+    # The original was replaced while this job ran, the job of the new original makes its variants
+    delete_config_img_variants(config_path, etag)
+    return {"config_path": config_path, "widths": []}
+
+
+def queue_config_img_variants(session_db, config_path, content_type):
+    # Submit the job making the variants of an uploaded image, returns its id or None for other media
+    if not content_type or not content_type.startswith("image/"):
+        return None
+
+    # The upload itself succeeded, with a full queue the original is served until the image is uploaded again
+    try:
+        return submit_job(session_db, "config_img_variants", build_config_img_variants, config_path)
+    except JobQueueFull:
+        return None
+
 
 cam_cfg_path_ns = Namespace("cam_cfg_path", description="Fetching and Uploading Blob images")
 
+# Config image parser for the size of the image to download
+camera_config_img_get_parser = (
+    cam_cfg_path_ns.parser()
+    .add_argument("size", type=int, required=False, location="args", choices=list(PYRAMID_WIDTHS),
+                  help="Width of a downscaled variant, the full image is sent when omitted")
+)
+
 
 @cam_cfg_path_ns.route("/camera/<uuid:camera_id>/cam_cfg_path")
 class CamCfgPathRes(Resource):
@@ -44,18 +277,22 @@ class CamCfgPathRes(Resource):
         image = request.files["image"]
         setup_name = request.form.get("setup")
         camera_name = request.form.get("camera")
-        config_path = setup_name.lower().replace(" ", "_") + "/" + camera_name.lower().replace(" ", "_")
+        config_path = config_img_path(setup_name, camera_name)
         camera.update_config_img_path(config_path)
 
         ensure_container()  # Make sure the container exists
 
         try:
-            blob_client = container_client.get_blob_client(config_path)
-            blob_client.upload_blob(image.stream, overwrite=True)
+            blob_client = get_config_blob_client(config_path)
+            delete_config_img_variants(config_path)
+            # Files larger than a block are uploaded as blocks, several at the same time
+            blob_client.upload_blob(image.stream, overwrite=True, max_concurrency=UPLOAD_CONCURRENCY,
+                                    content_settings=storage_blob.ContentSettings(content_type=image.mimetype or None))
 
             session_db.commit()
+            job_id = queue_config_img_variants(session_db, config_path, image.mimetype)
             session_db.close()
-            return {"message": "Image uploaded successfully"}, 201
+            return {"message": "Image uploaded successfully", "job_id": str(job_id) if job_id else None}, 201
 
         except Exception as e:
             session_db.close()
@@ -68,25 +305,35 @@ class CamCfgPathRes(Resource):
         # return "Cam config img path uploaded"
 
     @cam_cfg_path_ns.response(HTTPStatus.OK, "Camera config path correctly loaded")
+    @cam_cfg_path_ns.response(HTTPStatus.PARTIAL_CONTENT, "Requested byte range of the config image")
+    @cam_cfg_path_ns.response(HTTPStatus.NOT_MODIFIED, "Config image didn't change since the given ETag")
     @cam_cfg_path_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
     @cam_cfg_path_ns.response(HTTPStatus.BAD_REQUEST, "Missing fields or typed them incorrectly")
-    @cam_cfg_path_ns.response(HTTPStatus.LOCKED, "Camera config path doesn't exist")
     @cam_cfg_path_ns.response(HTTPStatus.NOT_FOUND, "Camera config path not found")
-    # Get the image blob using camera config img path
+    @cam_cfg_path_ns.response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, "Requested byte range is outside the image")
+    @cam_cfg_path_ns.expect(camera_config_img_get_parser)
+    # Stream the image blob using camera config img path, chunk by chunk and optionally only a byte range of it
+    # Images viewed before are read from the local blob cache after a conditional request to blob storage
+    # With a size a downscaled variant is sent, e.g. for the tiles of the setup overview
     def get(self, camera_id):
+        args = camera_config_img_get_parser.parse_args()
+
         session_db = start_session()
         camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
+        config_path = camera.config_img_path if camera is not None else None
+        session_db.close()
 
-        config_path = camera.config_img_path
-        if camera.config_img_path != "":
+        if not config_path:
+            return {"message": "Config image not found"}, HTTPStatus.NOT_FOUND
 
-            # Download the correct blob
-            blob_client = blob_service_client.get_blob_client(container=STORAGE_ACCOUNT_CONTAINER, blob=config_path)
-            data = blob_client.download_blob().readall()
+        # Variants that aren't made yet, or aren't made because the image is smaller, fall back to the original
+        if args["size"] is not None:
+            try:
+                return blob_download_response(variant_path(config_path, args["size"]))
+            except ResourceNotFoundError:
+                pass
 
-            session_db.close()
-            return Response(
-                data,
-                mimetype='image/png',
-                headers={"Content-Disposition": 'inline'}
-            )
+        try:
+            return blob_download_response(config_path)
+        except ResourceNotFoundError:
+            return {"message": "Config image not found"}, HTTPStatus.NOT_FOUND
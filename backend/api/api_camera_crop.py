@@ -2,8 +2,13 @@ from flask import request
 from flask_restx import Resource
 from data_classes import Crop, Camera
 from database.session import start_session
+from database.bulk_write import write_crops
+from database.point_sets import read_point_array
 from http import HTTPStatus
-from data_classes.crop import crop_model, crop_ns
+from data_classes.crop import crop_model, crop_plan_model, crop_ns, auto_crop_parser, crop_plan_parser
+from processing.autocrop import auto_crop, AUTO_CROP_SIDES
+from processing.crop_planner import plan_crops, MAX_CROPS
+from jobs.queue import submit_job, run_in_process
 
 
 # Handles PUT for crop coordinates of a specific cam
@@ -14,25 +19,198 @@ class CropRes(Resource):
     @crop_ns.response(HTTPStatus.BAD_REQUEST, "Missing required fields or fields have incorrect types")
     @crop_ns.response(HTTPStatus.UNPROCESSABLE_ENTITY, "Provided data is invalid")
     @crop_ns.response(HTTPStatus.LOCKED, "Crop points don't exist")
+    @crop_ns.response(HTTPStatus.NOT_FOUND, "Camera not found")
     # Updates the crop point values of the currently selected camera in the database
     def put(self, camera_id):
         session_db = start_session()
         camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
 
-        crops = camera.crops
-        for crop in crops:
-            session_db.delete(crop)
+        if camera is None:
+            session_db.close()
+            return {"message": "Camera not found"}, HTTPStatus.NOT_FOUND
 
         data = request.get_json()
-        for crop in data:
-            session_db.add(Crop(
-                camera_id=camera_id,
-                top_left_x=crop["top_left_x"],
-                top_left_y=crop["top_left_y"],
-                bottom_right_x=crop["bottom_right_x"],
-                bottom_right_y=crop["bottom_right_y"]
-            ))
+
+        # Only the crops that differ from the stored ones are written
+        changed_rows = write_crops(session_db, Crop, camera, data, list(crop_model.keys()))
+
+        session_db.commit()
+        session_db.close()
+        return {"message": "Crops updated", "changed_rows": changed_rows}, HTTPStatus.OK
+
+
+def outer_points_px(session_db, camera):
+    # Return the outerfield points of a camera in pixels, they are stored normalized
+    outer_points = read_point_array(session_db.connection(), "outer", camera.camera_id)
+    return outer_points * [camera.resolution_width, camera.resolution_height]
+
+
+def replace_crops(session_db, camera, crops_xyxy):
+    # Replace the crops of a camera with crops in pixels and return them normalized
+    width, height = camera.resolution_width, camera.resolution_height
+
+    crops = [
+        {
+            "top_left_x": x0 / width,
+            "top_left_y": y0 / height,
+            "bottom_right_x": x1 / width,
+            "bottom_right_y": y1 / height
+        }
+        for (x0, y0), (x1, y1) in crops_xyxy
+    ]
+    write_crops(session_db, Crop, camera, crops, list(crop_model.keys()))
+
+    return crops
+
+
+def auto_crop_job(session_db, camera_id, side):
+    """Calculates and stores the crops of a camera, the cropping itself runs in a worker process
+
+        Used inline by the request and as background job, the crops are committed by the caller.
+
+        Args:
+            session_db: session of the request or job
+            camera_id: id of the camera
+            side: side of the pitch filmed by the camera
+
+        Returns:
+            list of the normalized crops
+    """
+
+    camera: Camera = session_db.get(Camera, camera_id)
+    points = outer_points_px(session_db, camera)
+    crops_xyxy = run_in_process(auto_crop, points, camera.resolution_width, camera.resolution_height, side)
+    return replace_crops(session_db, camera, crops_xyxy)
+
+
+def crop_plan_job(session_db, camera_id, image_size, max_scale, max_crops, crop_count):
+    """Plans and stores the crops of a camera, the planning itself runs in a worker process
+
+        Used inline by the request and as background job, the crops are committed by the caller.
+
+        Args:
+            session_db: session of the request or job
+            camera_id: id of the camera
+            image_size: input size of the detector
+            max_scale, max_crops, crop_count: constraints of the plan, see plan_crops
+
+        Returns:
+            dictionary with the normalized crops, their detector pixels and letterbox waste
+
+        Raises:
+            ValueError: when no crops cover the pitch within the maximum scale
+    """
+
+    camera: Camera = session_db.get(Camera, camera_id)
+    points = outer_points_px(session_db, camera)
+    crops_xyxy, input_pixels, waste = run_in_process(
+        plan_crops, points, camera.resolution_width, camera.resolution_height, image_size,
+        max_scale, max_crops, crop_count
+    )
+    if crops_xyxy is None:
+        raise ValueError("No crops cover the pitch within the maximum scale")
+
+    crops = replace_crops(session_db, camera, crops_xyxy)
+    return {"crops": crops, "detector_pixels": input_pixels, "letterbox_waste": waste}
+
+
+# Handles POST for automatically calculated crops of a specific cam
+@crop_ns.route('/camera/<uuid:camera_id>/auto_crop')
+class AutoCropRes(Resource):
+    @crop_ns.response(HTTPStatus.OK, "Crops correctly calculated", [crop_model])
+    @crop_ns.response(HTTPStatus.ACCEPTED, "Crop calculation started as a background job")
+    @crop_ns.response(HTTPStatus.SERVICE_UNAVAILABLE, "Too many jobs are waiting")
+    @crop_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @crop_ns.response(HTTPStatus.BAD_REQUEST, "Missing required fields or fields have incorrect types")
+    @crop_ns.response(HTTPStatus.NOT_FOUND, "Camera not found")
+    @crop_ns.response(HTTPStatus.UNPROCESSABLE_ENTITY, "Camera resolution or outer points are missing or invalid")
+    @crop_ns.expect(auto_crop_parser)
+    # Calculates the crops from the outerfield points of the currently selected camera and saves them
+    def post(self, camera_id):
+        session_db = start_session()
+        camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
+
+        if camera is None:
+            session_db.close()
+            return {"message": "Camera not found"}, HTTPStatus.NOT_FOUND
+
+        args = auto_crop_parser.parse_args()
+        side = args.get("side") or next((s for s in AUTO_CROP_SIDES if s in camera.position.lower()), None)
+        if side is None:
+            session_db.close()
+            return {"error": "Side of the pitch is required when the camera position doesn't contain it"}, HTTPStatus.BAD_REQUEST
+
+        width, height = camera.resolution_width, camera.resolution_height
+        points = outer_points_px(session_db, camera)
+        if width <= 0 or height <= 0 or len(points) < 3:
+            session_db.close()
+            return {"error": "Camera resolution and at least 3 outer points are required"}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        if args["background"]:
+            job_id = submit_job(session_db, "auto_crop", auto_crop_job, camera_id, side)
+            session_db.close()
+            return {"job_id": str(job_id)}, HTTPStatus.ACCEPTED
+
+        try:
+            crops = auto_crop_job(session_db, camera_id, side)
+        except ValueError as e:
+            session_db.close()
+            return {"error": str(e)}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        session_db.commit()
+        session_db.close()
+        return crops, HTTPStatus.OK
+
+
+# Handles POST for crops planned on the detector cost of a specific cam
+@crop_ns.route('/camera/<uuid:camera_id>/crop_plan')
+class CropPlanRes(Resource):
+    @crop_ns.response(HTTPStatus.OK, "Crops correctly planned", crop_plan_model)
+    @crop_ns.response(HTTPStatus.ACCEPTED, "Crop planning started as a background job")
+    @crop_ns.response(HTTPStatus.SERVICE_UNAVAILABLE, "Too many jobs are waiting")
+    @crop_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @crop_ns.response(HTTPStatus.BAD_REQUEST, "Missing required fields or fields have incorrect types")
+    @crop_ns.response(HTTPStatus.NOT_FOUND, "Camera not found")
+    @crop_ns.response(HTTPStatus.UNPROCESSABLE_ENTITY, "Camera, detector or plan constraints are invalid")
+    @crop_ns.expect(crop_plan_parser)
+    # Plans the crops with the least detector input pixels for the outerfield points of the selected camera
+    def post(self, camera_id):
+        session_db = start_session()
+        camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
+
+        if camera is None:
+            session_db.close()
+            return {"message": "Camera not found"}, HTTPStatus.NOT_FOUND
+
+        args = crop_plan_parser.parse_args()
+        width, height = camera.resolution_width, camera.resolution_height
+        points = outer_points_px(session_db, camera)
+        if width <= 0 or height <= 0 or len(points) < 3:
+            session_db.close()
+            return {"error": "Camera resolution and at least 3 outer points are required"}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        detector = camera.setup.detector
+        if detector is None or detector.image_size <= 0:
+            session_db.close()
+            return {"error": "The setup needs a detector with an image size"}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        if not 0 < args["max_crops"] <= MAX_CROPS or (args["crop_count"] is not None
+                                                       and not 0 < args["crop_count"] <= MAX_CROPS):
+            session_db.close()
+            return {"error": f"Amount of crops must be between 1 and {MAX_CROPS}"}, HTTPStatus.BAD_REQUEST
+
+        plan_args = (camera_id, detector.image_size, args["max_scale"], args["max_crops"], args["crop_count"])
+        if args["background"]:
+            job_id = submit_job(session_db, "crop_plan", crop_plan_job, *plan_args)
+            session_db.close()
+            return {"job_id": str(job_id)}, HTTPStatus.ACCEPTED
+
+        try:
+            plan = crop_plan_job(session_db, *plan_args)
+        except ValueError as e:
+            session_db.close()
+            return {"error": str(e)}, HTTPStatus.UNPROCESSABLE_ENTITY
 
         session_db.commit()
         session_db.close()
-        return "Crops updated"
+        return plan, HTTPStatus.OK
@@ -2,6 +2,7 @@ from flask_restx import Resource
 from http import HTTPStatus
 from data_classes.point import point_model, point_ns
 from database.session import start_session
+from database.point_sets import write_point_set
 from data_classes import Projection
 from flask import request
 
@@ -37,6 +38,11 @@ class HomographyRes(Resource):
         for dst_pt in projection.destination_points:
             dst_pt.update_point(data[1][str(dst_pt.index)])
 
+        # Keep the packed point sets read by the geometry code in sync
+        session_db.flush()
+        for kind, points in (("source", projection.source_points), ("destination", projection.destination_points)):
+            write_point_set(session_db.connection(), kind, projection_id,
+                            [(pt.x, pt.y) for pt in sorted(points, key=lambda pt: pt.index)])
 
         session_db.commit()
         session_db.close()
@@ -3,6 +3,7 @@ from http import HTTPStatus
 from data_classes.undistortion import undistortion_model, undistortion_ns
 from database.session import start_session
 from data_classes import Projection
+from processing.remap_store import remap_key, invalidate_remap_maps
 from flask import request
 
 
@@ -22,8 +23,15 @@ class UndistortionRes(Resource):
         # camera: Camera = session_db.query(Camera).filter_by(camera_id=camera_id).first()
         projection: Projection = session_db.query(Projection).filter_by(projection_id=projection_id).first()
 
+        old_key = remap_key(projection.undistortion)
         projection.undistortion.update_undistortion_parameters(data)
+        new_key = remap_key(projection.undistortion)
 
         session_db.commit()
         session_db.close()
+
+        # Remove the remap maps built for the old parameters
+        if new_key != old_key:
+            invalidate_remap_maps(old_key)
+
         return "Undistortion params updated", HTTPStatus.OK
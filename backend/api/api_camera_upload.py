@@ -0,0 +1,176 @@
+from azure.core.exceptions import ResourceNotFoundError
+from flask import request
+from flask_restx import Resource
+from http import HTTPStatus
+from database.session import start_session
+from data_classes import Camera, Upload
+from data_classes.upload import upload_ns, upload_post_parser, upload_model
+from settings import UPLOAD_BLOCK_SIZE
+from lazy_import import lazy_import
+from .api_camera_config_path import (config_img_path, get_config_blob_client, ensure_container,
+                                     delete_config_img_variants, queue_config_img_variants)
+
+storage_blob = lazy_import("azure.storage.blob")
+
+# Most blocks a block blob can be committed with
+MAX_BLOCK_COUNT = 50000
+
+
+def staged_blocks(upload: Upload):
+    # Return the indices of the blocks of the upload that are stored in blob storage but not committed yet
+    try:
+        _, uncommitted = get_config_blob_client(upload.config_path).get_block_list("uncommitted")
+    except ResourceNotFoundError:
+        # Until its first block is staged a new blob doesn't exist, so none of its blocks are stored
+        return []
+    prefix = f"{upload.upload_id}:"
+    return sorted(int(block.id[len(prefix):]) for block in uncommitted if block.id.startswith(prefix))
+
+
+@upload_ns.route('/camera/<uuid:camera_id>/upload')
+class CameraUploadRes(Resource):
+    @upload_ns.response(HTTPStatus.CREATED, "Upload started", upload_model)
+    @upload_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @upload_ns.response(HTTPStatus.BAD_REQUEST, "Missing required fields or fields have incorrect types")
+    @upload_ns.response(HTTPStatus.NOT_FOUND, "Camera not found")
+    @upload_ns.response(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "File needs more blocks than a blob can hold")
+    @upload_ns.expect(upload_post_parser)
+    # Start a chunked upload of the config media of a camera, the blocks are uploaded with PUT and then committed
+    def post(self, camera_id):
+        args = upload_post_parser.parse_args()
+
+        if args["size"] <= 0:
+            return {"error": "File is empty"}, HTTPStatus.BAD_REQUEST
+
+        session_db = start_session()
+        camera: Camera = session_db.get(Camera, camera_id)
+
+        if camera is None:
+            session_db.close()
+            return {"message": "Camera not found"}, HTTPStatus.NOT_FOUND
+
+        upload = Upload(camera_id, config_img_path(args["setup"], args["camera"]), args["size"], UPLOAD_BLOCK_SIZE,
+                        args["content_type"])
+        if upload.block_count > MAX_BLOCK_COUNT:
+            session_db.close()
+            return {"error": "File is too large"}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+        ensure_container()  # Make sure the container exists
+
+        session_db.add(upload)
+        session_db.commit()
+
+        upload_state = upload.get_upload([])
+        session_db.close()
+        return upload_state, HTTPStatus.CREATED
+
+
+@upload_ns.route('/upload/<uuid:upload_id>')
+class UploadRes(Resource):
+    @upload_ns.response(HTTPStatus.OK, "Upload state returned", upload_model)
+    @upload_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @upload_ns.response(HTTPStatus.NOT_FOUND, "Upload not found")
+    # Return the state of an upload, a client resuming an upload only sends the blocks that aren't staged yet
+    def get(self, upload_id):
+        session_db = start_session()
+        upload: Upload = session_db.get(Upload, upload_id)
+
+        if upload is None:
+            session_db.close()
+            return {"message": "Upload not found"}, HTTPStatus.NOT_FOUND
+
+        upload_state = upload.get_upload(staged_blocks(upload))
+        session_db.close()
+        return upload_state, HTTPStatus.OK
+
+    @upload_ns.response(HTTPStatus.OK, "Upload cancelled")
+    @upload_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @upload_ns.response(HTTPStatus.NOT_FOUND, "Upload not found")
+    # Cancel an upload, blob storage discards its uncommitted blocks after a week
+    def delete(self, upload_id):
+        session_db = start_session()
+        upload: Upload = session_db.get(Upload, upload_id)
+
+        if upload is None:
+            session_db.close()
+            return {"message": "Upload not found"}, HTTPStatus.NOT_FOUND
+
+        session_db.delete(upload)
+        session_db.commit()
+        session_db.close()
+        return {"message": "Upload cancelled"}, HTTPStatus.OK
+
+
+@upload_ns.route('/upload/<uuid:upload_id>/block/<int:index>')
+class UploadBlockRes(Resource):
+    @upload_ns.response(HTTPStatus.OK, "Block stored")
+    @upload_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @upload_ns.response(HTTPStatus.BAD_REQUEST, "Block doesn't have the size of its index")
+    @upload_ns.response(HTTPStatus.NOT_FOUND, "Upload or block index not found")
+    @upload_ns.response(HTTPStatus.LENGTH_REQUIRED, "Content-Length header is missing")
+    # Store one block of an upload, blocks can be sent at the same time, in any order and sent again
+    def put(self, upload_id, index):
+        session_db = start_session()
+        upload: Upload = session_db.get(Upload, upload_id)
+
+        if upload is None:
+            session_db.close()
+            return {"message": "Upload not found"}, HTTPStatus.NOT_FOUND
+
+        if index >= upload.block_count:
+            session_db.close()
+            return {"message": "Block not found"}, HTTPStatus.NOT_FOUND
+
+        length = request.content_length
+        if length is None:
+            session_db.close()
+            return {"error": "Content-Length is required"}, HTTPStatus.LENGTH_REQUIRED
+
+        if length != upload.block_length(index):
+            session_db.close()
+            return {"error": f"Block {index} must be {upload.block_length(index)} bytes"}, HTTPStatus.BAD_REQUEST
+
+        block_id, config_path = upload.block_id(index), upload.config_path
+        session_db.close()
+
+        # The body goes to blob storage as it is read, the database connection isn't held meanwhile
+        get_config_blob_client(config_path).stage_block(block_id, request.stream, length=length)
+        return {"message": f"Block {index} stored"}, HTTPStatus.OK
+
+
+@upload_ns.route('/upload/<uuid:upload_id>/commit')
+class UploadCommitRes(Resource):
+    @upload_ns.response(HTTPStatus.OK, "Upload committed")
+    @upload_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @upload_ns.response(HTTPStatus.NOT_FOUND, "Upload not found")
+    @upload_ns.response(HTTPStatus.CONFLICT, "Not every block is stored yet")
+    # Combine the blocks of an upload into the config media of the camera
+    def post(self, upload_id):
+        session_db = start_session()
+        upload: Upload = session_db.get(Upload, upload_id)
+
+        if upload is None:
+            session_db.close()
+            return {"message": "Upload not found"}, HTTPStatus.NOT_FOUND
+
+        staged = set(staged_blocks(upload))
+        missing = [index for index in range(upload.block_count) if index not in staged]
+        if missing:
+            session_db.close()
+            return {"error": "Not every block is stored yet", "missing_blocks": missing}, HTTPStatus.CONFLICT
+
+        config_path, content_type = upload.config_path, upload.content_type
+        delete_config_img_variants(config_path)
+        get_config_blob_client(config_path).commit_block_list(
+            [storage_blob.BlobBlock(upload.block_id(index)) for index in range(upload.block_count)],
+            content_settings=storage_blob.ContentSettings(content_type=content_type)
+        )
+
+        camera: Camera = session_db.get(Camera, upload.camera_id)
+        camera.update_config_img_path(config_path)
+        session_db.delete(upload)
+        session_db.commit()
+
+        job_id = queue_config_img_variants(session_db, config_path, content_type)
+        session_db.close()
+        return {"message": "Upload committed", "job_id": str(job_id) if job_id else None}, HTTPStatus.OK
@@ -0,0 +1,61 @@
+from flask_restx import Resource
+from http import HTTPStatus
+from datetime import datetime, timedelta
+from threading import Lock
+import time
+from database.session import start_session
+from database.change_feed import read_changes, trim_changes
+from data_classes.change import change_ns, change_get_parser, change_list_model
+from settings import CHANGE_FEED_RETENTION_DAYS
+
+# Seconds between two trims of the change feed by this server process
+TRIM_INTERVAL = 3600
+MAX_LIMIT = 10000
+
+_last_trim = 0.0
+_trim_lock = Lock()
+
+
+def trim_if_due(session_db):
+    # Delete changes older than the retention, at most once per interval so reads stay cheap
+    global _last_trim
+    with _trim_lock:
+        if time.monotonic() - _last_trim < TRIM_INTERVAL:
+            return
+        _last_trim = time.monotonic()
+
+    trim_changes(session_db.connection(), datetime.now() - timedelta(days=CHANGE_FEED_RETENTION_DAYS))
+    session_db.commit()
+
+
+@change_ns.route('/changes')
+class ChangesRes(Resource):
+    @change_ns.response(HTTPStatus.OK, "Changes after since returned", change_list_model)
+    @change_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @change_ns.response(HTTPStatus.BAD_REQUEST, "since or limit is invalid")
+    @change_ns.response(HTTPStatus.GONE, "Changes after since were trimmed, download every setup again")
+    @change_ns.expect(change_get_parser)
+    # Return the changes of setups and cameras after a sequence number, so processing nodes only download
+    # the all config of the setups that changed
+    def get(self):
+        args = change_get_parser.parse_args()
+
+        if args["since"] < 0 or not 0 < args["limit"] <= MAX_LIMIT:
+            return {"error": f"since can't be negative and limit must be between 1 and {MAX_LIMIT}"}, \
+                HTTPStatus.BAD_REQUEST
+
+        session_db = start_session()
+        trim_if_due(session_db)
+
+        changes = read_changes(session_db, args["since"], args["limit"])
+        if changes is None:
+            session_db.close()
+            return {"message": "Changes after since were trimmed, download every setup again"}, HTTPStatus.GONE
+
+        change_list = {
+            "changes": [change.get_change() for change in changes],
+            "last_seq": changes[-1].seq if changes else args["since"],
+            "has_more": len(changes) == args["limit"]
+        }
+        session_db.close()
+        return change_list, HTTPStatus.OK
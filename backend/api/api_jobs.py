@@ -0,0 +1,91 @@
+from flask_restx import Resource
+from http import HTTPStatus
+from database.session import start_session
+from data_classes import Job
+from data_classes.job import job_ns, job_model, JOB_DONE, JOB_FINISHED
+from jobs.queue import JobQueueFull, cancel_job
+
+# Seconds a client waits before submitting again when the job queue is full
+RETRY_AFTER = 5
+
+
+@job_ns.errorhandler(JobQueueFull)
+def job_queue_full(error):
+    # Every endpoint submitting jobs answers with 503 when the queue is full, so clients back off
+    return {"error": "Too many jobs are waiting, try again later"}, HTTPStatus.SERVICE_UNAVAILABLE, \
+        {"Retry-After": str(RETRY_AFTER)}
+
+
+@job_ns.route('/job/<uuid:job_id>')
+class JobRes(Resource):
+    @job_ns.response(HTTPStatus.OK, "Job status returned", job_model)
+    @job_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @job_ns.response(HTTPStatus.NOT_FOUND, "Job not found")
+    # Return the status of a background job, finished jobs include their result
+    def get(self, job_id):
+        session_db = start_session()
+        job: Job = session_db.get(Job, job_id)
+
+        if job is None:
+            session_db.close()
+            return {"message": "Job not found"}, HTTPStatus.NOT_FOUND
+
+        job_status = job.get_job_status()
+        if job.status == JOB_DONE:
+            job_status["result"] = job.get_result()
+
+        session_db.close()
+        return job_status, HTTPStatus.OK
+
+
+@job_ns.route('/job/<uuid:job_id>/result')
+class JobResultRes(Resource):
+    @job_ns.response(HTTPStatus.OK, "Result of the finished job returned")
+    @job_ns.response(HTTPStatus.ACCEPTED, "Job is still queued or running", job_model)
+    @job_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @job_ns.response(HTTPStatus.NOT_FOUND, "Job not found")
+    @job_ns.response(HTTPStatus.CONFLICT, "Job failed or was cancelled", job_model)
+    # Return only the result of a background job, the same response the request would have given inline
+    def get(self, job_id):
+        session_db = start_session()
+        job: Job = session_db.get(Job, job_id)
+
+        if job is None:
+            session_db.close()
+            return {"message": "Job not found"}, HTTPStatus.NOT_FOUND
+
+        if job.status == JOB_DONE:
+            result = job.get_result()
+            session_db.close()
+            return result, HTTPStatus.OK
+
+        job_status = job.get_job_status()
+        session_db.close()
+        return job_status, HTTPStatus.CONFLICT if job_status["status"] in JOB_FINISHED else HTTPStatus.ACCEPTED
+
+
+@job_ns.route('/job/<uuid:job_id>/cancel')
+class JobCancelRes(Resource):
+    @job_ns.response(HTTPStatus.OK, "Job cancelled", job_model)
+    @job_ns.response(HTTPStatus.ACCEPTED, "Job is running, its result is discarded when it ends", job_model)
+    @job_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @job_ns.response(HTTPStatus.NOT_FOUND, "Job not found")
+    @job_ns.response(HTTPStatus.CONFLICT, "Job already finished", job_model)
+    # Cancel a background job that didn't finish yet
+    def post(self, job_id):
+        session_db = start_session()
+        job: Job = session_db.get(Job, job_id)
+
+        if job is None:
+            session_db.close()
+            return {"message": "Job not found"}, HTTPStatus.NOT_FOUND
+
+        if job.status in JOB_FINISHED:
+            job_status = job.get_job_status()
+            session_db.close()
+            return job_status, HTTPStatus.CONFLICT
+
+        cancelled = cancel_job(session_db, job)
+        job_status = job.get_job_status()
+        session_db.close()
+        return job_status, HTTPStatus.OK if cancelled else HTTPStatus.ACCEPTED
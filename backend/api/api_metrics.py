@@ -0,0 +1,32 @@
+from flask_restx import Namespace, Resource
+from http import HTTPStatus
+from database.session import get_engine
+from database.pool_metrics import pool_metrics
+from processing.blob_cache import blob_cache
+from jobs.queue import queue_state
+
+metrics_ns = Namespace("metrics", description="Metrics about the resources used by the backend")
+
+
+@metrics_ns.route('/metrics/db_pool')
+class DbPoolMetricsRes(Resource):
+    @metrics_ns.response(HTTPStatus.OK, "Pool metrics returned")
+    # Return the checkout wait times and connections in use of the database pool
+    def get(self):
+        return pool_metrics.snapshot(get_engine().pool), HTTPStatus.OK
+
+
+@metrics_ns.route('/metrics/blob_cache')
+class BlobCacheMetricsRes(Resource):
+    @metrics_ns.response(HTTPStatus.OK, "Blob cache metrics returned")
+    # Return the hits, misses, evictions and size of the local blob cache
+    def get(self):
+        return blob_cache.snapshot(), HTTPStatus.OK
+
+
+@metrics_ns.route('/metrics/jobs')
+class JobQueueMetricsRes(Resource):
+    @metrics_ns.response(HTTPStatus.OK, "Job queue metrics returned")
+    # Return the amount of background jobs waiting in this server process and the limits of the queue
+    def get(self):
+        return queue_state(), HTTPStatus.OK
@@ -14,7 +14,7 @@ class ProjectionListRes(Resource):
         items = (
             s.query(Projection)
              .filter_by(camera_id=camera_id)
-             .order_by(Projection.name.asc())
+             .order_by(Projection.projection_name.asc())
              .all()
         )
         data = [p.get_projection_info() for p in items]
@@ -0,0 +1,95 @@
+from azure.core.exceptions import ResourceNotFoundError
+from flask import request, Response
+from flask_restx import Namespace, Resource
+from http import HTTPStatus
+from database.session import start_session
+from database.point_sets import read_point_array
+from data_classes import Projection
+from processing.preview import (PREVIEW_FORMATS, PREVIEW_STAGES, preview_cache, preview_key, undistortion_values,
+                                render_encoded_preview)
+from jobs.queue import run_in_process
+from .api_camera_config_path import get_config_img_etag, download_config_img
+
+preview_ns = Namespace("preview", description="Server side rendered undistortion and homography previews")
+
+# Preview parser for the preview query parameters
+preview_parser = (
+    preview_ns.parser()
+    .add_argument("w", type=int, required=False, default=1280, location="args", help="Width of the preview")
+    .add_argument("format", type=str, required=False, default="webp", location="args",
+                  choices=list(PREVIEW_FORMATS.keys()), help="Encoding of the preview")
+    .add_argument("stage", type=str, required=False, default="homography", location="args",
+                  choices=list(PREVIEW_STAGES), help="Show the undistortion or the homography result")
+)
+
+
+@preview_ns.route('/projection/<uuid:projection_id>/preview')
+class ProjectionPreviewRes(Resource):
+    @preview_ns.response(HTTPStatus.OK, "Preview correctly rendered")
+    @preview_ns.response(HTTPStatus.NOT_MODIFIED, "Preview didn't change since the given ETag")
+    @preview_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @preview_ns.response(HTTPStatus.BAD_REQUEST, "Missing fields or typed them incorrectly")
+    @preview_ns.response(HTTPStatus.NOT_FOUND, "Projection or config image not found")
+    @preview_ns.response(HTTPStatus.UNPROCESSABLE_ENTITY, "Homography points are invalid")
+    @preview_ns.response(HTTPStatus.SERVICE_UNAVAILABLE, "Too many previews are being rendered")
+    @preview_ns.expect(preview_parser)
+    # Render the undistortion and homography of the projection on the config image of its camera
+    def get(self, projection_id):
+        args = preview_parser.parse_args()
+        width, image_format, stage = args["w"], args["format"], args["stage"]
+
+        if width is None or width <= 0:
+            return {"error": "Preview width must be positive"}, HTTPStatus.BAD_REQUEST
+
+        session_db = start_session()
+        projection: Projection = session_db.query(Projection).filter_by(projection_id=projection_id).first()
+
+        if projection is None or projection.undistortion is None:
+            session_db.close()
+            return {"message": "Projection not found"}, HTTPStatus.NOT_FOUND
+
+        config_path = projection.camera.config_img_path
+        undistortion = projection.undistortion
+        source_points = [tuple(pt) for pt in read_point_array(session_db.connection(), "source", projection_id).tolist()]
+        destination_points = [tuple(pt) for pt in
+                              read_point_array(session_db.connection(), "destination", projection_id).tolist()]
+        session_db.close()
+
+        if not config_path:
+            return {"message": "Config image not found"}, HTTPStatus.NOT_FOUND
+
+        try:
+            config_img_etag = get_config_img_etag(config_path)
+        except ResourceNotFoundError:
+            return {"message": "Config image not found"}, HTTPStatus.NOT_FOUND
+
+        key = preview_key(undistortion, source_points, destination_points, config_img_etag, width, image_format, stage)
+
+        # Unchanged previews are answered without rendering or downloading anything
+        if key in request.if_none_match:
+            response = Response(status=HTTPStatus.NOT_MODIFIED)
+            response.set_etag(key)
+            return response
+
+        data = preview_cache.get(key)
+        if data is None:
+            try:
+                config_img = download_config_img(config_path)
+            except ResourceNotFoundError:
+                # The image was deleted since its ETag was read
+                return {"message": "Config image not found"}, HTTPStatus.NOT_FOUND
+
+            # Decoding, remapping and encoding run in a worker process, the request thread only waits
+            data = run_in_process(render_encoded_preview, config_img,
+                                  undistortion_values(undistortion), source_points, destination_points,
+                                  width, image_format, stage)
+
+            if data is None:
+                return {"error": "Homography points are invalid"}, HTTPStatus.UNPROCESSABLE_ENTITY
+
+            preview_cache.put(key, data)
+
+        response = Response(data, mimetype=PREVIEW_FORMATS[image_format][1], headers={"Content-Disposition": "inline"})
+        response.set_etag(key)
+        response.cache_control.no_cache = True
+        return response
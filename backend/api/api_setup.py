@@ -1,7 +1,14 @@
 from flask_restx import Resource
-from data_classes import Setup, Camera, Undistortion, SourcePoints, DestinationPoints
+from sqlalchemy import delete, select
+from data_classes import Setup, Camera, Projection, Undistortion, SourcePoints, DestinationPoints
 from database.session import start_session
-from data_classes.setup import setup_list_model, setup_patch_model, setup_ns, setup_patch_parser, setup_post_parser
+from data_classes.setup import (setup_list_model, setup_patch_model, setup_ns, setup_patch_parser, setup_post_parser,
+                                setup_delete_parser, setup_clone_parser)
+from database.clone import clone_setup
+from database.change_feed import record_changes
+from data_classes.change import CHANGE_DELETE
+from database.config_version import bump_config_version
+from jobs.queue import submit_job, cancel_requested
 from data_classes.camera import camera_post_parser, camera_list_model
 from http import HTTPStatus
 
@@ -89,26 +96,28 @@ class UpdateSetup(Resource):
         return setup_config, HTTPStatus.OK
 
     @setup_ns.response(HTTPStatus.OK, "Setup and related data deleted")
+    @setup_ns.response(HTTPStatus.ACCEPTED, "Setup deletion started as a background job")
     @setup_ns.response(HTTPStatus.NOT_FOUND, "Setup not found")
     @setup_ns.response(HTTPStatus.INTERNAL_SERVER_ERROR, "Error during deletion")
+    @setup_ns.expect(setup_delete_parser)
     def delete(self, setup_id):
-        """Delete a setup along with its cameras, undistortions, and point mappings."""
+        """Delete a setup, the database cascades the delete to its cameras and all their data."""
         session_db = start_session()
-        setup = session_db.query(Setup).filter_by(setup_id=setup_id).first()
+        args = setup_delete_parser.parse_args()
 
-        if not setup:
+        if session_db.get(Setup, setup_id) is None:
             session_db.close()
             return {"message": "Setup not found"}, HTTPStatus.NOT_FOUND
 
+        # Large setups are deleted camera by camera in the background, so no request waits on it
+        if args["background"]:
+            job_id = submit_job(session_db, "delete_setup", delete_setup_in_batches, setup_id)
+            session_db.close()
+            return {"job_id": str(job_id)}, HTTPStatus.ACCEPTED
+
         try:
-            # Delete child records manually (cascade not assumed)
-            for camera in setup.cameras:
-                session_db.query(Undistortion).filter_by(camera_id=camera.camera_id).delete()
-                session_db.query(SourcePoints).filter_by(camera_id=camera.camera_id).delete()
-                session_db.query(DestinationPoints).filter_by(camera_id=camera.camera_id).delete()
-                session_db.delete(camera)
-
-            session_db.delete(setup)
+            session_db.execute(delete(Setup).where(Setup.setup_id == setup_id))
+            record_changes(session_db, [(setup_id, None, Setup.__tablename__, CHANGE_DELETE)])
             session_db.commit()
 
             session_db.close()
@@ -119,6 +128,72 @@ class UpdateSetup(Resource):
             session_db.close()
             return {"error": f"Deletion failed: {str(e)}"}, HTTPStatus.INTERNAL_SERVER_ERROR
 
+
+def delete_setup_in_batches(session_db, setup_id):
+    """Deletes a setup one camera at a time, used as a background job
+
+        Every camera is deleted and committed on its own, so the rows of one camera are locked at a time.
+        The config version of the setup is bumped with every camera, and a cancel stops the job between
+        two cameras, the setup keeps the cameras that weren't deleted yet.
+
+        Args:
+            session_db: session of the job
+            setup_id: id of the setup to delete
+
+        Returns:
+            dictionary with the setup id and the amount of deleted cameras
+    """
+
+    camera_ids = session_db.execute(select(Camera.camera_id).where(Camera.setup_id == setup_id)).scalars().all()
+
+    for camera_id in camera_ids:
+        if cancel_requested(session_db):
+            return None
+
+        # Core deletes skip the flush listener, so the version is bumped here for the all config snapshot
+        session_db.execute(delete(Camera).where(Camera.camera_id == camera_id))
+        bump_config_version(session_db.connection(), {setup_id})
+        record_changes(session_db, [(setup_id, camera_id, Camera.__tablename__, CHANGE_DELETE)])
+        session_db.commit()
+
+    session_db.execute(delete(Setup).where(Setup.setup_id == setup_id))
+    record_changes(session_db, [(setup_id, None, Setup.__tablename__, CHANGE_DELETE)])
+    session_db.commit()
+
+    return {"setup_id": str(setup_id), "deleted_cameras": len(camera_ids)}
+
+
+# ============================
+# ROUTE: /setup/<uuid:setup_id>/clone
+# ============================
+@setup_ns.route("/setup/<uuid:setup_id>/clone")
+class CloneSetup(Resource):
+    @setup_ns.response(HTTPStatus.CREATED, "Setup cloned", setup_list_model)
+    @setup_ns.response(HTTPStatus.CONFLICT, "Setup name already exists")
+    @setup_ns.response(HTTPStatus.NOT_FOUND, "Setup not found")
+    @setup_ns.expect(setup_clone_parser)
+    def post(self, setup_id):
+        """Copy a setup with its cameras, projections, calibration, crops and pitch points, e.g. for a new match."""
+        session_db = start_session()
+        args = setup_clone_parser.parse_args()
+
+        setup = session_db.get(Setup, setup_id)
+        if not setup:
+            session_db.close()
+            return {"message": "Setup not found"}, HTTPStatus.NOT_FOUND
+
+        setup_name = (args.get("setup_name") or "").strip() or f"{setup.setup_name} (copy)"
+        if session_db.query(Setup).filter_by(setup_name=setup_name).first():
+            session_db.close()
+            return {"message": "Setup name already exists"}, HTTPStatus.CONFLICT
+
+        new_setup_id = clone_setup(session_db, setup_id, setup_name)
+        session_db.commit()
+        session_db.close()
+
+        return {"setup_id": str(new_setup_id), "setup_name": setup_name}, HTTPStatus.CREATED
+
+
 # ============================
 # ROUTE: /setup/<uuid:setup_id>/camera
 # ============================
@@ -149,11 +224,16 @@ class CameraRes(Resource):
         session_db.flush()  # Get generated camera_id
         camera_id = new_camera.camera_id
 
-        # Add related rows
-        session_db.add(Undistortion(camera_id=camera_id))
+        # Add a default projection with its related rows
+        projection = Projection(camera_id=camera_id)
+        session_db.add(projection)
+        session_db.flush()  # Get generated projection_id
+        projection_id = projection.projection_id
+
+        session_db.add(Undistortion(projection_id=projection_id))
         for i in range(4):
-            session_db.add(SourcePoints(camera_id=camera_id, index=i + 1))
-            session_db.add(DestinationPoints(camera_id=camera_id, index=i + 1))
+            session_db.add(SourcePoints(projection_id=projection_id, index=i + 1))
+            session_db.add(DestinationPoints(projection_id=projection_id, index=i + 1))
 
         session_db.commit()
         session_db.close()
@@ -1,14 +1,148 @@
+from flask import request, Response
 from flask_restx import Resource
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
 from data_classes.setup import setup_ns
 from http import HTTPStatus
 from database.session import start_session
-from data_classes import Setup, Detector, TeamDetector, Field, Camera
+from data_classes import Setup, Detector, TeamDetector, Field, Camera, Projection, ConfigSnapshot
+import json
+
+
+def all_config_query(setup_id):
+    # Select a setup with everything the all config needs, loaded with a fixed amount of queries
+    # instead of lazy loading the points, crops and projections of every camera one by one
+    return (
+        select(Setup)
+        .where(Setup.setup_id == setup_id)
+        .options(
+            joinedload(Setup.detector),
+            joinedload(Setup.team_detector),
+            joinedload(Setup.field),
+            selectinload(Setup.cameras).options(
+                selectinload(Camera.inner_points),
+                selectinload(Camera.outer_points),
+                selectinload(Camera.crops),
+                selectinload(Camera.projections).options(
+                    joinedload(Projection.undistortion),
+                    selectinload(Projection.source_points),
+                    selectinload(Projection.destination_points)
+                )
+            )
+        )
+    )
+
+
+def sorted_points(points):
+    # Return the points ordered by their index as [x, y] lists
+    return [[point.x, point.y] for point in sorted(points, key=lambda point: point.index)]
+
+
+def build_all_config(setup):
+    """Builds the all config of a setup loaded with all_config_query
+
+        Args:
+            setup: setup with its cameras and configurables loaded
+
+        Returns:
+            dictionary with the config used by the pipeline
+    """
+
+    all_config = {}
+
+    cameras: Camera = setup.cameras
+    camera_list = []
+
+    for camera in cameras:
+        # The pipeline uses the first projection of a camera
+        projection: Projection = camera.projections[0] if camera.projections else None
+        undistortion = projection.undistortion if projection is not None else None
+
+        camera_all_config = {
+            "id": str(camera.camera_id),
+            "resolution": [camera.resolution_width, camera.resolution_height],
+            "position": camera.position,
+            "field": {
+                "line_points": sorted_points(camera.inner_points),
+                "outer_points": sorted_points(camera.outer_points)
+            },
+            "homography": {
+                "source": {
+                    "points": sorted_points(projection.source_points) if projection is not None else []
+                },
+                "destination": {
+                    "points": sorted_points(projection.destination_points) if projection is not None else []
+                },
+            },
+            "distortion": {
+                "center": [undistortion.x, undistortion.y],
+                "length": [undistortion.w, undistortion.h],
+                "param": [undistortion.k1, undistortion.k2, undistortion.k3,
+                        undistortion.p1, undistortion.p2],
+                "zoom": undistortion.zoom
+            } if undistortion is not None else {},
+            "cropping": {
+                "type": camera.cropping_type,
+                "crops_xyxy": [
+                    [[crop.top_left_x, crop.top_left_y], [crop.bottom_right_x, crop.bottom_right_y]]
+                    for crop in camera.crops
+                ]
+            },
+            "path": camera.path,
+            "time_format": "%Y%m%d-%H%M%S",
+            "time_correction": camera.time_correction
+        }
+        camera_list.append(camera_all_config)
+
+    all_config["cameras"] = camera_list
+
+    detector: Detector = setup.detector
+    all_config["detector"] = detector.get_config_id()["config"] if detector is not None else {}
+
+    all_config["device"] = setup.device_type
+
+    field: Field = setup.field
+    all_config["field_model"] = {
+        "dimensions": [field.pitch_width, field.pitch_height],
+        "path": [field.path],
+        "left_top_corner": [field.left_top_x, field.left_top_y],
+        "right_bottom_corner": [field.right_bottom_x, field.right_bottom_y]
+    } if field is not None else {}
+
+    all_config["output"] = {
+        "path": setup.output_path,
+        "extract_data_path": setup.extract_data_path,
+        "fps": setup.output_fps
+    }
+    all_config["timestamps"] = {
+        "start": str(setup.timestamp_start),
+        "end": str(setup.timestamp_end),
+        "format": "%Y-%m-%d %H:%M:%S"
+    }
+    all_config["debug"] = {
+        "visualize": setup.debug_visualize
+    }
+
+    all_config["stop_team_after"] = setup.stop_team_after
+    all_config["tracker_type"] = setup.tracker_type
+
+    team_detector: TeamDetector = setup.team_detector
+    all_config["team_detector"] = team_detector.get_config_id()["config"] if team_detector is not None else {}
+
+    return all_config
+
+
+def all_config_etag(setup_id, config_version):
+    # Return the ETag of a version of the all config of a setup
+    return f"{setup_id}-{config_version}"
 
 
 @setup_ns.route("/setup/<uuid:setup_id>/all-config")
 class SetupAllConfig(Resource):
     # Return all the config info from a certain setup as a JSON
     @setup_ns.response(HTTPStatus.OK, "Setup all config correctly loaded")
+    @setup_ns.response(HTTPStatus.NOT_MODIFIED, "Setup all config didn't change since the given ETag")
     @setup_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
     @setup_ns.response(HTTPStatus.BAD_REQUEST, "Missing fields or typed them incorrectly")
     @setup_ns.response(HTTPStatus.LOCKED, "Setup all config don't exist")
@@ -16,83 +150,44 @@ class SetupAllConfig(Resource):
     def get(self, setup_id):
         session_db = start_session()
 
-        all_config = {}
+        config_version = session_db.execute(
+            select(Setup.config_version).where(Setup.setup_id == setup_id)
+        ).scalar_one_or_none()
 
-        setup: Setup = session_db.query(Setup).filter_by(setup_id=setup_id).first()
+        if config_version is None:
+            session_db.close()
+            return {"message": "Setup not found"}, HTTPStatus.NOT_FOUND
 
-        cameras: Camera = setup.cameras
-        camera_list = []
+        # Unchanged configs are answered with the version lookup only
+        etag = all_config_etag(setup_id, config_version)
+        if etag in request.if_none_match:
+            session_db.close()
+            response = Response(status=HTTPStatus.NOT_MODIFIED)
+            response.set_etag(etag)
+            return response
 
-        for camera in cameras:
-            camera_all_config = {
-                "id": str(camera.camera_id),
-                "resolution": [camera.resolution_width, camera.resolution_height],
-                "position": camera.position,
-                "field": {
-                    "line_points": [[point.x, point.y] for point in camera.inner_points],
-                    "outer_points": [[point.x, point.y] for point in camera.outer_points]
-                },
-                "homography": {
-                    "source": {
-                        "points": [[point.x, point.y] for point in camera.source_points]
-                    },
-                    "destination": {
-                        "points": [[point.x, point.y] for point in camera.destination_points]
-                    },
-                },
-                "distortion": {
-                    "center": [camera.undistortion.x, camera.undistortion.y],
-                    "length": [camera.undistortion.w, camera.undistortion.h],
-                    "param": [camera.undistortion.k1, camera.undistortion.k2, camera.undistortion.k3,
-                            camera.undistortion.p1, camera.undistortion.p2],
-                    "zoom": camera.undistortion.zoom
-                },
-                "cropping": {
-                    "type": camera.cropping_type,
-                    "crops_xyxy": [
-                        [[crop.top_left_x, crop.top_left_y], [crop.bottom_right_x, crop.bottom_right_y]]
-                        for crop in camera.crops
-                    ]
-                },
-                "path": camera.path,
-                "time_format": "%Y%m%d-%H%M%S",
-                "time_correction": camera.time_correction
-            }
-            camera_list.append(camera_all_config)
-
-        all_config["cameras"] = camera_list
-
-        detector: Detector = setup.detector
-        all_config["detector"] = detector.get_config_id()["config"] if detector is not None else {}
-
-        all_config["device"] = setup.device_type
-
-        field: Field = setup.field
-        all_config["field_model"] = {
-            "dimensions": [field.pitch_width, field.pitch_height],
-            "path": [field.path],
-            "left_top_corner": [field.left_top_x, field.left_top_y],
-            "right_bottom_corner": [field.right_bottom_x, field.right_bottom_y]
-        } if field is not None else {}
-
-        all_config["output"] = {
-            "path": setup.output_path,
-            "extract_data_path": setup.extract_data_path,
-            "fps": setup.output_fps
-        }
-        all_config["timestamps"] = {
-            "start": str(setup.timestamp_start),
-            "end": str(setup.timestamp_end),
-            "format": "%Y-%m-%d %H:%M:%S"
-        }
-        all_config["debug"] = {
-            "visualize": setup.debug_visualize
-        }
+        snapshot: ConfigSnapshot = session_db.get(ConfigSnapshot, setup_id)
+        if snapshot is not None and snapshot.config_version == config_version:
+            config = snapshot.config
+        else:
+            # Materialize the config of this version, every write to the setup bumps the version
+            setup: Setup = session_db.execute(all_config_query(setup_id)).unique().scalar_one()
+            config = json.dumps(build_all_config(setup))
+
+            if snapshot is None:
+                session_db.add(ConfigSnapshot(setup_id=setup_id, config_version=config_version, config=config))
+            else:
+                snapshot.update_snapshot(config_version, config)
 
-        all_config["stop_team_after"] = setup.stop_team_after
-        all_config["tracker_type"] = setup.tracker_type
+            try:
+                session_db.commit()
+            except IntegrityError:
+                # Another request stored the snapshot of this setup first
+                session_db.rollback()
 
-        team_detector: TeamDetector = setup.team_detector
-        all_config["team_detector"] = team_detector.get_config_id()["config"] if team_detector is not None else {}
+        session_db.close()
 
-        return all_config
+        response = Response(config, mimetype="application/json")
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        return response
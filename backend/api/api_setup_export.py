@@ -0,0 +1,65 @@
+from flask import request, Response, stream_with_context
+from flask_restx import Resource
+from sqlalchemy.exc import IntegrityError
+from data_classes.setup import setup_ns
+from http import HTTPStatus
+from database.session import start_session
+from database.setup_export import export_setups, import_setup
+import json
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+@setup_ns.route("/setups/export")
+class SetupExport(Resource):
+    @setup_ns.response(HTTPStatus.OK, "Setups streamed as NDJSON, one setup per line")
+    @setup_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    # Stream every setup with its cameras, projections, calibration, crops and points, e.g. to move them to
+    # another environment
+    def get(self):
+        def generate():
+            session_db = start_session()
+            for record in export_setups(session_db.connection()):
+                yield json.dumps(record) + "\n"
+            session_db.close()
+
+        # The session of the request stays open until the last line is sent
+        return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE,
+                        headers={"Content-Disposition": "attachment; filename=setups.ndjson"})
+
+
+@setup_ns.route("/setups/import")
+class SetupImport(Resource):
+    @setup_ns.response(HTTPStatus.OK, "Setups imported, skipped and failed lines are listed")
+    @setup_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    # Import setups exported by /setups/export, every line is read as it arrives and committed on its own
+    def post(self):
+        session_db = start_session()
+        imported = 0
+        skipped = []
+        failed = []
+
+        for line_number, line in enumerate(request.stream, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                setup_id = import_setup(session_db, json.loads(line))
+            except (KeyError, TypeError, ValueError) as e:
+                session_db.rollback()
+                failed.append({"line": line_number, "error": f"Invalid setup: {e}"})
+                continue
+            except IntegrityError as e:
+                session_db.rollback()
+                failed.append({"line": line_number, "error": f"Setup conflicts with stored rows: {e.orig}"})
+                continue
+
+            if setup_id is None:
+                skipped.append({"line": line_number, "message": "Setup id or name already exists"})
+                continue
+
+            session_db.commit()
+            imported += 1
+
+        session_db.close()
+        return {"imported": imported, "skipped": skipped, "failed": failed}, HTTPStatus.OK
@@ -1,11 +1,60 @@
 from flask import request, jsonify
 from flask_restx import Namespace, Resource
 from http import HTTPStatus
-import numpy as np
-import cv2
+from processing.undistortion import optimal_new_camera_matrix
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
 
 undistort_points_ns = Namespace("undistort_points", description="Using the openCv undistortPoints function")
 
+# Amounts of distortion coefficients OpenCV accepts
+DIST_COEFFS_LENGTHS = (4, 5, 8, 12, 14)
+
+# Most jobs one batch request may contain
+MAX_BATCH_JOBS = 500
+
+
+def undistort_points(data):
+    """Applies undistortPoints to one job of points
+
+        Args:
+            data: dictionary with points, camMatrix, distCoeffs, zoom, imageWidth and imageHeight
+
+        Returns:
+            dictionary with the undistorted points and the optimal new camera matrix
+    """
+
+    points = np.array(data["points"], dtype=np.float64).reshape(-1, 1, 2)
+    cam_matrix = tuple(float(value) for value in data["camMatrix"])
+    dis_coeffs = tuple(float(value) for value in data["distCoeffs"])
+    if len(cam_matrix) != 9:
+        raise ValueError("camMatrix needs 9 values")
+    if len(dis_coeffs) not in DIST_COEFFS_LENGTHS:
+        raise ValueError(f"distCoeffs needs {', '.join(map(str, DIST_COEFFS_LENGTHS))} values")
+    zoom = float(data["zoom"])
+
+    imgW, imgH = int(data["imageWidth"]), int(data["imageHeight"])
+
+    undist_cam = optimal_new_camera_matrix(cam_matrix, dis_coeffs, (imgW, imgH), zoom)
+
+    if len(points) == 0:
+        undistorted_list = []
+    else:
+        undistortedPoints = cv2.undistortPoints(
+            points,
+            np.array(cam_matrix, dtype=np.float64).reshape(3, 3),
+            np.array(dis_coeffs, dtype=np.float64).reshape(1, -1),
+            None, None, undist_cam
+        )
+        undistorted_list = undistortedPoints.reshape(-1, 2).tolist()
+
+    return {
+        "undistorted_points": undistorted_list,
+        "undist_cam": undist_cam.tolist()
+    }
+
 
 @undistort_points_ns.route('/undistort_points')
 class UndistortPointsRes(Resource):
@@ -17,23 +66,29 @@ class UndistortPointsRes(Resource):
     def post(self):
         data = request.get_json()
 
-        points = np.array(data["points"], dtype=np.float64).reshape(-1, 1, 2)
-        cam_matrix = np.array(data["camMatrix"], dtype=np.float64).reshape(3, 3)
-        dis_coeffs = np.array(data["distCoeffs"], dtype=np.float64).reshape(1, -1)
-        zoom = float(data["zoom"])
+        return jsonify(undistort_points(data))
 
-        imgW, imgH = int(data["imageWidth"]), int(data["imageHeight"])
 
-        undist_cam, _ = cv2.getOptimalNewCameraMatrix(cam_matrix, dis_coeffs, (imgW, imgH), zoom, (imgW, imgH))
+@undistort_points_ns.route('/undistort_points/batch')
+class UndistortPointsBatchRes(Resource):
+    @undistort_points_ns.response(HTTPStatus.OK, "Points of every job undistorted")
+    @undistort_points_ns.response(HTTPStatus.UNAUTHORIZED, "Token is invalid")
+    @undistort_points_ns.response(HTTPStatus.BAD_REQUEST, "Missing jobs or more jobs than a batch may contain")
+    @undistort_points_ns.response(HTTPStatus.UNPROCESSABLE_ENTITY, "Provided data is invalid")
+    # Apply undistortPoints to many sets of points (e.g. every camera and projection of a setup) in one request
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        jobs = data.get("jobs")
 
-        undist_cam = np.array(undist_cam, dtype=np.float64)
+        if not isinstance(jobs, list):
+            return {"error": "A list of jobs is required"}, HTTPStatus.BAD_REQUEST
 
-        # undistortedPoints = cv2.undistortPoints(points, cam_matrix, dis_coeffs, P=cam_matrix)
-        undistortedPoints = cv2.undistortPoints(points, cam_matrix, dis_coeffs, None, None, undist_cam)
+        if len(jobs) > MAX_BATCH_JOBS:
+            return {"error": f"A batch may contain at most {MAX_BATCH_JOBS} jobs"}, HTTPStatus.BAD_REQUEST
 
-        undistorted_list = undistortedPoints.reshape(-1, 2).tolist()
+        try:
+            results = [undistort_points(job) for job in jobs]
+        except (KeyError, TypeError, ValueError, cv2.error) as e:
+            return {"error": f"Invalid job: {str(e)}"}, HTTPStatus.UNPROCESSABLE_ENTITY
 
-        return jsonify({
-            "undistorted_points": undistorted_list,
-            "undist_cam": undist_cam.tolist()
-        })
+        return {"results": results}, HTTPStatus.OK
@@ -0,0 +1,240 @@
+# ASGI entry point of the backend, run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+# The routes the pipeline and editors poll most, the all config and the config image download, are served
+# with async database sessions and an async blob client, so waiting on the database or blob storage doesn't
+# hold a worker. The config image goes through the same local blob cache and downscaled variants as in Flask. Setups also push their changes to editors as Server-Sent Events from here. Every other route is
+# served by the Flask app (main.py) mounted below them.
+
+import asyncio
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+import json
+import uuid
+from a2wsgi import WSGIMiddleware
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotFoundError
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+import database.async_session as db
+from data_classes import Camera, ConfigSnapshot, Setup
+from api.api_setup_all_config import all_config_query, all_config_etag, build_all_config
+from api.api_camera_config_path import (STORAGE_ACCOUNT_CONNECTION, STORAGE_ACCOUNT_CONTAINER, BLOB_CHUNK_SIZE,
+                                        plan_blob_download)
+from processing.blob_cache import blob_cache, revalidate_cached_blob_async, read_file_range
+from processing.thumbnails import PYRAMID_WIDTHS, variant_path
+from events.change_hub import change_hub, format_event
+from jobs.queue import recover_jobs
+from main import app as flask_app
+
+# Threads the mounted Flask app may use, like the threads of a threaded WSGI server
+FLASK_THREADS = 32
+
+# Seconds between keep-alive comments on an idle event stream, so proxies don't close it
+KEEPALIVE_INTERVAL = 15
+
+_blob_service_client = None
+
+
+def get_blob_service_client():
+    # Return the async blob client, created on first use so the app starts without storage
+    global _blob_service_client
+    if _blob_service_client is None:
+        from azure.storage.blob.aio import BlobServiceClient
+        _blob_service_client = BlobServiceClient.from_connection_string(
+            STORAGE_ACCOUNT_CONNECTION, max_single_get_size=BLOB_CHUNK_SIZE, max_chunk_get_size=BLOB_CHUNK_SIZE
+        )
+    return _blob_service_client
+
+
+def parse_uuid(value):
+    # Return the value as a UUID, None when it isn't one
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+def cors_headers(request):
+    # Same CORS headers flask_cors adds to the Flask routes (any origin, with credentials)
+    origin = request.headers.get("origin")
+    return {"Access-Control-Allow-Origin": origin, "Access-Control-Allow-Credentials": "true"} if origin else {}
+
+
+def not_modified(request, etag):
+    # Return whether the ETag of the client is still the current one
+    if_none_match = request.headers.get("if-none-match", "")
+    return any(tag.strip().removeprefix("W/").strip('"') == etag for tag in if_none_match.split(","))
+
+
+async def setup_all_config(request):
+    # Async variant of SetupAllConfig.get, the config is served from the snapshot of its version
+    setup_id = parse_uuid(request.path_params["setup_id"])
+
+    async with db.AsyncSessionLocal() as session_db:
+        config_version = (await session_db.execute(
+            select(Setup.config_version).where(Setup.setup_id == setup_id)
+        )).scalar_one_or_none() if setup_id is not None else None
+
+        if config_version is None:
+            return JSONResponse({"message": "Setup not found"}, HTTPStatus.NOT_FOUND, headers=cors_headers(request))
+
+        etag = all_config_etag(setup_id, config_version)
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache", **cors_headers(request)}
+        if not_modified(request, etag):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        snapshot: ConfigSnapshot = await session_db.get(ConfigSnapshot, setup_id)
+        if snapshot is not None and snapshot.config_version == config_version:
+            config = snapshot.config
+        else:
+            # Everything build_all_config touches is eager loaded, so nothing is lazy loaded outside of an await
+            setup: Setup = (await session_db.execute(all_config_query(setup_id))).unique().scalar_one()
+            config = json.dumps(build_all_config(setup))
+
+            if snapshot is None:
+                session_db.add(ConfigSnapshot(setup_id=setup_id, config_version=config_version, config=config))
+            else:
+                snapshot.update_snapshot(config_version, config)
+
+            try:
+                await session_db.commit()
+            except IntegrityError:
+                # Another request stored the snapshot of this setup first
+                await session_db.rollback()
+
+    return Response(config, media_type="application/json", headers=headers)
+
+
+async def blob_download(request, blob_path):
+    """Async variant of blob_download_response, answers the download of a blob from the local blob cache when the
+        cached version is still current and streams it from blob storage otherwise
+
+        Args:
+            request: request of the client
+            blob_path: path of the blob
+
+        Returns:
+            streamed response
+
+        Raises:
+            ResourceNotFoundError: when the blob doesn't exist
+    """
+
+    blob_client = get_blob_service_client().get_blob_client(container=STORAGE_ACCOUNT_CONTAINER, blob=blob_path)
+    try:
+        properties, file = await revalidate_cached_blob_async(blob_client, blob_path)
+    except ResourceNotFoundError:
+        blob_cache.discard(blob_path)
+        raise
+
+    status, headers, byte_range = plan_blob_download(properties, request.headers)
+    headers.update(cors_headers(request))
+    if byte_range is None:
+        if file is not None:
+            file.close()
+        return Response(status_code=status, headers=headers)
+
+    offset, length = byte_range
+    if file is not None:
+        # The file is read in the thread pool of Starlette, not on the event loop
+        return StreamingResponse(read_file_range(file, offset, length), status_code=status, headers=headers)
+
+    downloader = await blob_client.download_blob(offset=offset, length=length, etag=properties.etag,
+                                                 match_condition=MatchConditions.IfNotModified)
+    chunks = downloader.chunks()
+    if status == HTTPStatus.OK:
+        chunks = blob_cache.store_async(blob_path, properties, chunks)
+    return StreamingResponse(chunks, status_code=status, headers=headers)
+
+
+async def camera_config_img(request):
+    # Async variant of CamCfgPathRes.get, the blob or a byte range of it is streamed to the client while it is downloaded
+    # With a size a downscaled variant is sent, e.g. for the tiles of the setup overview
+    camera_id = parse_uuid(request.path_params["camera_id"])
+
+    size = request.query_params.get("size")
+    if size is not None and size not in map(str, PYRAMID_WIDTHS):
+        return JSONResponse({"message": f"size must be one of {', '.join(map(str, PYRAMID_WIDTHS))}"},
+                            HTTPStatus.BAD_REQUEST, headers=cors_headers(request))
+
+    async with db.AsyncSessionLocal() as session_db:
+        config_path = (await session_db.execute(
+            select(Camera.config_img_path).where(Camera.camera_id == camera_id)
+        )).scalar_one_or_none() if camera_id is not None else None
+
+    if not config_path:
+        return JSONResponse({"message": "Config image not found"}, HTTPStatus.NOT_FOUND, headers=cors_headers(request))
+
+    # Variants that aren't made yet, or aren't made because the image is smaller, fall back to the original
+    if size is not None:
+        try:
+            return await blob_download(request, variant_path(config_path, int(size)))
+        except ResourceNotFoundError:
+            pass
+
+    try:
+        return await blob_download(request, config_path)
+    except ResourceNotFoundError:
+        return JSONResponse({"message": "Config image not found"}, HTTPStatus.NOT_FOUND, headers=cors_headers(request))
+
+
+async def setup_events(request):
+    # Stream the changes of a setup as Server-Sent Events, e.g. points dragged by another editor
+    setup_id = parse_uuid(request.path_params["setup_id"])
+
+    async with db.AsyncSessionLocal() as session_db:
+        exists = (await session_db.execute(
+            select(Setup.setup_id).where(Setup.setup_id == setup_id)
+        )).scalar_one_or_none() if setup_id is not None else None
+
+    if exists is None:
+        return JSONResponse({"message": "Setup not found"}, HTTPStatus.NOT_FOUND, headers=cors_headers(request))
+
+    async def stream():
+        # Subscribe once the response is sent, so a client leaving earlier never leaves a subscription behind
+        queue = await change_hub.subscribe(setup_id)
+        try:
+            yield format_event("ready", {"setup_id": str(setup_id)})
+            while True:
+                try:
+                    yield format_event(*await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL))
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            change_hub.unsubscribe(setup_id, queue)
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **cors_headers(request)}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+
+@event.listens_for(Session, "after_commit")
+def push_committed_changes(session):
+    # Edits served by the mounted Flask app are pushed right away instead of at the next read of the feed
+    change_hub.wake()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Jobs a previous run of this server left unfinished never finish, they are failed before serving requests
+    await asyncio.to_thread(recover_jobs)
+    yield
+
+    # Stop pushing changes and close the connections of the async clients on shutdown
+    await change_hub.close()
+    if _blob_service_client is not None:
+        await _blob_service_client.close()
+    await db.dispose_async_engine()
+
+
+app = Starlette(
+    routes=[
+        Route("/api/setup/{setup_id}/all-config", setup_all_config, methods=["GET"]),
+        Route("/api/camera/{camera_id}/cam_cfg_path", camera_config_img, methods=["GET"]),
+        Route("/api/setup/{setup_id}/events", setup_events, methods=["GET"]),
+        Mount("/", app=WSGIMiddleware(flask_app, workers=FLASK_THREADS)),
+    ],
+    lifespan=lifespan
+)
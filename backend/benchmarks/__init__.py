@@ -0,0 +1 @@
+# This package contains benchmarks of the backend, run them from the backend folder with python -m benchmarks.<name>
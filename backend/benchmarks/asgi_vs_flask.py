@@ -0,0 +1,130 @@
+# Benchmark of concurrent all config requests served by the Flask app and by the ASGI app
+# Both servers run in this process on a file database, the requests are sent by an async client
+# Run with: CONF_TOOL_DB_URL=sqlite:////tmp/benchmark.db python -m benchmarks.asgi_vs_flask
+# The config image route streams from blob storage, benchmark it against Azurite with --camera-id
+# Client and servers share one process, on SQLite both are mostly bound by it; the async routes gain the most
+# when requests wait on postgres or blob storage, point CONF_TOOL_DB_URL at postgres to see that
+
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+import logging
+import httpx
+import uvicorn
+from werkzeug.serving import make_server
+from data_classes import Base, Setup, Camera, Projection, OuterPoints
+from database.session import SessionLocal, get_engine
+from asgi import app as asgi_app
+from main import app as flask_app
+
+CAMERAS = 20
+OUTER_POINTS = 50
+FLASK_PORT = 5101
+ASGI_PORT = 5102
+
+
+def seed():
+    # Store a setup with CAMERAS cameras and return its id
+    Base.metadata.create_all(get_engine())
+    with SessionLocal() as session_db:
+        setup = Setup(setup_name=f"Benchmark Setup {time.time_ns()}")
+        session_db.add(setup)
+        session_db.flush()
+        for c in range(CAMERAS):
+            camera = Camera(camera_name=f"Camera {c}", setup_id=setup.setup_id)
+            session_db.add(camera)
+            session_db.flush()
+            session_db.add(Projection(camera_id=camera.camera_id))
+            session_db.add_all(
+                OuterPoints(camera_id=camera.camera_id, index=i, x=i / OUTER_POINTS, y=0.5)
+                for i in range(1, OUTER_POINTS + 1)
+            )
+        session_db.commit()
+        return setup.setup_id
+
+
+def start_flask():
+    # Threaded werkzeug server, one thread per request like the development server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", FLASK_PORT, flask_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi():
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=ASGI_PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    def stop():
+        server.should_exit = True
+        thread.join()
+
+    return stop
+
+
+async def load(url, requests, concurrency, headers):
+    # Send requests to the url with at most concurrency in flight, return the latencies and the elapsed time
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                await response.aread()
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return latencies, time.perf_counter() - start
+
+
+def report(name, latencies, elapsed):
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<28} {len(latencies) / elapsed:8.1f} req/s "
+          f"p50 {1000 * percentiles[49]:7.2f} ms p95 {1000 * percentiles[94]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--camera-id", help="camera with a config image in blob storage")
+    args = parser.parse_args()
+
+    setup_id = seed()
+    stops = [start_flask(), start_asgi()]
+    try:
+        # The first request stores the snapshot, so every run below serves the same config
+        httpx.get(f"http://127.0.0.1:{FLASK_PORT}/api/setup/{setup_id}/all-config").raise_for_status()
+        all_config = httpx.get(f"http://127.0.0.1:{ASGI_PORT}/api/setup/{setup_id}/all-config")
+        etag = all_config.headers["ETag"]
+
+        print(f"{args.requests} requests, {args.concurrency} concurrent, {CAMERAS} cameras")
+        cases = [("all-config", f"/api/setup/{setup_id}/all-config", {}),
+                 ("all-config 304", f"/api/setup/{setup_id}/all-config", {"If-None-Match": etag})]
+        if args.camera_id:
+            cases.append(("config image", f"/api/camera/{args.camera_id}/cam_cfg_path", {}))
+
+        for case, path, headers in cases:
+            for name, port in (("flask", FLASK_PORT), ("asgi", ASGI_PORT)):
+                latencies, elapsed = asyncio.run(
+                    load(f"http://127.0.0.1:{port}{path}", args.requests, args.concurrency, headers)
+                )
+                report(f"{name} {case}", latencies, elapsed)
+    finally:
+        for stop in stops:
+            stop()
+
+
+if __name__ == "__main__":
+    main()
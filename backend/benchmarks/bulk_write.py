@@ -0,0 +1,91 @@
+# Benchmark of the statements needed to save the pitch polygon of a camera
+# Compares deleting and adding every point through the ORM with the diff based bulk write
+# Run with: python -m benchmarks.bulk_write
+
+from contextlib import contextmanager
+import math
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from data_classes import Base, Setup, Camera, OuterPoints
+from database.bulk_write import write_indexed_points
+
+POLYGON_POINTS = 200
+
+
+@contextmanager
+def count_statements(engine):
+    # Count the statements sent to the database inside the with block, with the rows each one writes
+    statements = []
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, max(0, cursor.rowcount)))
+
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def polygon(amount, offset=0.0):
+    # Return a circle of amount points as normalized coordinates
+    return [
+        {"x": 0.5 + 0.4 * math.cos(2 * math.pi * i / amount) + offset, "y": 0.5 + 0.4 * math.sin(2 * math.pi * i / amount)}
+        for i in range(amount)
+    ]
+
+
+def orm_write(session_db, camera, points):
+    # The previous write path, every stored point is deleted and every new point added through the ORM
+    for point in camera.outer_points:
+        session_db.delete(point)
+
+    for index, point in enumerate(points, start=1):
+        session_db.add(OuterPoints(camera_id=camera.camera_id, index=index, x=point["x"], y=point["y"]))
+
+
+def bulk_write(session_db, camera, points):
+    write_indexed_points(session_db, OuterPoints, camera, points)
+
+
+def run(write, engine, session_factory):
+    # Save a new polygon, save it unchanged and save it with a few moved points
+    with session_factory() as session_db:
+        setup = Setup(setup_name="Benchmark Setup")
+        session_db.add(setup)
+        session_db.flush()
+        camera = Camera(camera_name="Benchmark Camera", setup_id=setup.setup_id)
+        session_db.add(camera)
+        session_db.commit()
+
+        points = polygon(POLYGON_POINTS)
+        moved = [dict(point) for point in points]
+        for point in moved[:5]:
+            point["x"] += 0.01
+
+        results = {}
+        for name, data in (("first save", points), ("unchanged save", points), ("5 points moved", moved)):
+            start = time.perf_counter()
+            with count_statements(engine) as statements:
+                write(session_db, camera, data)
+                session_db.commit()
+            rows = sum(count for statement, count in statements if not statement.startswith("SELECT"))
+            results[name] = (len(statements), rows, 1000 * (time.perf_counter() - start))
+
+        return results
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    print(f"Statements to save a {POLYGON_POINTS} point polygon")
+    for name, write in (("orm", orm_write), ("bulk", bulk_write)):
+        for case, (statements, rows, ms) in run(write, engine, session_factory).items():
+            print(f"{name:>5} {case:<15} {statements:>4} statements {rows:>4} rows written {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# Load generator replaying the traffic of operators editing calibrations
+# Virtual editors each open a camera of a synthetic venue and then drag homography and pitch points, sweep the
+# undistortion sliders and load cameras, like the camera page does. Every drag step sends undistort_points and a
+# PUT, so a few editors already send dozens of requests per second.
+# The server is started with uvicorn for every worker count and loaded with every amount of editors, which gives
+# the throughput, latency and error rate curves per worker count
+# Run with: python -m benchmarks.load --workers 1,2,4 --editors 1,8,32 --duration 20
+# The database is a temporary SQLite file unless --database is given, use postgres to get numbers like production.
+# Load a server that already runs with --url, --database must then be the database of that server.
+# Add --images to also download config images, the server then needs blob storage (e.g. Azurite)
+
+import argparse
+import asyncio
+import csv
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+import cv2
+from sqlalchemy.orm import sessionmaker
+from data_classes import Base
+from database.session import create_db_engine
+from benchmarks.endpoints import percentile
+from benchmarks.venue import generate_venue, homography_points, pitch_polygon, RESOLUTION
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Size of the venue the editors work on
+CAMERAS = 8
+PITCH_POINTS = 200
+
+# Requests per second the frontend sends while a point is dragged or a slider moved
+DRAG_RATE = 30
+SLIDER_RATE = 20
+
+# Share of the actions of an editor, the rest of the time the editor looks at the result
+ACTIONS = {"homography drag": 0.4, "pitch drag": 0.2, "slider sweep": 0.25, "image load": 0.15}
+THINK_TIME = (0.5, 2.0)
+
+# Seconds a request may take before it counts as an error
+REQUEST_TIMEOUT = 30
+
+SERVER_PORT = 5201
+
+
+class Recorder:
+    """Collects the outcome of every request of a load level
+
+        Args:
+            start: time the measured part of the level starts at, earlier requests are ignored
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, route, started, ok):
+        # Store the latency of a request, or an error when it failed or timed out
+        if started < self.start:
+            return
+        if ok:
+            self.latencies.setdefault(route, []).append(1000 * (time.perf_counter() - started))
+        else:
+            self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed, routes=None):
+        # Return the throughput, latency percentiles and error rate over the given routes, every route by default
+        routes = routes or set(self.latencies) | set(self.errors)
+        latencies = [latency for route in routes for latency in self.latencies.get(route, [])]
+        errors = sum(self.errors.get(route, 0) for route in routes)
+        total = len(latencies) + errors
+        return {
+            "requests": total,
+            "throughput": round(total / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+            "error_rate": round(errors / total, 4) if total else 0.0
+        }
+
+
+class Editor:
+    """Virtual operator editing one camera of the venue
+
+        Args:
+            client: HTTP client of the editor
+            recorder: Recorder of the load level
+            venue: generated Venue
+            rng: random generator of the editor
+            images: whether config images are downloaded when a camera is loaded
+    """
+
+    def __init__(self, client, recorder, venue, rng, images):
+        self.client = client
+        self.recorder = recorder
+        self.venue = venue
+        self.rng = rng
+        self.images = images
+        self.camera_id = rng.choice(venue.camera_ids)
+        self.projection_id = rng.choice(venue.projection_ids[self.camera_id])
+        self.pitch = [pitch_polygon(PITCH_POINTS, rng, scale) for scale in (0.35, 0.45)]
+        self.homography = [{str(index): point for index, point in enumerate(points, 1)}
+                           for points in homography_points(rng)]
+
+    async def request(self, route, method, url, **kwargs):
+        # Send a request and record its outcome, the editor carries on after errors like the frontend does
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        self.recorder.record(route, started, ok)
+
+    async def paced(self, steps, rate, step):
+        # Run a step rate times per second, a step that takes longer delays the next one like a busy frontend
+        interval = 1 / rate
+        for index in range(steps):
+            started = time.perf_counter()
+            await step(index)
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+    def undistort_body(self, points, k1=-0.2):
+        width, height = RESOLUTION
+        return {
+            "points": [[point["x"] * width, point["y"] * height] for point in points],
+            "camMatrix": [width, 0, width / 2, 0, width, height / 2, 0, 0, 1],
+            "distCoeffs": [k1, 0.05, 0, 0, 0],
+            "zoom": 0.5,
+            "imageWidth": width,
+            "imageHeight": height
+        }
+
+    async def homography_drag(self):
+        # Drag one homography point, every step undistorts the points and stores them
+        point = self.homography[0][str(self.rng.randint(1, 4))]
+        dx, dy = self.rng.uniform(-0.002, 0.002), self.rng.uniform(-0.002, 0.002)
+
+        async def step(index):
+            point["x"] += dx
+            point["y"] += dy
+            await self.request("undistort_points", "POST", "/api/undistort_points",
+                               json=self.undistort_body(list(self.homography[0].values())))
+            await self.request("homography PUT", "PUT", f"/api/projection/{self.projection_id}/homography",
+                               json=self.homography)
+
+        await self.paced(self.rng.randint(10, 40), DRAG_RATE, step)
+
+    async def pitch_drag(self):
+        # Drag one pitch point, every step undistorts the polygon and the polygon is stored when it is released
+        polygon = self.pitch[self.rng.randint(0, 1)]
+        point = polygon[self.rng.randrange(len(polygon))]
+        dx = self.rng.uniform(-0.002, 0.002)
+
+        async def step(index):
+            point["x"] += dx
+            await self.request("undistort_points", "POST", "/api/undistort_points", json=self.undistort_body(polygon))
+
+        await self.paced(self.rng.randint(10, 40), DRAG_RATE, step)
+        await self.request("pitch PUT", "PUT", f"/api/camera/{self.camera_id}/pitch", json=self.pitch)
+
+    async def slider_sweep(self):
+        # Move the k1 slider, every step stores the parameters and undistorts the pitch polygon
+        start, end = self.rng.uniform(-0.4, 0), self.rng.uniform(-0.4, 0)
+        steps = self.rng.randint(10, 30)
+
+        async def step(index):
+            k1 = start + (end - start) * index / steps
+            parameters = {"x": 50, "y": 50, "w": 50, "h": 50, "k1": k1, "k2": 0.05, "p1": 0, "p2": 0, "k3": 0,
+                          "zoom": 0.5}
+            await self.request("undistortion PUT", "PUT", f"/api/projection/{self.projection_id}/undistortion",
+                               json=parameters)
+            await self.request("undistort_points", "POST", "/api/undistort_points",
+                               json=self.undistort_body(self.pitch[1], k1))
+
+        await self.paced(steps, SLIDER_RATE, step)
+
+    async def image_load(self):
+        # Open another camera, the camera page loads the camera, the setup and the config image
+        self.camera_id = self.rng.choice(self.venue.camera_ids)
+        self.projection_id = self.rng.choice(self.venue.projection_ids[self.camera_id])
+        await self.request("camera GET", "GET", f"/api/camera/{self.camera_id}")
+        await self.request("all-config", "GET", f"/api/setup/{self.venue.setup_id}/all-config")
+        if self.images:
+            await self.request("config image", "GET", f"/api/camera/{self.camera_id}/cam_cfg_path")
+
+    async def run(self, deadline):
+        # Pick actions until the deadline, with a pause after every action
+        actions = [getattr(self, action.replace(" ", "_")) for action in ACTIONS]
+        while time.perf_counter() < deadline:
+            await self.rng.choices(actions, weights=list(ACTIONS.values()))[0]()
+            await asyncio.sleep(self.rng.uniform(*THINK_TIME))
+
+
+async def run_level(url, venue, editors, duration, warmup, images, seed):
+    """Runs a load level, every editor acting for warmup plus duration seconds
+
+        Args:
+            url: base url of the server
+            venue: generated Venue
+            editors: amount of concurrent editors
+            duration: seconds measured
+            warmup: seconds before the measured part, e.g. to open connections
+            images: whether config images are downloaded
+            seed: seed of the random generators of the editors
+
+        Returns:
+            Recorder with the outcome of every measured request
+    """
+
+    recorder = Recorder(time.perf_counter() + warmup)
+    deadline = recorder.start + duration
+    limits = httpx.Limits(max_connections=editors, max_keepalive_connections=editors)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        await asyncio.gather(*(
+            Editor(client, recorder, venue, random.Random(seed + index), images).run(deadline)
+            for index in range(editors)
+        ))
+    return recorder
+
+
+def start_server(database_url, workers, port):
+    """Starts the ASGI app with uvicorn and waits until it serves requests
+
+        Args:
+            database_url: database the server uses
+            workers: amount of uvicorn worker processes
+            port: port the server listens on
+
+        Returns:
+            server process
+    """
+
+    env = {**os.environ, "CONF_TOOL_DB_URL": database_url}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/metrics/jobs", timeout=1)
+            return process
+        except httpx.HTTPError:
+            if process.poll() is not None:
+                raise RuntimeError(f"The server exited with {process.returncode}")
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("The server didn't start within 60 seconds")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def upload_images(url, venue):
+    # Store a synthetic config image for every camera, so image loads download a real blob
+    width, height = RESOLUTION
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    image[:, :, 1] = np.linspace(40, 160, width, dtype=np.uint8)
+    data = cv2.imencode(".jpg", image)[1].tobytes()
+
+    for index, camera_id in enumerate(venue.camera_ids):
+        response = httpx.post(f"{url}/api/camera/{camera_id}/cam_cfg_path", timeout=REQUEST_TIMEOUT,
+                              data={"setup": f"load {venue.setup_id}", "camera": f"camera {index}"},
+                              files={"image": ("config.jpg", data, "image/jpeg")})
+        response.raise_for_status()
+
+
+def parse_counts(value):
+    return [int(count) for count in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a server with virtual editors and report the capacity")
+    parser.add_argument("--workers", type=parse_counts, default=[1, 2, 4], help="uvicorn worker counts, e.g. 1,2,4")
+    parser.add_argument("--editors", type=parse_counts, default=[1, 4, 16, 32], help="concurrent editors per level")
+    parser.add_argument("--duration", type=float, default=20, help="seconds measured per level")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds per level before measuring")
+    parser.add_argument("--database", help="database url, a temporary SQLite file by default")
+    parser.add_argument("--url", help="url of a running server to load instead of starting one per worker count")
+    parser.add_argument("--cameras", type=int, default=CAMERAS)
+    parser.add_argument("--images", action="store_true", help="download config images, needs blob storage")
+    parser.add_argument("--by-route", action="store_true", help="also report every route on its own")
+    parser.add_argument("--csv", help="file the curves are written to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.url and not args.database:
+        parser.error("--url needs --database, the venue is stored in the database of the server")
+    database_url = args.database or f"sqlite:///{tempfile.mkdtemp(prefix='conf_tool_load_')}/load.db"
+
+    engine = create_db_engine(database_url)
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session_db:
+        venue = generate_venue(session_db, cameras=args.cameras, projections=2, pitch_points=PITCH_POINTS,
+                               seed=args.seed)
+    engine.dispose()
+
+    print(f"{args.cameras} camera venue, {args.duration:g} s per level, actions {ACTIONS}")
+    print(f"{'workers':>7} {'editors':>7} {'route':<17} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7}")
+
+    rows = []
+    uploaded = False
+    for workers in ([None] if args.url else args.workers):
+        process = start_server(database_url, workers, SERVER_PORT) if workers is not None else None
+        url = args.url or f"http://127.0.0.1:{SERVER_PORT}"
+        try:
+            if args.images and not uploaded:
+                upload_images(url, venue)
+                uploaded = True
+
+            for editors in args.editors:
+                recorder = asyncio.run(run_level(url, venue, editors, args.duration, args.warmup, args.images,
+                                                 args.seed))
+                routes = [("all", None)]
+                if args.by_route:
+                    routes += [(route, {route}) for route in sorted(set(recorder.latencies) | set(recorder.errors))]
+
+                for route, route_set in routes:
+                    summary = recorder.summary(args.duration, route_set)
+                    rows.append({"workers": workers or "external", "editors": editors, "route": route, **summary})
+                    print(f"{workers or '-':>7} {editors:>7} {route:<17} {summary['requests']:8} "
+                          f"{summary['throughput']:8.1f} {summary['p50_ms'] or 0:8.2f} {summary['p95_ms'] or 0:8.2f} "
+                          f"{summary['p99_ms'] or 0:8.2f} {100 * summary['error_rate']:6.2f}%")
+        finally:
+            if process is not None:
+                stop_server(process)
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# Generator of synthetic venues used by the benchmarks
+# A venue is one setup with many cameras, every camera with several projections, a pitch polygon with many
+# vertices and several crops, so the benchmarks measure the routes on setups as large as the biggest stadiums
+
+import math
+import random
+import time
+import uuid
+from sqlalchemy import insert
+from data_classes import (Setup, Camera, Crop, InnerPoints, OuterPoints, Projection, Undistortion, SourcePoints,
+                          DestinationPoints)
+from database.point_sets import write_point_set
+
+# Default size of a venue
+CAMERAS = 20
+PROJECTIONS = 4
+PITCH_POINTS = 400
+CROPS = 6
+
+# Resolution of every generated camera
+RESOLUTION = (3840, 2160)
+
+
+class Venue:
+    """Ids of a generated venue
+
+        Args:
+            setup_id: id of the setup
+            camera_ids: ids of the cameras
+            projection_ids: ids of the projections, per camera
+    """
+
+    def __init__(self, setup_id, camera_ids, projection_ids):
+        self.setup_id = setup_id
+        self.camera_ids = camera_ids
+        self.projection_ids = projection_ids
+
+
+def pitch_polygon(amount, rng, scale=0.4):
+    """Returns the points of a pitch polygon as seen by a camera
+
+        The points lie on a slightly distorted ellipse, like a pitch outline clicked along the lines
+        of a wide angle image.
+
+        Args:
+            amount: amount of vertices
+            rng: random generator
+            scale: radius of the polygon relative to the image
+
+        Returns:
+            list of normalized {"x", "y"} points, ordered along the outline
+    """
+
+    points = []
+    for i in range(amount):
+        angle = 2 * math.pi * i / amount
+        radius = scale * (1 + 0.05 * math.sin(3 * angle) + rng.uniform(-0.005, 0.005))
+        points.append({"x": 0.5 + radius * math.cos(angle), "y": 0.5 + 0.6 * radius * math.sin(angle)})
+    return points
+
+
+def crop_row(amount, rng):
+    # Return amount crops next to each other across the width of the image, overlapping a little
+    width = 1 / amount
+    crops = []
+    for i in range(amount):
+        top = rng.uniform(0.2, 0.4)
+        crops.append({
+            "top_left_x": max(0.0, i * width - 0.02),
+            "top_left_y": top,
+            "bottom_right_x": min(1.0, (i + 1) * width + 0.02),
+            "bottom_right_y": min(1.0, top + rng.uniform(0.3, 0.5))
+        })
+    return crops
+
+
+def homography_points(rng):
+    # Return four image points and the four pitch points they map to, as stored per projection
+    source = [{"x": rng.uniform(0.1, 0.9), "y": rng.uniform(0.1, 0.9)} for _ in range(4)]
+    destination = [{"x": x, "y": y} for x, y in ((0, 0), (105, 0), (105, 68), (0, 68))]
+    return source, destination
+
+
+def generate_venue(session_db, cameras=CAMERAS, projections=PROJECTIONS, pitch_points=PITCH_POINTS, crops=CROPS,
+                   seed=0):
+    """Stores a synthetic venue and returns its ids
+
+        Rows are written with one statement per table instead of one per object, so even the largest venues
+        are generated in seconds. The packed point sets are written as well, like the editing routes do.
+
+        Args:
+            session_db: database session, committed at the end
+            cameras: amount of cameras
+            projections: amount of projections per camera
+            pitch_points: amount of vertices of the inner and of the outer pitch polygon of every camera
+            crops: amount of crops per camera
+            seed: seed of the random generator, the same seed generates the same points
+
+        Returns:
+            Venue with the ids of the stored rows
+    """
+
+    rng = random.Random(seed)
+    setup = Setup(setup_name=f"Benchmark Venue {time.time_ns()}")
+    session_db.add(setup)
+    session_db.flush()
+    setup_id = setup.setup_id
+
+    rows = {model: [] for model in (Camera, Projection, Undistortion, Crop, InnerPoints, OuterPoints, SourcePoints,
+                                    DestinationPoints)}
+    point_sets = []
+    camera_ids = []
+    projection_ids = {}
+
+    for c in range(cameras):
+        camera_id = uuid.uuid4()
+        camera_ids.append(camera_id)
+        rows[Camera].append({
+            "camera_id": camera_id, "setup_id": setup_id, "camera_name": f"Camera {c + 1}",
+            "resolution_width": RESOLUTION[0], "resolution_height": RESOLUTION[1],
+            "position": rng.choice(("Left corner", "Right corner", "Main stand", "Behind goal"))
+        })
+        rows[Crop].extend({"camera_id": camera_id, "index": i, **crop}
+                          for i, crop in enumerate(crop_row(crops, rng), 1))
+
+        for model, kind, scale in ((InnerPoints, "inner", 0.35), (OuterPoints, "outer", 0.45)):
+            polygon = pitch_polygon(pitch_points, rng, scale)
+            rows[model].extend({"camera_id": camera_id, "index": i, **point} for i, point in enumerate(polygon, 1))
+            point_sets.append((kind, camera_id, [(point["x"], point["y"]) for point in polygon]))
+
+        projection_ids[camera_id] = []
+        for p in range(projections):
+            projection_id = uuid.uuid4()
+            projection_ids[camera_id].append(projection_id)
+            rows[Projection].append({"projection_id": projection_id, "camera_id": camera_id,
+                                     "projection_name": f"Projection {p + 1}"})
+            rows[Undistortion].append({"projection_id": projection_id, "k1": rng.uniform(-0.3, 0), "zoom": 0.5,
+                                       "k2": rng.uniform(0, 0.1)})
+
+            for model, kind, points in zip((SourcePoints, DestinationPoints), ("source", "destination"),
+                                           homography_points(rng)):
+                rows[model].extend({"projection_id": projection_id, "index": i, **point}
+                                   for i, point in enumerate(points, 1))
+                point_sets.append((kind, projection_id, [(point["x"], point["y"]) for point in points]))
+
+    # Parents first, so the foreign keys hold on every database
+    connection = session_db.connection()
+    for model, model_rows in rows.items():
+        if model_rows:
+            connection.execute(insert(model), model_rows)
+    for kind, owner_id, points in point_sets:
+        write_point_set(connection, kind, owner_id, points)
+
+    session_db.commit()
+    return Venue(setup_id, camera_ids, projection_ids)
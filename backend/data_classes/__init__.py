@@ -2,19 +2,26 @@
 
 from .base import Base
 from .camera import Camera
+from .change import Change, ChangeCounter
+from .config_snapshot import ConfigSnapshot
 from .crop import Crop
 from .destination_points import DestinationPoints
 from .detector import Detector
 from .field import Field
 from .inner_points import InnerPoints
+from .job import Job
 from .outer_points import OuterPoints
+from .point_set import PointSet
+from .projection import Projection
 from .setup import Setup
 from .source_points import SourcePoints
 from .team_detector import TeamDetector
 from .undistortion import Undistortion
+from .upload import Upload
 from .user import User
 
 __all__ = [
-    "Base", "Camera", "Crop", "DestinationPoints", "Detector", "Field", "InnerPoints",
-    "OuterPoints", "Setup", "SourcePoints", "TeamDetector", "Undistortion", "User"
+    "Base", "Camera", "Change", "ChangeCounter", "ConfigSnapshot", "Crop", "DestinationPoints", "Detector", "Field",
+    "InnerPoints", "Job", "OuterPoints", "PointSet", "Projection", "Setup", "SourcePoints", "TeamDetector",
+    "Undistortion", "Upload", "User"
 ]
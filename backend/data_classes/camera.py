@@ -88,14 +88,17 @@ class Camera(Base):
 
     # Relationships
     setup: Mapped["Setup"] = relationship(back_populates="cameras")
-    projections: Mapped[list["Projection"]] = relationship(back_populates="camera", cascade="delete")
+    # Ordered like the projection dropdown, so the first projection the pipeline uses is always the same one
+    projections: Mapped[list["Projection"]] = relationship(back_populates="camera", cascade="delete", passive_deletes=True,
+                                                           order_by="[Projection.projection_name, Projection.projection_id]")
 
     # undistortion: Mapped["Undistortion"] = relationship(back_populates="camera", cascade="delete", uselist=False)
     # source_points: Mapped[list["SourcePoints"]] = relationship(back_populates="camera", cascade="delete")
     # destination_points: Mapped[list["DestinationPoints"]] = relationship(back_populates="camera", cascade="delete")
-    crops: Mapped[list["Crop"]] = relationship(back_populates="camera", cascade="delete")
-    inner_points: Mapped[list["InnerPoints"]] = relationship(back_populates="camera", cascade="delete")
-    outer_points: Mapped[list["OuterPoints"]] = relationship(back_populates="camera", cascade="delete")
+    crops: Mapped[list["Crop"]] = relationship(back_populates="camera", cascade="delete", passive_deletes=True,
+                                               order_by="Crop.index")
+    inner_points: Mapped[list["InnerPoints"]] = relationship(back_populates="camera", cascade="delete", passive_deletes=True)
+    outer_points: Mapped[list["OuterPoints"]] = relationship(back_populates="camera", cascade="delete", passive_deletes=True)
 
     def __init__(self, camera_name=None, setup_id=None, resolution_width=0, resolution_height=0,
                 position="", cropping_type="", time_correction=0, path="", config_img_path=""):
@@ -0,0 +1,87 @@
+from sqlalchemy import DDL, BigInteger, Integer, event
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from flask_restx import Namespace, fields
+from datetime import datetime
+import uuid
+from .base import Base
+
+change_ns = Namespace("change", description="Feed of the changes of setups and cameras")
+
+# Operations a change records
+CHANGE_INSERT = "insert"
+CHANGE_UPDATE = "update"
+CHANGE_DELETE = "delete"
+
+# Change parser for reading the feed
+change_get_parser = (
+    change_ns.parser()
+    .add_argument("since", type=int, required=False, default=0, location="args",
+                  help="Sequence number of the last change the client has, changes after it are returned")
+    .add_argument("limit", type=int, required=False, default=1000, location="args",
+                  help="Most changes returned at once")
+)
+
+# Change model for one change
+change_model = change_ns.model(
+    "Change",
+    {
+        "seq": fields.Integer(required=True, description="Sequence number of the change, increasing in commit order"),
+        "setup_id": fields.String(required=True, description="Id of the changed setup"),
+        "camera_id": fields.String(description="Id of the changed camera, empty for changes of the setup itself"),
+        "entity": fields.String(required=True, description="Table that changed, e.g. cameras or inner_points"),
+        "op": fields.String(required=True, description="One of insert, update or delete")
+    }
+)
+
+# Change model for a page of the feed
+change_list_model = change_ns.model(
+    "ChangeList",
+    {
+        "changes": fields.List(fields.Nested(change_model)),
+        "last_seq": fields.Integer(description="Sequence number to pass as since for the next page"),
+        "has_more": fields.Boolean(description="Whether more changes are waiting after this page")
+    }
+)
+
+
+# Change class table definition, rows are only appended and trimmed when they're old
+class Change(Base):
+    __tablename__ = "changes"
+
+    # Table columns, SQLite only increments an integer primary key without reusing numbers with AUTOINCREMENT
+    change_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True,
+                                           autoincrement=True)
+    # Sequence number in the feed, given when the transaction of the change commits (see database/change_feed.py)
+    seq: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), nullable=True, unique=True)
+    setup_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), index=True)
+    camera_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+    entity: Mapped[str] = mapped_column()
+    op: Mapped[str] = mapped_column()
+    changed_at: Mapped[datetime] = mapped_column(default=datetime.now, index=True)
+
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+    def get_change(self):
+        # Return the change as sent to clients
+        return {
+            "seq": self.seq,
+            "setup_id": str(self.setup_id),
+            "camera_id": str(self.camera_id) if self.camera_id is not None else None,
+            "entity": self.entity,
+            "op": self.op
+        }
+
+
+# Change counter class table definition, its only row holds the last sequence number given to a change
+class ChangeCounter(Base):
+    __tablename__ = "change_counter"
+
+    # Table columns
+    counter_id: Mapped[int] = mapped_column(primary_key=True)
+    last_seq: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), default=0)
+
+
+# The counter row is there as soon as its table is
+event.listen(ChangeCounter.__table__, "after_create",
+             DDL("INSERT INTO change_counter (counter_id, last_seq) VALUES (1, 0)"))
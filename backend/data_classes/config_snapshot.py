@@ -0,0 +1,25 @@
+from sqlalchemy import ForeignKey, Text
+from sqlalchemy.orm import Mapped, mapped_column
+import uuid
+from .base import Base
+
+
+# ConfigSnapshot class table definition, the materialized all config of a setup
+class ConfigSnapshot(Base):
+    __tablename__ = "config_snapshots"
+
+    # Table columns
+    setup_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("setups.setup_id", ondelete="CASCADE"), primary_key=True)
+    config_version: Mapped[int] = mapped_column()
+    config: Mapped[str] = mapped_column(Text)
+
+    def __init__(self, setup_id: uuid.UUID, config_version: int, config: str):
+        # Initialize fields
+        self.setup_id = setup_id
+        self.config_version = config_version
+        self.config = config
+
+    def update_snapshot(self, config_version, config):
+        # Replace the snapshot with the config of a newer version
+        self.config_version = config_version
+        self.config = config
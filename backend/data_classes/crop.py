@@ -2,7 +2,7 @@ from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
-from flask_restx import Namespace, fields
+from flask_restx import Namespace, fields, inputs
 from typing import TYPE_CHECKING
 from .base import Base
 
@@ -22,6 +22,36 @@ crop_model = crop_ns.model(
     }
 )
 
+# Auto crop parser for the side of the pitch filmed by the camera
+auto_crop_parser = (
+    crop_ns.parser()
+    .add_argument("side", type=str, required=False, choices=("left", "right"),
+                  help="Side of the pitch filmed by the camera, defaults to the camera position")
+    .add_argument("background", type=inputs.boolean, required=False, default=False, location="args",
+                  help="Calculate the crops in a background job and return its id")
+)
+
+# Crop plan parser for the constraints of the crop planner
+crop_plan_parser = (
+    crop_ns.parser()
+    .add_argument("max_scale", type=float, required=False, default=2.0,
+                  help="Maximum amount of crop pixels per detector pixel")
+    .add_argument("max_crops", type=int, required=False, default=6, help="Maximum amount of crops, at most 10")
+    .add_argument("crop_count", type=int, required=False, help="Exact amount of crops, at most 10")
+    .add_argument("background", type=inputs.boolean, required=False, default=False, location="args",
+                  help="Plan the crops in a background job and return its id")
+)
+
+# Model for the planned crops and their detector cost
+crop_plan_model = crop_ns.model(
+    "CropPlan",
+    {
+        "crops": fields.List(fields.Nested(crop_model), description="Planned crops"),
+        "detector_pixels": fields.Integer(description="Detector input pixels of all crops per frame"),
+        "letterbox_waste": fields.Float(description="Padded detector input pixels of all crops per frame")
+    }
+)
+
 
 # Crop class table definition
 class Crop(Base):
@@ -30,6 +60,7 @@ class Crop(Base):
     # Table columns
     crop_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     camera_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("cameras.camera_id", ondelete="CASCADE"))
+    index: Mapped[int] = mapped_column(nullable=False, index=True)
     top_left_x: Mapped[float] = mapped_column()
     top_left_y: Mapped[float] = mapped_column()
     bottom_right_x: Mapped[float] = mapped_column()
@@ -38,9 +69,10 @@ class Crop(Base):
     # Relationships
     camera: Mapped["Camera"] = relationship(back_populates="crops")
 
-    def __init__(self, camera_id: uuid.UUID, top_left_x: float, top_left_y: float, bottom_right_x: float, bottom_right_y: float):
+    def __init__(self, camera_id: uuid.UUID, index: int, top_left_x: float, top_left_y: float, bottom_right_x: float, bottom_right_y: float):
         # Initialize fields
         self.camera_id = camera_id
+        self.index = index
         self.top_left_x = top_left_x
         self.top_left_y = top_left_y
         self.bottom_right_x = bottom_right_x
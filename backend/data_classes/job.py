@@ -0,0 +1,74 @@
+from sqlalchemy import Text, false
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from flask_restx import Namespace, fields
+from datetime import datetime
+import uuid
+import json
+from .base import Base
+
+job_ns = Namespace("job", description="Operations related to background jobs")
+
+# Statuses a job goes through
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Statuses of jobs that won't change anymore
+JOB_FINISHED = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# Job model for the status of a job
+job_model = job_ns.model(
+    "Job",
+    {
+        "job_id": fields.String(required=True, description="Id of the job as a string"),
+        "kind": fields.String(required=True, description="What the job does"),
+        "status": fields.String(required=True, description="One of queued, running, done, failed or cancelled"),
+        "created_at": fields.String(description="Time the job was submitted"),
+        "finished_at": fields.String(description="Time the job finished"),
+        "error": fields.String(description="Error of a failed job"),
+        "cancel_requested": fields.Boolean(description="Whether the job was asked to stop")
+    }
+)
+
+
+# Job class table definition
+class Job(Base):
+    __tablename__ = "jobs"
+
+    # Table columns
+    job_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind: Mapped[str] = mapped_column()
+    status: Mapped[str] = mapped_column(default=JOB_QUEUED, index=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+    result: Mapped[str] = mapped_column(Text, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(default=False, server_default=false())
+    # host:pid of the server process running the job, a restart fails the jobs of processes that are gone
+    worker: Mapped[str] = mapped_column(nullable=True)
+
+    def __init__(self, kind: str):
+        # Initialize fields
+        self.kind = kind
+        self.status = JOB_QUEUED
+        self.cancel_requested = False
+
+    def get_job_status(self):
+        # Return the status of the job
+        return {
+            "job_id": str(self.job_id),
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested
+        }
+
+    def get_result(self):
+        # Return the result of a finished job
+        return json.loads(self.result) if self.result is not None else None
@@ -0,0 +1,38 @@
+from sqlalchemy import ForeignKey, Index, LargeBinary
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from .base import Base
+
+# Kinds of point sets, inner and outer points belong to a camera, source and destination points to a projection
+CAMERA_POINT_SETS = ("inner", "outer")
+PROJECTION_POINT_SETS = ("source", "destination")
+
+
+# PointSet class table definition, all points of one set packed in one row
+class PointSet(Base):
+    __tablename__ = "point_sets"
+
+    # Table columns
+    point_set_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    camera_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("cameras.camera_id", ondelete="CASCADE"), nullable=True)
+    projection_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("projections.projection_id", ondelete="CASCADE"),
+                                                     nullable=True)
+    kind: Mapped[str] = mapped_column()
+    count: Mapped[int] = mapped_column(default=0)
+    # x, y pairs ordered by index as little-endian float64, readable by NumPy without copying
+    coords: Mapped[bytes] = mapped_column(LargeBinary)
+
+    # One set of every kind per camera or projection, NULL owners don't collide
+    __table_args__ = (
+        Index("ix_point_sets_camera_kind", "camera_id", "kind", unique=True),
+        Index("ix_point_sets_projection_kind", "projection_id", "kind", unique=True),
+    )
+
+    def __init__(self, kind: str, coords: bytes, count: int, camera_id: uuid.UUID = None, projection_id: uuid.UUID = None):
+        # Initialize fields
+        self.kind = kind
+        self.coords = coords
+        self.count = count
+        self.camera_id = camera_id
+        self.projection_id = projection_id
@@ -45,13 +45,13 @@ class Projection(Base):
     camera: Mapped["Camera"] = relationship(back_populates="projections")
 
     # Link calibration tables (one-to-one or one-to-many)
-    undistortion: Mapped["Undistortion"] = relationship(back_populates="projection", cascade="delete", uselist=False)
-    source_points: Mapped[list["SourcePoints"]] = relationship(back_populates="projection", cascade="delete")
-    destination_points: Mapped[list["DestinationPoints"]] = relationship(back_populates="projection", cascade="delete")
+    undistortion: Mapped["Undistortion"] = relationship(back_populates="projection", cascade="delete", passive_deletes=True, uselist=False)
+    source_points: Mapped[list["SourcePoints"]] = relationship(back_populates="projection", cascade="delete", passive_deletes=True)
+    destination_points: Mapped[list["DestinationPoints"]] = relationship(back_populates="projection", cascade="delete", passive_deletes=True)
 
     def __init__(self, camera_id: uuid.UUID, name: str = "Default Projection"):
         self.camera_id = camera_id
-        self.name = name
+        self.projection_name = name
     
 
     def get_projection_config(self):
@@ -90,6 +90,6 @@ class Projection(Base):
         return {
             "projection_id": str(self.projection_id),
             "camera_id": str(self.camera_id),
-            "name": self.name,
+            "name": self.projection_name,
         }
 
@@ -2,7 +2,7 @@ from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID
 from typing import TYPE_CHECKING
-from flask_restx import Namespace, fields
+from flask_restx import Namespace, fields, inputs
 import uuid
 from datetime import datetime
 from .base import Base
@@ -39,6 +39,19 @@ setup_patch_parser = (
     .add_argument("debug_visualize", type=bool, required=False)
 )
 
+# Setup parser for deleting a setup
+setup_delete_parser = (
+    setup_ns.parser()
+    .add_argument("background", type=inputs.boolean, required=False, default=False, location="args",
+                  help="Delete the setup in a background job and return its id")
+)
+
+# Setup parser for the name of a cloned setup
+setup_clone_parser = (
+    setup_ns.parser()
+    .add_argument("setup_name", type=str, required=False, help="Name of the copy, defaults to the name with (copy)")
+)
+
 # Setup model for setup config
 setup_patch_model = setup_ns.model(
     "UpdateSetup",
@@ -84,9 +97,11 @@ class Setup(Base):
     detector_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("detectors.detector_id", ondelete="SET NULL"), unique=True, nullable=True)
     team_detector_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("team_detectors.team_detector_id", ondelete="SET NULL"), unique=True, nullable=True)
     field_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("fields.field_id", ondelete="SET NULL"), unique=True, nullable=True)
+    # Bumped on every change of the setup or its cameras, see database/config_version.py
+    config_version: Mapped[int] = mapped_column(default=1, server_default="1")
 
     # Relationships
-    cameras: Mapped[list["Camera"]] = relationship(back_populates="setup", cascade="delete")
+    cameras: Mapped[list["Camera"]] = relationship(back_populates="setup", cascade="delete", passive_deletes=True)
     detector: Mapped["Detector"] = relationship(back_populates="setup")
     team_detector: Mapped["TeamDetector"] = relationship(back_populates="setup")
     field: Mapped["Field"] = relationship(back_populates="setup")
@@ -24,11 +24,11 @@ class SourcePoints(Base, Point):
 
     # Relationships
     # camera: Mapped["Camera"] = relationship(back_populates="source_points")
-    projection: Mapped["Projection"] = relationship(back_populates="undistortion")
+    projection: Mapped["Projection"] = relationship(back_populates="source_points")
 
-    def __init__(self, camera_id: uuid.UUID, index: int, x: float = 0, y: float = 0):
+    def __init__(self, projection_id: uuid.UUID, index: int, x: float = 0, y: float = 0):
         # Initialize fields
-        self.camera_id = camera_id
+        self.projection_id = projection_id
         self.index = index
         self.x = x
         self.y = y
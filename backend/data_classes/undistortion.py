@@ -55,10 +55,10 @@ class Undistortion(Base):
     projection: Mapped["Projection"] = relationship(back_populates="undistortion")
 
 
-    def __init__(self, camera_id: uuid.UUID, x: float = 50, y: float = 50, w: float = 50,
+    def __init__(self, projection_id: uuid.UUID, x: float = 50, y: float = 50, w: float = 50,
                 h: float = 50, k1: float = 0, k2: float = 0, p1: float = 0, p2: float = 0, k3: float = 0, zoom: float = 0):
         # Initialize fields
-        self.camera_id = camera_id
+        self.projection_id = projection_id
         self.x = x
         self.y = y
         self.w = w
@@ -0,0 +1,76 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+from flask_restx import Namespace, fields
+from datetime import datetime
+import math
+import uuid
+from .base import Base
+
+upload_ns = Namespace("upload", description="Chunked and resumable uploads of camera media")
+
+# Upload parser for starting an upload
+upload_post_parser = (
+    upload_ns.parser()
+    .add_argument("setup", type=str, required=True, help="Name of the setup of the camera")
+    .add_argument("camera", type=str, required=True, help="Name of the camera")
+    .add_argument("size", type=int, required=True, help="Size of the file in bytes")
+    .add_argument("content_type", type=str, required=False, help="Content type of the file")
+)
+
+# Upload model for the state of an upload
+upload_model = upload_ns.model(
+    "Upload",
+    {
+        "upload_id": fields.String(required=True, description="Id of the upload as a string"),
+        "size": fields.Integer(required=True, description="Size of the file in bytes"),
+        "block_size": fields.Integer(required=True, description="Size of every block but the last one"),
+        "block_count": fields.Integer(required=True, description="Amount of blocks to upload"),
+        "staged_blocks": fields.List(fields.Integer, description="Blocks already stored, those can be skipped")
+    }
+)
+
+
+# Upload class table definition
+class Upload(Base):
+    __tablename__ = "uploads"
+
+    # Table columns
+    upload_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    camera_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("cameras.camera_id", ondelete="CASCADE"), index=True)
+    config_path: Mapped[str] = mapped_column()
+    content_type: Mapped[str] = mapped_column(nullable=True)
+    size: Mapped[int] = mapped_column()
+    block_size: Mapped[int] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default=datetime.now)
+
+    def __init__(self, camera_id, config_path, size, block_size, content_type=None):
+        # Initialize fields
+        self.camera_id = camera_id
+        self.config_path = config_path
+        self.size = size
+        self.block_size = block_size
+        self.content_type = content_type
+
+    @property
+    def block_count(self):
+        # Amount of blocks the file is split in
+        return math.ceil(self.size / self.block_size)
+
+    def block_length(self, index):
+        # Return the size of the block at the index, the last block holds the rest of the file
+        return min(self.block_size, self.size - index * self.block_size)
+
+    def block_id(self, index):
+        # Id of the block at the index, ids have the same length for every upload as blob storage requires
+        return f"{self.upload_id}:{index:06d}"
+
+    def get_upload(self, staged_blocks):
+        # Return the state of the upload with the blocks already stored
+        return {
+            "upload_id": str(self.upload_id),
+            "size": self.size,
+            "block_size": self.block_size,
+            "block_count": self.block_count,
+            "staged_blocks": staged_blocks
+        }
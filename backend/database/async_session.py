@@ -0,0 +1,69 @@
+# This module contains the async database engine used by the ASGI entry point (asgi.py)
+# It connects to the same database as database/session.py, through asyncpg for postgres and aiosqlite for sqlite
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from settings import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+import database.session  # noqa: F401, registers the flush listeners and sqlite pragma on the sync engine classes
+
+# Async driver of every database backend
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url):
+    # Return the url with the async driver of its backend
+    url = make_url(url)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}")
+
+
+def enable_aiosqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and with that ON DELETE CASCADE, when asked to on every connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_async_db_engine(url):
+    # Create the async engine, sqlite keeps its own pool as it doesn't support the pool settings
+    url = async_url(url)
+    if url.get_backend_name() == "sqlite":
+        engine = create_async_engine(url)
+        event.listen(engine.sync_engine, "connect", enable_aiosqlite_foreign_keys)
+        return engine
+
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine():
+    # Return the async engine, created on first use so the async driver is only loaded once it is needed
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        if not DATABASE_URL:
+            raise RuntimeError("CONF_TOOL_DB_URL isn't set, the database can't be reached")
+        _async_engine = create_async_db_engine(DATABASE_URL)
+        _async_session_factory = async_sessionmaker(bind=_async_engine, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal():
+    # Return a new async session on the async engine, the engine is created by the first session
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def dispose_async_engine():
+    # Close the connections of the async engine on shutdown, when it was ever created
+    if _async_engine is not None:
+        await _async_engine.dispose()
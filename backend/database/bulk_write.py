@@ -0,0 +1,128 @@
+# This module writes the point sets and crops of a camera with set based statements
+# Instead of deleting and adding every row through the ORM, the new rows are compared with the stored ones
+# and only the difference is written: one DELETE, one executemany INSERT and one executemany UPDATE
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from data_classes.change import CHANGE_UPDATE
+from database.change_feed import record_changes
+from database.config_version import bump_config_version
+from database.point_sets import POINT_TABLES, write_point_set
+
+# Kind of point set packed for every row per point table
+POINT_SET_KINDS = {model: kind for kind, (model, owner_key) in POINT_TABLES.items()}
+
+
+def _primary_key(table):
+    # Return the single primary key column of a table
+    return next(iter(table.primary_key.columns))
+
+
+def _write_indexed_rows(connection, table, camera_id, rows, fields):
+    """Writes the rows of a camera to a table where they are ordered by their index
+
+        Rows keep index 1..N. Rows at an index that still exists are only updated when their
+        values changed, rows past the new amount of rows are deleted and new indices inserted.
+
+        Args:
+            connection: connection of the transaction of the request
+            table: table with camera_id, index and the given columns
+            camera_id: id of the camera owning the rows
+            rows: list of dictionaries with a value for every field, in order
+            fields: names of the columns compared and written
+
+        Returns:
+            (values, changed_rows) with values the tuple of field values per index
+    """
+
+    primary_key = _primary_key(table)
+
+    stored = {
+        row.index: row
+        for row in connection.execute(
+            select(primary_key.label("row_id"), table.c.index, *(table.c[field] for field in fields))
+            .where(table.c.camera_id == camera_id)
+        )
+    }
+    new = {index: tuple(float(row[field]) for field in fields) for index, row in enumerate(rows, start=1)}
+
+    updates = [
+        {"row_id": stored[index].row_id, **{f"new_{field}": value for field, value in zip(fields, values)}}
+        for index, values in new.items()
+        if index in stored and tuple(getattr(stored[index], field) for field in fields) != values
+    ]
+    inserts = [
+        {"camera_id": camera_id, "index": index, **dict(zip(fields, values))}
+        for index, values in new.items()
+        if index not in stored
+    ]
+    deleted = sum(1 for index in stored if index not in new)
+
+    if deleted:
+        connection.execute(delete(table).where(table.c.camera_id == camera_id, table.c.index > len(new)))
+    if inserts:
+        connection.execute(insert(table), inserts)
+    if updates:
+        connection.execute(
+            update(table).where(primary_key == bindparam("row_id"))
+            .values(**{field: bindparam(f"new_{field}") for field in fields}),
+            updates
+        )
+
+    return new, len(inserts) + len(updates) + deleted
+
+
+def write_indexed_points(session_db, model, camera, points):
+    """Writes the points of a camera to a point table where they are ordered by their index
+
+        Only the difference with the stored points is written, see _write_indexed_rows.
+        When anything changed the packed point set of the camera is rewritten as well.
+
+        Args:
+            session_db: session of the request, the statements run in its transaction
+            model: point class with camera_id, index, x and y columns (InnerPoints, OuterPoints)
+            camera: camera owning the points
+            points: list of dictionaries with x and y
+
+        Returns:
+            amount of inserted, updated and deleted rows
+    """
+
+    connection = session_db.connection()
+    new, changed_rows = _write_indexed_rows(connection, model.__table__, camera.camera_id, points, ("x", "y"))
+    if changed_rows:
+        write_point_set(connection, POINT_SET_KINDS[model], camera.camera_id, list(new.values()))
+
+    return _changed(session_db, model, camera, changed_rows)
+
+
+def write_crops(session_db, model, camera, crops, fields):
+    """Writes the crops of a camera, crops keep the order they are sent in through their index
+
+        Only the difference with the stored crops is written, see _write_indexed_rows.
+
+        Args:
+            session_db: session of the request, the statements run in its transaction
+            model: crop class with camera_id and index columns
+            camera: camera owning the crops
+            crops: list of dictionaries with a value for every field, in order
+            fields: names of the columns describing a crop
+
+        Returns:
+            amount of inserted, updated and deleted rows
+    """
+
+    _, changed_rows = _write_indexed_rows(session_db.connection(), model.__table__, camera.camera_id, crops, fields)
+    return _changed(session_db, model, camera, changed_rows)
+
+
+def _changed(session_db, model, camera, changed_rows):
+    # Bump the config version of the setup of the camera and add the change to the feed,
+    # core statements bypass the flush listener
+    if changed_rows:
+        bump_config_version(session_db.connection(), {camera.setup_id})
+        record_changes(session_db, [(camera.setup_id, camera.camera_id, model.__tablename__, CHANGE_UPDATE)])
+
+    # Loaded point and crop lists of the camera no longer match the rows
+    session_db.expire(camera, ["inner_points", "outer_points", "crops"])
+
+    return changed_rows
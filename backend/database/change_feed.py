@@ -0,0 +1,122 @@
+# This module writes and reads the change feed, an append-only table with one row per changed setup, camera and table
+# Changes are written in the transaction of the change itself, so a change is in the feed exactly when it's committed
+# Their sequence numbers are given right before that commit from one counter row, which the transaction holds locked
+# until it has committed, so the numbers follow the commit order and a reader never sees a number after a gap that
+# a transaction still running fills later
+
+from datetime import datetime
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+from data_classes import Change, ChangeCounter
+
+# Key in the info of a session that recorded changes which don't have a sequence number yet
+UNNUMBERED_CHANGES = "unnumbered_changes"
+
+
+def record_changes(session_db, changes):
+    """Appends changes to the feed with one executemany INSERT, they are numbered when the session commits
+
+        Args:
+            session_db: session of the transaction making the changes
+            changes: iterable of (setup_id, camera_id, entity, op) tuples, camera_id is None for
+                changes of the setup itself
+    """
+
+    now = datetime.now()
+    rows = [
+        {"setup_id": setup_id, "camera_id": camera_id, "entity": entity, "op": op, "changed_at": now}
+        for setup_id, camera_id, entity, op in sorted(changes, key=lambda change: tuple(map(str, change)))
+        if setup_id is not None
+    ]
+    if rows:
+        session_db.connection().execute(insert(Change.__table__), rows)
+        session_db.info[UNNUMBERED_CHANGES] = True
+
+
+def number_changes(connection):
+    """Gives the changes written in a transaction their sequence numbers
+
+        Only the transaction itself sees its changes without a number, committed changes always have one.
+        Updating the counter locks its row until the transaction ends, so another transaction numbering
+        its changes waits for this commit and gets higher numbers.
+
+        Args:
+            connection: connection of the transaction, right before it commits
+    """
+
+    table = Change.__table__
+    first_id, last_id = connection.execute(
+        select(func.min(table.c.change_id), func.max(table.c.change_id)).where(table.c.seq.is_(None))
+    ).one()
+    if first_id is None:
+        return
+
+    # Ids of other transactions may lie in between, the numbers skip them
+    counter = ChangeCounter.__table__
+    last_seq = connection.execute(
+        update(counter).values(last_seq=counter.c.last_seq + (last_id - first_id + 1)).returning(counter.c.last_seq)
+    ).scalar_one()
+    connection.execute(update(table).where(table.c.seq.is_(None)).values(seq=table.c.change_id + (last_seq - last_id)))
+
+
+@event.listens_for(Session, "before_commit")
+def number_recorded_changes(session):
+    # Number the changes of the transaction as late as possible, the last flush of the commit may still add some
+    session.flush()
+    if session.info.pop(UNNUMBERED_CHANGES, False):
+        number_changes(session.connection())
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_recorded_changes(session):
+    # Changes of a rolled back transaction are gone, so the next commit has nothing to number
+    session.info.pop(UNNUMBERED_CHANGES, None)
+
+
+def changes_after(since, limit):
+    # Return the query of the committed changes after a sequence number, in commit order
+    return select(Change).where(Change.seq > since).order_by(Change.seq).limit(limit)
+
+
+def read_changes(session_db, since, limit):
+    """Reads the changes after a sequence number
+
+        Sequence numbers follow the commit order, so a client passing the last number it read never
+        misses a change committed later.
+
+        Args:
+            session_db: session of the request
+            since: sequence number of the last change the client has
+            limit: most changes returned
+
+        Returns:
+            list of changes ordered by sequence number, None when changes after since were trimmed already
+    """
+
+    first_seq = session_db.execute(select(func.min(Change.seq))).scalar()
+    if first_seq is not None and since < first_seq - 1:
+        return None
+
+    return session_db.execute(changes_after(since, limit)).scalars().all()
+
+
+def trim_changes(connection, before):
+    """Deletes the changes written before a time, the newest change is always kept
+
+        Keeping the newest change lets a read tell a client that missed trimmed changes from one that is
+        up to date.
+
+        Args:
+            connection: connection of the transaction
+            before: changes written before this time are deleted
+
+        Returns:
+            amount of deleted changes
+    """
+
+    last_seq = connection.execute(select(func.max(Change.seq))).scalar()
+    if last_seq is None:
+        return 0
+
+    result = connection.execute(delete(Change).where(Change.changed_at < before, Change.seq < last_seq))
+    return result.rowcount
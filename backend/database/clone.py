@@ -0,0 +1,142 @@
+# This module copies a setup with everything below it inside the database
+# Every table is copied with one INSERT ... SELECT, the ids of the copied rows are remapped on the way
+
+import uuid
+from sqlalchemy import case, insert, literal, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import Uuid
+from data_classes import (Setup, Camera, Projection, Undistortion, SourcePoints, DestinationPoints, Crop, InnerPoints,
+                          OuterPoints, PointSet, Detector, TeamDetector, Field)
+from data_classes.change import CHANGE_INSERT
+from database.change_feed import record_changes
+
+# Tables below a camera and below a projection, they get new ids generated by the database
+# Point sets belong to either one, so they are copied with both
+CAMERA_CHILDREN = (Crop, InnerPoints, OuterPoints)
+PROJECTION_CHILDREN = (Undistortion, SourcePoints, DestinationPoints)
+
+
+class new_uuid(FunctionElement):
+    # Random UUID generated by the database for every copied row
+    type = Uuid()
+    inherit_cache = True
+
+
+@compiles(new_uuid)
+def _new_uuid_default(element, compiler, **kw):
+    return "gen_random_uuid()"
+
+
+@compiles(new_uuid, "sqlite")
+def _new_uuid_sqlite(element, compiler, **kw):
+    # UUIDs are stored as 32 hexadecimal characters in SQLite
+    return "lower(hex(randomblob(16)))"
+
+
+def _copy_rows(connection, model, where, overrides):
+    """Copies the rows of a table with one INSERT ... SELECT
+
+        Args:
+            connection: connection of the transaction
+            model: class of the table
+            where: condition selecting the rows to copy
+            overrides: dictionary of column name to the expression used instead of the copied value
+    """
+
+    table = model.__table__
+    columns = list(table.columns)
+    connection.execute(
+        insert(table).from_select(
+            [column.name for column in columns],
+            select(*(overrides.get(column.name, column) for column in columns)).where(where)
+        )
+    )
+
+
+def _remap(column, id_map):
+    # Expression replacing every old id in the column by its new id
+    return case({old_id: literal(new_id, Uuid()) for old_id, new_id in id_map.items()}, value=column)
+
+
+def clone_setup(session_db, setup_id, setup_name):
+    """Copies a setup with its configurables, cameras, projections, calibration, crops and pitch points
+
+        Cameras and projections get ids generated here so their children can be remapped with a CASE,
+        all other rows get ids generated by the database. The amount of statements doesn't depend on
+        the amount of rows.
+
+        Args:
+            session_db: session of the request, the statements run in its transaction
+            setup_id: id of the setup to copy
+            setup_name: name of the copy
+
+        Returns:
+            id of the new setup
+    """
+
+    connection = session_db.connection()
+    new_setup_id = uuid.uuid4()
+
+    setup = connection.execute(
+        select(Setup.detector_id, Setup.team_detector_id, Setup.field_id).where(Setup.setup_id == setup_id)
+    ).one()
+
+    # Configurables belong to one setup only, so the copy gets copies of them
+    overrides = {"setup_id": literal(new_setup_id, Uuid()), "setup_name": literal(setup_name), "config_version": literal(1)}
+    for model, configurable_id in ((Detector, setup.detector_id), (TeamDetector, setup.team_detector_id),
+                                   (Field, setup.field_id)):
+        id_column = model.__table__.c[model.id_field]
+        if configurable_id is None:
+            continue
+
+        new_id = uuid.uuid4()
+        _copy_rows(connection, model, id_column == configurable_id, {model.id_field: literal(new_id, Uuid())})
+        overrides[model.id_field] = literal(new_id, Uuid())
+
+    _copy_rows(connection, Setup, Setup.setup_id == setup_id, overrides)
+    record_changes(session_db, [(new_setup_id, None, Setup.__tablename__, CHANGE_INSERT)])
+
+    camera_map = {
+        camera_id: uuid.uuid4()
+        for camera_id in connection.execute(select(Camera.camera_id).where(Camera.setup_id == setup_id)).scalars()
+    }
+    if not camera_map:
+        return new_setup_id
+
+    _copy_rows(connection, Camera, Camera.setup_id == setup_id, {
+        "camera_id": _remap(Camera.camera_id, camera_map),
+        "setup_id": literal(new_setup_id, Uuid())
+    })
+    record_changes(session_db, [(new_setup_id, camera_id, Camera.__tablename__, CHANGE_INSERT)
+                                for camera_id in camera_map.values()])
+
+    for model in CAMERA_CHILDREN + (PointSet,):
+        table = model.__table__
+        _copy_rows(connection, model, table.c.camera_id.in_(camera_map), {
+            next(iter(table.primary_key.columns)).name: new_uuid(),
+            "camera_id": _remap(table.c.camera_id, camera_map)
+        })
+
+    projection_map = {
+        projection_id: uuid.uuid4()
+        for projection_id in connection.execute(
+            select(Projection.projection_id).where(Projection.camera_id.in_(camera_map))
+        ).scalars()
+    }
+    if not projection_map:
+        return new_setup_id
+
+    _copy_rows(connection, Projection, Projection.camera_id.in_(camera_map), {
+        "projection_id": _remap(Projection.projection_id, projection_map),
+        "camera_id": _remap(Projection.camera_id, camera_map)
+    })
+
+    for model in PROJECTION_CHILDREN + (PointSet,):
+        table = model.__table__
+        _copy_rows(connection, model, table.c.projection_id.in_(projection_map), {
+            next(iter(table.primary_key.columns)).name: new_uuid(),
+            "projection_id": _remap(table.c.projection_id, projection_map)
+        })
+
+    return new_setup_id
@@ -0,0 +1,137 @@
+# This module keeps the config version of every setup up to date
+# Every flush that touches a setup, its cameras, projections, crops or points bumps the version of that setup,
+# which makes its materialized all config snapshot stale, and appends what changed to the change feed
+
+import uuid
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from data_classes import (Setup, Camera, Crop, InnerPoints, OuterPoints, Projection, Undistortion, SourcePoints,
+                          DestinationPoints, Detector, TeamDetector, Field)
+from data_classes.change import CHANGE_INSERT, CHANGE_UPDATE, CHANGE_DELETE
+from database.change_feed import record_changes
+
+# Tables that belong to a camera or to a projection through their camera_id or projection_id
+CAMERA_CHILDREN = (Crop, InnerPoints, OuterPoints, Projection)
+PROJECTION_CHILDREN = (Undistortion, SourcePoints, DestinationPoints)
+
+# Configurables that are shared with a setup through a foreign key on the setup
+CONFIGURABLE_KEYS = {Detector: Setup.detector_id, TeamDetector: Setup.team_detector_id, Field: Setup.field_id}
+
+
+def _operation(session, obj):
+    # Return what the flush does with an object
+    if obj in session.new:
+        return CHANGE_INSERT
+    if obj in session.deleted:
+        return CHANGE_DELETE
+    return CHANGE_UPDATE
+
+
+def _row_id(obj, key):
+    # Return the id of a row, new rows get the id their column default would give them at the flush right away
+    if getattr(obj, key) is None:
+        setattr(obj, key, uuid.uuid4())
+    return getattr(obj, key)
+
+
+def pending_changes(session):
+    """Finds the changes of setups and cameras the pending changes of a session make
+
+        Args:
+            session: session right before it is flushed
+
+        Returns:
+            set of (setup_id, camera_id, entity, op) tuples, camera_id is None for changes of the setup
+            itself and entity is the name of the changed table
+    """
+
+    changes = set()
+    camera_changes = []
+    projection_changes = []
+    configurable_changes = []
+
+    # Cameras and projections added in this flush aren't in the database yet
+    camera_setups = {}
+    projection_cameras = {}
+
+    for obj in session.new | session.dirty | session.deleted:
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+
+        change = (obj.__tablename__, _operation(session, obj))
+        if isinstance(obj, Setup):
+            changes.add((_row_id(obj, "setup_id"), None, *change))
+        elif isinstance(obj, Camera):
+            changes.add((obj.setup_id, _row_id(obj, "camera_id"), *change))
+            camera_setups[obj.camera_id] = obj.setup_id
+        elif isinstance(obj, CAMERA_CHILDREN):
+            camera_changes.append((obj.camera_id, *change))
+            if isinstance(obj, Projection):
+                projection_cameras[_row_id(obj, "projection_id")] = obj.camera_id
+        elif isinstance(obj, PROJECTION_CHILDREN):
+            projection_changes.append((obj.projection_id, *change))
+        elif isinstance(obj, tuple(CONFIGURABLE_KEYS)):
+            configurable_changes.append((CONFIGURABLE_KEYS[type(obj)], getattr(obj, obj.id_field), *change))
+
+    # Resolve the parents on the connection, the rows of deleted objects still exist before the flush
+    connection = session.connection()
+    projection_ids = {projection_id for projection_id, _, _ in projection_changes} - set(projection_cameras)
+    if projection_ids:
+        projection_cameras.update(connection.execute(
+            select(Projection.projection_id, Projection.camera_id).where(Projection.projection_id.in_(projection_ids))
+        ).tuples().all())
+    camera_changes.extend((projection_cameras.get(projection_id), entity, op)
+                          for projection_id, entity, op in projection_changes)
+
+    camera_ids = {camera_id for camera_id, _, _ in camera_changes} - set(camera_setups) - {None}
+    if camera_ids:
+        camera_setups.update(connection.execute(
+            select(Camera.camera_id, Camera.setup_id).where(Camera.camera_id.in_(camera_ids))
+        ).tuples().all())
+    changes.update((camera_setups.get(camera_id), camera_id, entity, op) for camera_id, entity, op in camera_changes)
+
+    for column, configurable_id, entity, op in configurable_changes:
+        changes.update((setup_id, None, entity, op) for setup_id in connection.execute(
+            select(Setup.setup_id).where(column == configurable_id)
+        ).scalars())
+
+    return {change for change in changes if change[0] is not None}
+
+
+def changed_setup_ids(changes):
+    """Returns the setups whose all config changes with a set of changes
+
+        New setups start at the default version and deleted ones take their snapshot with them,
+        so only their cameras and everything below count.
+
+        Args:
+            changes: set of changes returned by pending_changes
+
+        Returns:
+            set of setup ids
+    """
+
+    return {
+        setup_id for setup_id, camera_id, entity, op in changes
+        if entity != Setup.__tablename__ or op == CHANGE_UPDATE
+    }
+
+
+def bump_config_version(connection, setup_ids):
+    # Increase the config version of the given setups in one statement
+    if setup_ids:
+        connection.execute(
+            update(Setup.__table__)
+            .where(Setup.__table__.c.setup_id.in_(setup_ids))
+            .values(config_version=Setup.__table__.c.config_version + 1)
+        )
+
+
+@event.listens_for(Session, "before_flush")
+def bump_changed_setups(session, flush_context, instances):
+    # Bump the config version of every setup touched by this flush and add the changes to the feed
+    with session.no_autoflush:
+        changes = pending_changes(session)
+        connection = session.connection()
+        bump_config_version(connection, changed_setup_ids(changes))
+        record_changes(session, changes)
@@ -0,0 +1,21 @@
+# This script creates the point_sets table and packs the points of the row per point tables into it
+# Run it once from the backend folder when upgrading an existing database: python -m database.migrate_point_sets
+
+from database.session import get_engine
+from data_classes import PointSet
+from database.point_sets import migrate_point_sets
+
+
+def main():
+    engine = get_engine()
+    PointSet.__table__.create(engine, checkfirst=True)
+
+    with engine.begin() as connection:
+        migrated = migrate_point_sets(connection)
+
+    for kind, amount in migrated.items():
+        print(f"Packed {amount} {kind} point sets")
+
+
+if __name__ == "__main__":
+    main()
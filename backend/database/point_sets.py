@@ -0,0 +1,138 @@
+# This module stores point sets packed in one row per set and reads them back as NumPy arrays
+# The row per point tables stay the source for the editing endpoints, every write to them also writes the packed set
+# so the geometry code reads a camera or projection with one row instead of one ORM object per point
+
+from itertools import groupby
+from sqlalchemy import delete, insert, select, update
+from data_classes import PointSet, InnerPoints, OuterPoints, SourcePoints, DestinationPoints
+from data_classes.point_set import CAMERA_POINT_SETS
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Row per point table and owner column of every kind of point set
+POINT_TABLES = {
+    "inner": (InnerPoints, "camera_id"),
+    "outer": (OuterPoints, "camera_id"),
+    "source": (SourcePoints, "projection_id"),
+    "destination": (DestinationPoints, "projection_id"),
+}
+
+# Coordinates are stored as little endian float64, named as a string so numpy is only loaded once points are used
+POINT_DTYPE = "<f8"
+POINT_SIZE = 8
+
+
+def pack_points(points):
+    # Pack x, y pairs as little-endian float64
+    return np.asarray(points, dtype=POINT_DTYPE).reshape(-1, 2).tobytes()
+
+
+def unpack_points(coords):
+    # Read packed x, y pairs as a read-only (N, 2) array that shares the memory of the bytes
+    return np.frombuffer(coords, dtype=POINT_DTYPE).reshape(-1, 2)
+
+
+def _owner_column(kind):
+    # Return the owner column of a kind of point set
+    return PointSet.camera_id if kind in CAMERA_POINT_SETS else PointSet.projection_id
+
+
+def write_point_set(connection, kind, owner_id, points):
+    """Stores the packed point set of a camera or projection
+
+        Args:
+            connection: connection of the transaction
+            kind: one of inner, outer, source or destination
+            owner_id: id of the camera (inner, outer) or projection (source, destination)
+            points: (N, 2) array or list of [x, y], ordered by index
+    """
+
+    coords = pack_points(points)
+    count = len(coords) // (2 * POINT_SIZE)
+    owner = _owner_column(kind)
+
+    result = connection.execute(
+        update(PointSet).where(owner == owner_id, PointSet.kind == kind).values(coords=coords, count=count)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(PointSet).values(kind=kind, coords=coords, count=count, **{owner.key: owner_id}))
+
+
+def read_point_sets(connection, kind, owner_ids):
+    """Reads the packed point sets of many cameras or projections with one query
+
+        Args:
+            connection: connection of the transaction
+            kind: one of inner, outer, source or destination
+            owner_ids: ids of the cameras or projections
+
+        Returns:
+            dictionary of owner id to (N, 2) float64 array, owners without a packed set are missing
+    """
+
+    owner = _owner_column(kind)
+    rows = connection.execute(
+        select(owner, PointSet.coords).where(owner.in_(list(owner_ids)), PointSet.kind == kind)
+    )
+    return {owner_id: unpack_points(coords) for owner_id, coords in rows}
+
+
+def read_point_array(connection, kind, owner_id):
+    """Reads the points of a camera or projection as an (N, 2) array
+
+        Falls back to the row per point table when the set wasn't packed yet, e.g. before the migration.
+
+        Args:
+            connection: connection of the transaction
+            kind: one of inner, outer, source or destination
+            owner_id: id of the camera or projection
+
+        Returns:
+            (N, 2) float64 array ordered by index
+    """
+
+    point_sets = read_point_sets(connection, kind, [owner_id])
+    if owner_id in point_sets:
+        return point_sets[owner_id]
+
+    model, owner_key = POINT_TABLES[kind]
+    table = model.__table__
+    rows = connection.execute(
+        select(table.c.x, table.c.y).where(table.c[owner_key] == owner_id).order_by(table.c.index)
+    ).all()
+    return np.asarray(rows, dtype=POINT_DTYPE).reshape(-1, 2)
+
+
+def migrate_point_sets(connection):
+    """Packs every point of the row per point tables into point sets, replacing the packed sets
+
+        Args:
+            connection: connection of the transaction
+
+        Returns:
+            dictionary of kind to amount of packed sets
+    """
+
+    migrated = {}
+    for kind, (model, owner_key) in POINT_TABLES.items():
+        table = model.__table__
+        owner = _owner_column(kind)
+        connection.execute(delete(PointSet).where(PointSet.kind == kind, owner.is_not(None)))
+
+        rows = connection.execute(
+            select(table.c[owner_key], table.c.x, table.c.y).order_by(table.c[owner_key], table.c.index)
+        )
+        point_sets = []
+        for owner_id, points in groupby(rows, key=lambda row: row[0]):
+            coords = pack_points([(x, y) for _, x, y in points])
+            point_sets.append({
+                "kind": kind, owner.key: owner_id, "coords": coords,
+                "count": len(coords) // (2 * POINT_SIZE)
+            })
+
+        if point_sets:
+            connection.execute(insert(PointSet), point_sets)
+        migrated[kind] = len(point_sets)
+
+    return migrated
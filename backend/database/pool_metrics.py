@@ -0,0 +1,107 @@
+# This module measures how the database connection pool is used, to size it for many concurrent editors
+
+from threading import Lock
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+import time
+
+
+class PoolMetrics:
+    """Counts connection checkouts, connections in use and the time spent waiting for a free connection
+
+        All counters are shared by the threads of the server, so they are guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        # Reset all counters
+        with self._lock:
+            self.checkouts = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+
+    def record_checkin(self):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.timeouts += int(timed_out)
+
+    def snapshot(self, pool):
+        """Returns the counters together with the state of the pool
+
+            Args:
+                pool: pool of the engine
+
+            Returns:
+                dictionary of the pool metrics, wait times in milliseconds
+        """
+
+        with self._lock:
+            metrics = {
+                "checkouts": self.checkouts,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "timeouts": self.timeouts,
+                "checkout_wait_avg_ms": 1000 * self.wait_total / self.checkouts if self.checkouts else 0.0,
+                "checkout_wait_max_ms": 1000 * self.wait_max
+            }
+
+        if isinstance(pool, QueuePool):
+            metrics.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "idle": pool.checkedin()
+            })
+
+        return metrics
+
+
+pool_metrics = PoolMetrics()
+
+
+def track_pool(engine):
+    """Keeps the pool metrics of an engine up to date
+
+        Checkouts and connections in use are counted with the checkout and checkin events of the pool. The pool
+        has no event before a checkout starts waiting, so the wait is timed around engine.connect, which every
+        session goes through. It includes opening a new connection or pinging an idle one.
+
+        Args:
+            engine: engine whose connections are measured
+    """
+
+    event.listen(engine, "checkout", lambda dbapi_connection, record, proxy: pool_metrics.record_checkout())
+    event.listen(engine, "checkin", lambda dbapi_connection, record: pool_metrics.record_checkin())
+
+    connect = engine.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            connection = connect()
+        except PoolTimeoutError:
+            pool_metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+
+        pool_metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    engine.connect = timed_connect
@@ -1,10 +1,107 @@
-from sqlalchemy import create_engine
+from threading import Lock
+from flask import g, has_app_context
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker
-from settings import DATABASE_URL
+from settings import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from database.pool_metrics import track_pool
+import database.config_version  # noqa: F401, bumps the config version of setups on every flush
+import sqlite3
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine)
+
+@event.listens_for(Engine, "connect")
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and with that ON DELETE CASCADE, when asked to on every connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+def create_db_engine(url):
+    # Create the engine, sqlite (used for local testing) keeps its own pool as it doesn't support the pool settings
+    if make_url(url).get_backend_name() == "sqlite":
+        return create_engine(url)
+
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+
+_engine = None
+_session_factory = None
+_engine_lock = Lock()
+
+
+def get_engine():
+    """Returns the engine of the database, created on first use
+
+        The engine and its driver are only loaded once a request needs the database, so the app,
+        scripts and workers that never touch it start without them.
+
+        Returns:
+            SQLAlchemy engine
+    """
+
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                if not DATABASE_URL:
+                    raise RuntimeError("CONF_TOOL_DB_URL isn't set, the database can't be reached")
+                engine = create_db_engine(DATABASE_URL)
+                track_pool(engine)
+                _session_factory = sessionmaker(bind=engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal():
+    # Return a new session on the engine, the engine is created by the first session
+    get_engine()
+    return _session_factory()
+
+
+def __getattr__(name):
+    # Keep `from database.session import engine` working, it creates the engine when it is imported that way
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def start_session():
-    return SessionLocal()
+    """Returns the database session of the current request
+
+        Inside a Flask app context every call returns the same session, which is closed by close_session
+        when the context ends. Outside of an app context (scripts) a new session is returned.
+
+        Returns:
+            SQLAlchemy session
+    """
+
+    if not has_app_context():
+        return SessionLocal()
+
+    if "session_db" not in g:
+        g.session_db = SessionLocal()
+
+    return g.session_db
+
+
+def close_session(exception=None):
+    # Roll back what a failed request left behind and give the connection back to the pool
+    session_db = g.pop("session_db", None)
+    if session_db is None:
+        return
+
+    if exception is not None:
+        session_db.rollback()
+    session_db.close()
+
+
+def init_app(app):
+    # Tie the database sessions to the app context of every request
+    app.teardown_appcontext(close_session)
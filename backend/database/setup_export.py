@@ -0,0 +1,250 @@
+# This module moves setups with everything below them between databases as NDJSON, one setup per line
+# Export reads a batch of setups from a server side cursor and loads their children with one query per table,
+# import writes every table of a setup with one executemany INSERT
+
+from collections import defaultdict
+from datetime import datetime
+import uuid
+from sqlalchemy import insert, or_, select
+from data_classes import (Setup, Camera, Projection, Undistortion, SourcePoints, DestinationPoints, Crop, InnerPoints,
+                          OuterPoints, PointSet, Detector, TeamDetector, Field)
+from data_classes.change import CHANGE_INSERT
+from database.change_feed import record_changes
+from database.point_sets import POINT_TABLES, pack_points
+
+# Amount of setups fetched from the cursor and exported together
+SETUP_BATCH_SIZE = 100
+
+# Configurables of a setup by their key in a line, they belong to one setup only so an import gives them new ids
+CONFIGURABLES = {"detector": Detector, "team_detector": TeamDetector, "field": Field}
+
+# Tables below a camera and below a projection by their key in a line, their rows get new ids on import
+CAMERA_CHILDREN = {"crops": Crop, "inner_points": InnerPoints, "outer_points": OuterPoints}
+PROJECTION_CHILDREN = {"undistortions": Undistortion, "source_points": SourcePoints,
+                       "destination_points": DestinationPoints}
+
+# Order the tables of a setup are inserted in, parents before children
+INSERT_ORDER = (Detector, TeamDetector, Field, Setup, Camera, Crop, InnerPoints, OuterPoints, Projection, Undistortion,
+                SourcePoints, DestinationPoints, PointSet)
+
+
+def _primary_key(table):
+    # Return the single primary key column of a table
+    return next(iter(table.primary_key.columns))
+
+
+def _dump_value(value):
+    # Return a column value as a JSON value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _dump_row(table, row, skipped=()):
+    # Return the columns of a row as a dictionary, leaving out the skipped columns
+    return {column.name: _dump_value(row._mapping[column]) for column in table.columns if column.name not in skipped}
+
+
+def _load_row(table, data, **values):
+    """Converts an exported row back to column values
+
+        Args:
+            table: table of the row
+            data: dictionary of column name to JSON value
+            values: columns set by the import, e.g. the id of the parent
+
+        Returns:
+            dictionary of column name to value
+
+        Raises:
+            ValueError: when a column doesn't exist or a value has the wrong format
+    """
+
+    row = {}
+    for name, value in data.items():
+        column = table.columns.get(name)
+        if column is None:
+            raise ValueError(f"Unknown column {table.name}.{name}")
+
+        python_type = column.type.python_type
+        if value is not None and python_type is uuid.UUID:
+            value = uuid.UUID(value)
+        elif value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        row[name] = value
+
+    row.update(values)
+    return row
+
+
+def _children(connection, model, owner_column, owner_ids):
+    # Load the rows of a child table of many owners with one query, grouped by owner id
+    table = model.__table__
+    order = table.c.index if "index" in table.c else _primary_key(table)
+    children = defaultdict(list)
+    for row in connection.execute(select(table).where(table.c[owner_column].in_(owner_ids)).order_by(order)):
+        children[row._mapping[table.c[owner_column]]].append(row)
+    return children
+
+
+def _export_batch(connection, setups):
+    # Return the export of a batch of setup rows, the tables below them are loaded with one query per table
+    setup_table = Setup.__table__
+    setup_ids = [setup.setup_id for setup in setups]
+
+    configurables = {}
+    for key, model in CONFIGURABLES.items():
+        table = model.__table__
+        ids = [getattr(setup, model.id_field) for setup in setups if getattr(setup, model.id_field) is not None]
+        configurables[key] = {row._mapping[_primary_key(table)]: row for row in
+                              connection.execute(select(table).where(_primary_key(table).in_(ids)))} if ids else {}
+
+    cameras = _children(connection, Camera, "setup_id", setup_ids)
+    camera_ids = [camera.camera_id for rows in cameras.values() for camera in rows]
+    camera_children = {key: _children(connection, model, "camera_id", camera_ids)
+                       for key, model in CAMERA_CHILDREN.items()}
+
+    projections = _children(connection, Projection, "camera_id", camera_ids)
+    projection_ids = [projection.projection_id for rows in projections.values() for projection in rows]
+    projection_children = {key: _children(connection, model, "projection_id", projection_ids)
+                           for key, model in PROJECTION_CHILDREN.items()}
+
+    for setup in setups:
+        record = {"setup": _dump_row(setup_table, setup, skipped=("config_version",))}
+
+        for key, model in CONFIGURABLES.items():
+            table = model.__table__
+            row = configurables[key].get(getattr(setup, model.id_field))
+            record[key] = _dump_row(table, row, skipped=(model.id_field,)) if row is not None else None
+
+        record["cameras"] = []
+        for camera in cameras[setup.setup_id]:
+            camera_record = {"camera": _dump_row(Camera.__table__, camera, skipped=("setup_id",))}
+            for key, model in CAMERA_CHILDREN.items():
+                table = model.__table__
+                camera_record[key] = [_dump_row(table, row, skipped=(_primary_key(table).name, "camera_id"))
+                                      for row in camera_children[key][camera.camera_id]]
+
+            camera_record["projections"] = []
+            for projection in projections[camera.camera_id]:
+                projection_record = {"projection": _dump_row(Projection.__table__, projection, skipped=("camera_id",))}
+                for key, model in PROJECTION_CHILDREN.items():
+                    table = model.__table__
+                    projection_record[key] = [
+                        _dump_row(table, row, skipped=(_primary_key(table).name, "projection_id"))
+                        for row in projection_children[key][projection.projection_id]
+                    ]
+                camera_record["projections"].append(projection_record)
+
+            record["cameras"].append(camera_record)
+
+        yield record
+
+
+def export_setups(connection, batch_size=SETUP_BATCH_SIZE):
+    """Exports every setup with its configurables, cameras, projections, calibration, crops and points
+
+        Setups are read from a server side cursor in batches, so memory only holds one batch at a time
+        and the amount of statements grows with the amount of batches, not with the amount of rows.
+        Packed point sets and config snapshots aren't exported, an import rebuilds them.
+
+        Args:
+            connection: connection of the transaction
+            batch_size: amount of setups exported together
+
+        Returns:
+            generator of one dictionary per setup, ordered by setup id
+    """
+
+    result = connection.execute(
+        select(Setup.__table__).order_by(Setup.__table__.c.setup_id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for setups in result.partitions():
+        yield from _export_batch(connection, setups)
+
+
+def _point_sets(rows):
+    # Return the packed point set rows of the point rows of a setup
+    point_sets = []
+    for kind, (model, owner_key) in POINT_TABLES.items():
+        points = defaultdict(list)
+        for row in sorted(rows[model], key=lambda row: row["index"]):
+            points[row[owner_key]].append((row["x"], row["y"]))
+
+        for owner_id, owner_points in points.items():
+            point_sets.append({"kind": kind, owner_key: owner_id, "coords": pack_points(owner_points),
+                               "count": len(owner_points)})
+    return point_sets
+
+
+def import_setup(session_db, record):
+    """Imports one exported setup, every table is written with one executemany INSERT
+
+        Setups, cameras and projections keep their ids, every other row gets a new id. A setup whose
+        id or name already exists is skipped.
+
+        Args:
+            session_db: session of the request, the statements run in its transaction
+            record: dictionary of one exported setup
+
+        Returns:
+            id of the imported setup, None when the setup already exists
+
+        Raises:
+            KeyError, TypeError, ValueError: when the record isn't an exported setup
+    """
+
+    connection = session_db.connection()
+    setup = _load_row(Setup.__table__, record["setup"])
+    setup.setdefault("setup_id", uuid.uuid4())
+
+    exists = connection.execute(
+        select(Setup.setup_id).where(or_(Setup.setup_id == setup["setup_id"], Setup.setup_name == setup["setup_name"]))
+    ).first()
+    if exists is not None:
+        return None
+
+    rows = defaultdict(list)
+    for key, model in CONFIGURABLES.items():
+        if record.get(key) is not None:
+            configurable = _load_row(model.__table__, record[key], **{model.id_field: uuid.uuid4()})
+            setup[model.id_field] = configurable[model.id_field]
+            rows[model].append(configurable)
+        else:
+            setup[model.id_field] = None
+    rows[Setup].append(setup)
+
+    for camera_record in record.get("cameras", []):
+        camera = _load_row(Camera.__table__, camera_record["camera"], setup_id=setup["setup_id"])
+        camera.setdefault("camera_id", uuid.uuid4())
+        rows[Camera].append(camera)
+        for key, model in CAMERA_CHILDREN.items():
+            rows[model].extend(_load_row(model.__table__, child, camera_id=camera["camera_id"])
+                               for child in camera_record.get(key, []))
+
+        for projection_record in camera_record.get("projections", []):
+            projection = _load_row(Projection.__table__, projection_record["projection"],
+                                   camera_id=camera["camera_id"])
+            projection.setdefault("projection_id", uuid.uuid4())
+            rows[Projection].append(projection)
+            for key, model in PROJECTION_CHILDREN.items():
+                rows[model].extend(_load_row(model.__table__, child, projection_id=projection["projection_id"])
+                                   for child in projection_record.get(key, []))
+
+    rows[PointSet] = _point_sets(rows)
+
+    for model in INSERT_ORDER:
+        # Rows of one executemany need the same columns, exports always have, hand written lines may not
+        by_columns = defaultdict(list)
+        for row in rows[model]:
+            by_columns[frozenset(row)].append(row)
+        for same_columns in by_columns.values():
+            connection.execute(insert(model.__table__), same_columns)
+
+    record_changes(session_db, [(setup["setup_id"], None, Setup.__tablename__, CHANGE_INSERT)] + [
+        (setup["setup_id"], camera["camera_id"], Camera.__tablename__, CHANGE_INSERT) for camera in rows[Camera]
+    ])
+    return setup["setup_id"]
@@ -0,0 +1 @@
+# This package pushes the changes of setups to connected clients as they are committed
@@ -0,0 +1,229 @@
+import asyncio
+from collections import defaultdict
+import json
+from sqlalchemy import func, select
+import database.async_session as db
+from database.change_feed import changes_after
+from data_classes import (Change, Camera, Crop, InnerPoints, OuterPoints, Projection, SourcePoints, DestinationPoints,
+                          Undistortion)
+from data_classes.camera import camera_patch_model
+from data_classes.change import CHANGE_DELETE
+from data_classes.crop import crop_model
+from data_classes.undistortion import undistortion_model
+
+# Seconds between two reads of the change feed while anyone is subscribed, commits of this process wake it earlier
+POLL_INTERVAL = 0.5
+
+# Most changes read from the feed at once
+POLL_LIMIT = 1000
+
+# Events a subscriber may fall behind before it is told to reload instead
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Columns sent as the values of a camera and of its crops and undistortion
+CAMERA_FIELDS = ["camera_name", *camera_patch_model.keys()]
+CROP_FIELDS = list(crop_model.keys())
+UNDISTORTION_FIELDS = list(undistortion_model.keys())
+
+
+async def _point_values(session_db, model, camera_ids):
+    # Return the points of a camera point table as lists of x, y dictionaries per camera
+    values = defaultdict(list)
+    for camera_id, x, y in await session_db.execute(
+        select(model.camera_id, model.x, model.y).where(model.camera_id.in_(camera_ids)).order_by(model.index)
+    ):
+        values[camera_id].append({"x": x, "y": y})
+    return values
+
+
+async def _projection_point_values(session_db, model, camera_ids):
+    # Return the points of a projection point table per camera, keyed by projection id
+    values = defaultdict(lambda: defaultdict(list))
+    for camera_id, projection_id, x, y in await session_db.execute(
+        select(Projection.camera_id, model.projection_id, model.x, model.y)
+        .join(Projection, Projection.projection_id == model.projection_id)
+        .where(Projection.camera_id.in_(camera_ids)).order_by(model.index)
+    ):
+        values[camera_id][str(projection_id)].append({"x": x, "y": y})
+    return values
+
+
+async def _undistortion_values(session_db, camera_ids):
+    # Return the undistortion parameters per camera, keyed by projection id
+    values = defaultdict(dict)
+    for row in await session_db.execute(
+        select(Projection.camera_id, Undistortion.projection_id, *(getattr(Undistortion, field)
+                                                                    for field in UNDISTORTION_FIELDS))
+        .join(Projection, Projection.projection_id == Undistortion.projection_id)
+        .where(Projection.camera_id.in_(camera_ids))
+    ):
+        values[row.camera_id][str(row.projection_id)] = {field: getattr(row, field) for field in UNDISTORTION_FIELDS}
+    return values
+
+
+async def _crop_values(session_db, camera_ids):
+    # Return the crops per camera
+    values = defaultdict(list)
+    for row in await session_db.execute(
+        select(Crop.camera_id, *(getattr(Crop, field) for field in CROP_FIELDS)).where(Crop.camera_id.in_(camera_ids))
+    ):
+        values[row.camera_id].append({field: getattr(row, field) for field in CROP_FIELDS})
+    return values
+
+
+async def _camera_values(session_db, camera_ids):
+    # Return the editable fields per camera
+    return {
+        row.camera_id: {field: getattr(row, field) for field in CAMERA_FIELDS}
+        for row in await session_db.execute(
+            select(Camera.camera_id, *(getattr(Camera, field) for field in CAMERA_FIELDS))
+            .where(Camera.camera_id.in_(camera_ids))
+        )
+    }
+
+
+# Loaders of the new values of the entities edited on the camera page, other changes are sent without values
+VALUE_LOADERS = {
+    Camera.__tablename__: _camera_values,
+    Crop.__tablename__: _crop_values,
+    Undistortion.__tablename__: _undistortion_values,
+    InnerPoints.__tablename__: lambda session_db, ids: _point_values(session_db, InnerPoints, ids),
+    OuterPoints.__tablename__: lambda session_db, ids: _point_values(session_db, OuterPoints, ids),
+    SourcePoints.__tablename__: lambda session_db, ids: _projection_point_values(session_db, SourcePoints, ids),
+    DestinationPoints.__tablename__: lambda session_db, ids: _projection_point_values(session_db, DestinationPoints,
+                                                                                      ids),
+}
+
+
+def format_event(event, data, event_id=None):
+    # Return an event in the Server-Sent Events wire format
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+class ChangeHub:
+    """Pushes the changes of setups to the subscribers of every setup
+
+        One task per server process reads the change feed, and only while anyone is subscribed. Changes
+        of the same camera and table read together are sent as one event with the values after the last
+        of them. Subscribers only wait on a queue of their own, so an idle connection costs no thread and
+        no query. The feed is shared by every server process, so edits served by any of them are pushed.
+
+        Args:
+            poll_interval: seconds between two reads of the change feed
+            queue_size: events a subscriber may fall behind before it is told to reload
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._last_seq = None
+        self._loop = None
+        self._wake = None
+        self._task = None
+        self._start_lock = asyncio.Lock()
+
+    async def subscribe(self, setup_id):
+        """Subscribes to the changes of a setup made from now on
+
+            Args:
+                setup_id: id of the setup
+
+            Returns:
+                queue receiving the events of the setup as (event, data, event id) tuples
+        """
+
+        # Subscribers arriving while the task is started wait for it instead of starting a second one
+        async with self._start_lock:
+            if self._task is None or self._task.done():
+                self._loop = asyncio.get_running_loop()
+                self._wake = asyncio.Event()
+                async with db.AsyncSessionLocal() as session_db:
+                    self._last_seq = (await session_db.execute(select(func.max(Change.seq)))).scalar() or 0
+                self._task = asyncio.create_task(self._run())
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[setup_id].add(queue)
+        return queue
+
+    def unsubscribe(self, setup_id, queue):
+        # Stop sending events to a queue, the task reading the feed ends with the last subscriber
+        self._subscribers[setup_id].discard(queue)
+        if not self._subscribers[setup_id]:
+            del self._subscribers[setup_id]
+
+    def wake(self):
+        # Read the feed right away, safe to call from any thread, e.g. after a commit of a Flask request
+        if self._loop is not None and self._task is not None and not self._task.done():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def close(self):
+        # Stop reading the feed, used on shutdown
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        # Read the feed until nobody is subscribed anymore
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            async with db.AsyncSessionLocal() as session_db:
+                # Read until the feed is drained, a burst of edits doesn't wait an interval per page
+                while self._subscribers:
+                    changes = (await session_db.execute(changes_after(self._last_seq, POLL_LIMIT))).scalars().all()
+                    if not changes:
+                        break
+
+                    # Sequence numbers follow the commit order, no change committed later gets a lower one
+                    self._last_seq = changes[-1].seq
+                    await self._publish(session_db, [change for change in changes
+                                                     if change.setup_id in self._subscribers])
+
+    async def _publish(self, session_db, changes):
+        # Send the changes read together to the subscribers of their setup, one event per camera and table
+        latest = {}
+        for change in changes:
+            latest[(change.setup_id, change.camera_id, change.entity)] = change
+
+        values = {}
+        for entity, loader in VALUE_LOADERS.items():
+            camera_ids = {camera_id for _, camera_id, changed_entity in latest
+                          if changed_entity == entity and camera_id is not None}
+            if camera_ids:
+                values[entity] = await loader(session_db, camera_ids)
+
+        for (setup_id, camera_id, entity), change in latest.items():
+            data = {
+                "camera_id": str(camera_id) if camera_id is not None else None,
+                "entity": entity,
+                "op": change.op
+            }
+            if entity in values and change.op != CHANGE_DELETE:
+                data["values"] = values[entity].get(camera_id)
+
+            for queue in list(self._subscribers.get(setup_id, ())):
+                self._send(queue, ("change", data, change.seq))
+
+    @staticmethod
+    def _send(queue, event):
+        # Queue an event, a subscriber that fell too far behind gets a single reload event instead
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(("reload", {"message": "Too many changes, download the setup again"}, event[2]))
+
+
+# Hub of this server process
+change_hub = ChangeHub()
@@ -0,0 +1 @@
+# This package runs work that shouldn't hold a request worker in the background, its status is kept in the jobs table
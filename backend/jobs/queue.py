@@ -0,0 +1,261 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from threading import BoundedSemaphore, Lock, local
+import multiprocessing
+import json
+import os
+import socket
+import database.session as db
+from data_classes import Job
+from data_classes.job import JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+from settings import JOB_THREADS, JOB_PROCESSES, JOB_QUEUE_LIMIT
+
+_executor = ThreadPoolExecutor(max_workers=JOB_THREADS, thread_name_prefix="job")
+_futures = {}
+_futures_lock = Lock()
+
+# Id of the job the current job thread runs, so long jobs can check for a cancel between their steps
+_current_job = local()
+
+# CPU heavy work runs in worker processes so it never holds the GIL of the request threads, the pool is started
+# on first use with spawn as forking a threaded server isn't safe
+_process_pool = None
+_process_pool_lock = Lock()
+_process_slots = BoundedSemaphore(JOB_QUEUE_LIMIT)
+
+
+class JobQueueFull(Exception):
+    """Raised when more jobs are waiting than JOB_QUEUE_LIMIT, the client should try again later"""
+
+
+def submit_job(session_db, kind, function, *args):
+    """Stores a job and runs it in the background
+
+        Args:
+            session_db: session used to store the job, it is committed
+            kind: what the job does, e.g. delete_setup
+            function: called as function(session, *args) with a session of its own,
+                returns a JSON serializable result. Changes it doesn't commit itself are
+                committed together with the result, or rolled back when the job is cancelled
+            args: arguments passed to the function
+
+        Returns:
+            id of the job
+
+        Raises:
+            JobQueueFull: when JOB_QUEUE_LIMIT jobs are queued or running in this process
+    """
+
+    with _futures_lock:
+        if len(_futures) >= JOB_QUEUE_LIMIT:
+            raise JobQueueFull()
+
+        job = Job(kind=kind)
+        job.worker = _worker()
+        session_db.add(job)
+        session_db.commit()
+        job_id = job.job_id
+
+        future = _executor.submit(_run_job, job_id, function, args)
+        _futures[job_id] = future
+    future.add_done_callback(lambda _: _forget(job_id))
+
+    return job_id
+
+
+def _worker():
+    # Return the host and process id of this server process, stored on the jobs it runs
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _process_alive(pid):
+    # Check whether a process of this host still exists, signal 0 only checks without sending anything
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _lost(job: Job, host):
+    # A job is lost when the process that ran it is gone, jobs of other hosts can't be checked and are kept
+    if job.worker is None:
+        return True
+    worker_host, _, pid = job.worker.rpartition(":")
+    if worker_host != host:
+        return False
+    with _futures_lock:
+        if job.job_id in _futures:
+            return False
+    return int(pid) == os.getpid() or not _process_alive(int(pid))
+
+
+def recover_jobs():
+    """Fails the jobs a stopped server process left queued or running
+
+        Jobs only live in the threads of the process that submitted them, after a restart nothing finishes
+        them. Called when a server process starts, jobs of processes of this host that are still running
+        aren't touched.
+
+        Returns:
+            amount of jobs marked as failed
+    """
+
+    session_db = db.SessionLocal()
+    try:
+        host = socket.gethostname()
+        unfinished = session_db.query(Job).filter(Job.status.in_((JOB_QUEUED, JOB_RUNNING))).all()
+        lost = [job for job in unfinished if _lost(job, host)]
+        for job in lost:
+            job.status = JOB_FAILED
+            job.finished_at = datetime.now()
+            job.error = "The server stopped before the job finished"
+        session_db.commit()
+        return len(lost)
+    finally:
+        session_db.close()
+
+
+def _forget(job_id):
+    with _futures_lock:
+        _futures.pop(job_id, None)
+
+
+def _finish(session_db, job_id, status, result=None, error=None):
+    # Store the outcome of a job
+    job: Job = session_db.get(Job, job_id)
+    job.status = status
+    job.finished_at = datetime.now()
+    job.result = result
+    job.error = error
+    session_db.commit()
+
+
+def _cancel_requested(session_db, job_id):
+    # Read the cancel flag from the table, the cancel may come from another server process
+    return session_db.query(Job.cancel_requested).filter_by(job_id=job_id).scalar()
+
+
+def cancel_requested(session_db):
+    """Checks whether the job running in this thread was asked to cancel
+
+        Long jobs that commit in steps call this between the steps and stop early, what they
+        committed so far stays.
+
+        Args:
+            session_db: session of the job
+
+        Returns:
+            True when a cancel was requested, False outside of a job
+    """
+
+    job_id = getattr(_current_job, "job_id", None)
+    return job_id is not None and bool(_cancel_requested(session_db, job_id))
+
+
+def _run_job(job_id, function, args):
+    # Run a job with its own session, the request that submitted it is long gone
+    session_db = db.SessionLocal()
+    _current_job.job_id = job_id
+    try:
+        if _cancel_requested(session_db, job_id):
+            _finish(session_db, job_id, JOB_CANCELLED)
+            return
+
+        job: Job = session_db.get(Job, job_id)
+        job.status = JOB_RUNNING
+        job.started_at = datetime.now()
+        session_db.commit()
+
+        result = function(session_db, *args)
+
+        if _cancel_requested(session_db, job_id):
+            session_db.rollback()
+            _finish(session_db, job_id, JOB_CANCELLED)
+        else:
+            _finish(session_db, job_id, JOB_DONE, result=json.dumps(result))
+    except Exception as e:
+        session_db.rollback()
+        _finish(session_db, job_id, JOB_FAILED, error=str(e))
+    finally:
+        _current_job.job_id = None
+        session_db.close()
+
+
+def cancel_job(session_db, job: Job):
+    """Cancels a job, a queued job never starts and the result of a running job is discarded
+
+        Work already committed by a running job, e.g. the cameras a setup delete removed so far, stays.
+
+        Args:
+            session_db: session of the request, it is committed
+            job: job to cancel
+
+        Returns:
+            True when the job is cancelled, False when it is running and will be cancelled when it ends
+    """
+
+    job.cancel_requested = True
+
+    with _futures_lock:
+        future = _futures.get(job.job_id)
+
+    # A queued job of this process is taken off the queue right away
+    if job.status == JOB_QUEUED and future is not None and future.cancel():
+        job.status = JOB_CANCELLED
+        job.finished_at = datetime.now()
+
+    session_db.commit()
+    return job.status == JOB_CANCELLED
+
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=JOB_PROCESSES,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def run_in_process(function, *args):
+    """Runs a CPU heavy function in a worker process and waits for its result
+
+        Used by jobs and by requests that need the result right away. Only plain values, arrays and
+        picklable objects can be passed, not rows of a session.
+
+        Args:
+            function: function defined at module level
+            args: arguments passed to the function
+
+        Returns:
+            return value of the function
+
+        Raises:
+            JobQueueFull: when JOB_QUEUE_LIMIT calls are already waiting for a worker process
+    """
+
+    if not _process_slots.acquire(blocking=False):
+        raise JobQueueFull()
+    try:
+        return _get_process_pool().submit(function, *args).result()
+    finally:
+        _process_slots.release()
+
+
+def queue_state():
+    # Return the amount of jobs queued or running in this process and the limits of the queue
+    with _futures_lock:
+        jobs = len(_futures)
+    return {"jobs": jobs, "job_limit": JOB_QUEUE_LIMIT, "threads": JOB_THREADS, "processes": JOB_PROCESSES}
+
+
+def wait_for_job(job_id, timeout=None):
+    # Block until a job of this process finished, used by scripts and tests
+    with _futures_lock:
+        future = _futures.get(job_id)
+
+    if future is not None:
+        future.exception(timeout=timeout)
@@ -0,0 +1,46 @@
+# This module defers loading heavy libraries (OpenCV, numpy, the storage sdk) until they are first used
+# Most requests and every script that only touches the database never need them, so the app starts without them
+
+import importlib
+import importlib.util
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that imports it on the first attribute access
+
+        The import goes through the regular import system, which holds a lock per module while the module runs,
+        so threads of a server using it at the same time all wait for the fully loaded module.
+        importlib.util.LazyLoader doesn't guarantee that before Python 3.12.
+
+        Args:
+            name: full name of the module
+    """
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.__name__)
+        # Later accesses read the attributes of the loaded module directly
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+def lazy_import(name):
+    """Returns a module that is only loaded when one of its attributes is first used
+
+        Missing modules still fail here, when the importing module is loaded.
+
+        Args:
+            name: full name of the module, e.g. "cv2" or "azure.storage.blob"
+
+        Returns:
+            the module when it is loaded already, a LazyModule otherwise
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+
+    return LazyModule(name)
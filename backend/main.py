@@ -2,8 +2,10 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from settings import SECRET_KEY
 from flask_restx import Api
-from api import setup_ns, detector_ns, team_detector_ns, camera_ns, field_ns, point_ns, undistortion_ns, crop_ns, undistort_points_ns, user_ns, cam_cfg_path_ns
+from api import setup_ns, detector_ns, team_detector_ns, camera_ns, field_ns, point_ns, undistortion_ns, crop_ns, undistort_points_ns, user_ns, cam_cfg_path_ns, upload_ns, preview_ns, metrics_ns, job_ns, change_ns
+from database.session import init_app as init_db_session
 import os
+import sys
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
@@ -13,6 +15,9 @@ app.json.sort_keys = False  # Prevents json from being alphabetically sorted
 # supports_credentials includes cookies or other credentials
 CORS(app, supports_credentials=True)
 
+# Every request gets one database session which is closed when the request ends
+init_db_session(app)
+
 api = Api(app)  # Initializes API
 
 # Add different API namespaces to main backend file
@@ -27,6 +32,11 @@ api.add_namespace(crop_ns, path="/api")
 api.add_namespace(undistort_points_ns, path="/api")
 api.add_namespace(user_ns, path="/api")
 api.add_namespace(cam_cfg_path_ns, path="/api")
+api.add_namespace(upload_ns, path="/api")
+api.add_namespace(preview_ns, path="/api")
+api.add_namespace(metrics_ns, path="/api")
+api.add_namespace(job_ns, path="/api")
+api.add_namespace(change_ns, path="/api")
 
 # ==========================
 # Error Handlers
@@ -45,5 +55,12 @@ def internal_server_error(error):
 
 
 if __name__ == "__main__":
-    host = os.getenv("FLASK_HOST")
-    app.run(debug=True, host=host, port=5000)
+    # python main.py --profile-startup reports the import time per module instead of running the server
+    if "--profile-startup" in sys.argv:
+        from startup_profile import main as profile_startup
+        profile_startup([])
+    else:
+        from jobs.queue import recover_jobs
+        recover_jobs()
+        host = os.getenv("FLASK_HOST")
+        app.run(debug=True, host=host, port=5000)
@@ -0,0 +1 @@
+# This package contains the image and geometry processing used by the api routes
@@ -0,0 +1,298 @@
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Sides of the pitch a camera can film, they mirror the crop layout
+AUTO_CROP_SIDES = ("left", "right")
+
+
+def generate_polygon_with_details(points, num_points_per_edge):
+    """Creates a detailed polygon with num_points_per_edge points on every edge
+
+        Args:
+            points: (N, 2) array of polygon vertices
+            num_points_per_edge: amount of points generated on each edge, including both vertices
+
+        Returns:
+            (N * num_points_per_edge + 1, 2) array of points, closed with the first vertex
+    """
+
+    vertices = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    starts = vertices
+    ends = np.roll(vertices, -1, axis=0)
+
+    # Broadcast (edges, 1, 2) with (1, steps, 1) to get every intermediate point at once
+    t = np.linspace(0, 1, num_points_per_edge).reshape(1, -1, 1)
+    detailed_points = starts[:, np.newaxis, :] + t * (ends - starts)[:, np.newaxis, :]
+
+    return np.vstack((detailed_points.reshape(-1, 2), vertices[:1]))
+
+
+def polygon_edges(points):
+    # Return the start and end point of every polygon edge, the last edge closes the polygon
+    vertices = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return vertices, np.roll(vertices, -1, axis=0)
+
+
+def clip_edges_to_x_interval(starts, ends, interval_0, interval_1):
+    """Clips polygon edges to the part where interval_0 < x < interval_1
+
+        Edges that only touch the interval borders are dropped, so the extrema of the clipped edges
+        equal the extrema over the open interval, like the strict filters on densified points did.
+
+        Args:
+            starts: (N, 2) array of edge start points
+            ends: (N, 2) array of edge end points
+            interval_0: lower x bound, may be -inf
+            interval_1: upper x bound, may be inf
+
+        Returns:
+            (starts, ends) of the clipped edges inside the interval
+    """
+
+    dx = ends[:, 0] - starts[:, 0]
+    vertical = dx == 0
+    safe_dx = np.where(vertical, 1, dx)
+
+    # Edge parameters t where the edge crosses both interval borders
+    t_0 = (interval_0 - starts[:, 0]) / safe_dx
+    t_1 = (interval_1 - starts[:, 0]) / safe_dx
+    t_low = np.where(vertical, 0, np.clip(np.minimum(t_0, t_1), 0, 1))
+    t_high = np.where(vertical, 1, np.clip(np.maximum(t_0, t_1), 0, 1))
+
+    inside_vertical = vertical & (starts[:, 0] > interval_0) & (starts[:, 0] < interval_1)
+    valid = inside_vertical | (~vertical & (t_low < t_high))
+
+    direction = ends - starts
+    clipped_starts = starts + t_low[:, np.newaxis] * direction
+    clipped_ends = starts + t_high[:, np.newaxis] * direction
+
+    return clipped_starts[valid], clipped_ends[valid]
+
+
+def find_smallest_y_value_between_interval(points, interval_0, interval_1):
+    # Find the point of the polygon with the smallest y-value where x lies between interval_0 and interval_1
+    # y is linear along an edge, so the minimum is always at an end of a clipped edge
+    starts, ends = clip_edges_to_x_interval(*polygon_edges(points), interval_0, interval_1)
+    candidates = np.stack((starts, ends), axis=1).reshape(-1, 2)
+
+    return candidates[np.argmin(candidates[:, 1])]
+
+
+def find_most_right_and_left(points):
+    # Find the polygon vertices with the maximum (most right) and minimum (most left) x-coordinate
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return points[np.argmax(points[:, 0])], points[np.argmin(points[:, 0])]
+
+
+def calculate_y_distance(points):
+    # Calculate the distance between y_min and y_max of the polygon vertices
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    y_min = points[:, 1].min()
+    y_max = points[:, 1].max()
+
+    return y_min, y_max, y_max - y_min
+
+
+def find_point_closest_to_y(points, target_y, interval_0, interval_1, most_right):
+    """Finds the polygon point between interval_0 < x < interval_1 with the y-value closest to target_y
+
+        Args:
+            points: (N, 2) array of polygon vertices
+            target_y: y-value to get as close to as possible
+            interval_0: lower x bound, may be -inf
+            interval_1: upper x bound, may be inf
+            most_right: return the most right point when several points share the closest y-value,
+                otherwise the most left one
+
+        Returns:
+            [x, y] of the point
+    """
+
+    starts, ends = clip_edges_to_x_interval(*polygon_edges(points), interval_0, interval_1)
+    y_low = np.minimum(starts[:, 1], ends[:, 1])
+    y_high = np.maximum(starts[:, 1], ends[:, 1])
+
+    # The closest y-value of every edge is the target clamped to the y-range of the edge
+    closest_y = np.clip(target_y, y_low, y_high)
+    y = closest_y[np.argmin(np.abs(closest_y - target_y))]
+
+    # Intersect every edge reaching that y-value with the horizontal line through it
+    at_y = (y_low - 1e-6 <= y) & (y <= y_high + 1e-6)
+    starts, ends = starts[at_y], ends[at_y]
+    dy = ends[:, 1] - starts[:, 1]
+    horizontal = dy == 0
+    t = np.where(horizontal, 0, np.clip((y - starts[:, 1]) / np.where(horizontal, 1, dy), 0, 1))
+    xs = np.concatenate((starts[:, 0] + t * (ends[:, 0] - starts[:, 0]), ends[horizontal, 0]))
+
+    return np.array([xs.max() if most_right else xs.min(), y])
+
+
+def find_right_point_closest_to_y_third(points, y_min, max_distance, image_width):
+    # Find the most right point in the right half of the image closest to the middle of the y-distance
+    target_y = y_min + (1 / 2) * max_distance
+    return find_point_closest_to_y(points, target_y, image_width / 2, np.inf, most_right=True)
+
+
+def find_left_point_closest_to_y_third(points, y_min, max_distance, image_width):
+    # Find the most left point in the left half of the image closest to the middle of the y-distance
+    target_y = y_min + (1 / 2) * max_distance
+    return find_point_closest_to_y(points, target_y, -np.inf, image_width / 2, most_right=False)
+
+
+def right_auto_cropper(points, image_width, image_height):
+    """Calculates three crops for a camera filming the right side of the pitch
+
+        Args:
+            points: (N, 2) array of outer field points in pixels
+            image_width: width of the camera image in pixels
+            image_height: height of the camera image in pixels
+
+        Returns:
+            dictionary of crops with the corners as [[x0, y0], [x1, y1]]
+    """
+
+    x_boundary = image_width / 50
+    y_boundary = image_height / 50
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    right_top = find_smallest_y_value_between_interval(points, image_width / 3, image_width)
+    most_right_point, _ = find_most_right_and_left(points)
+
+    y_min_back_side, _, distance_back_side = calculate_y_distance(np.vstack((most_right_point, right_top)))
+    right_x_point = find_right_point_closest_to_y_third(points, y_min_back_side, distance_back_side, image_width)
+
+    x0 = 0
+    x2 = right_x_point[0]
+    x1 = (x2 - x0) * 0.6 + x0
+
+    right_top_2 = find_smallest_y_value_between_interval(points, x0, x1)
+
+    _, y_max, distance = calculate_y_distance(points)
+
+    y0_A = max(right_top[1] - (2 * y_boundary), 0)
+    x3 = min(image_width, most_right_point[0] + x_boundary)
+
+    y0_B = max(right_top_2[1] - (2 * y_boundary), 0)
+    y0_C = max(0, right_x_point[1] - y_boundary)
+    y1_A = right_x_point[1] + (5 * y_boundary)
+    y1_B = y0_B + distance / 2
+    y1_C = min(y_max + y_boundary, image_height)
+
+    return {
+        'crop1': [[x0, y0_B], [x1, y1_B]],
+        'crop2': [[x1, y0_A], [x2, y1_A]],
+        'crop3': [[x0, y0_C], [x3, y1_C]]
+    }
+
+
+def left_auto_cropper(points, image_width, image_height):
+    """Calculates three crops for a camera filming the left side of the pitch
+
+        Args:
+            points: (N, 2) array of outer field points in pixels
+            image_width: width of the camera image in pixels
+            image_height: height of the camera image in pixels
+
+        Returns:
+            dictionary of crops with the corners as [[x0, y0], [x1, y1]]
+    """
+
+    x_boundary = image_width / 50
+    y_boundary = image_height / 50
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+
+    left_top = find_smallest_y_value_between_interval(points, 0, image_width / 3 * 2)
+    _, most_left_point = find_most_right_and_left(points)
+
+    y_min_back_side, _, distance_back_side = calculate_y_distance(np.vstack((most_left_point, left_top)))
+    left_x_point = find_left_point_closest_to_y_third(points, y_min_back_side, distance_back_side, image_width)
+
+    x0 = image_width
+    x2 = left_x_point[0]
+    x1 = x0 - ((x0 - x2) * 0.6)
+
+    left_top_2 = find_smallest_y_value_between_interval(points, x1, x0)
+
+    _, y_max, distance = calculate_y_distance(points)
+
+    y0_A = max(0, left_top[1] - (2 * y_boundary))
+    x3 = max(0, most_left_point[0] - x_boundary)
+
+    y0_B = max(0, left_top_2[1] - (2 * y_boundary))
+    y0_C = max(0, left_x_point[1] - y_boundary)
+    y1_A = left_x_point[1] + (5 * y_boundary)
+    y1_B = y0_B + distance / 2
+    y1_C = min(y_max + y_boundary, image_height)
+
+    return {
+        'crop1': [[x1, y0_B], [x0, y1_B]],
+        'crop2': [[x2, y0_A], [x1, y1_A]],
+        'crop3': [[x3, y0_C], [x0, y1_C]]
+    }
+
+
+def auto_crop(points, image_width, image_height, side):
+    """Calculates the crops of a camera from its outer field points
+
+        Args:
+            points: list of outer field points in pixels
+            image_width: width of the camera image in pixels
+            image_height: height of the camera image in pixels
+            side: side of the pitch filmed by the camera, one of AUTO_CROP_SIDES
+
+        Returns:
+            list of crops as [[x0, y0], [x1, y1]] in pixels
+
+        Raises:
+            ValueError: when the points don't describe a polygon the crops can be placed on
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 3:
+        raise ValueError("At least 3 outer field points are needed")
+
+    cropper = left_auto_cropper if side == "left" else right_auto_cropper
+    try:
+        crops = cropper(points, image_width, image_height)
+    except ValueError as e:
+        # A crop interval without any part of the polygon in it, e.g. a polygon much smaller than the image
+        raise ValueError("The outer field points cover too little of the image to place the crops") from e
+
+    return [[[float(x0), float(y0)], [float(x1), float(y1)]] for (x0, y0), (x1, y1) in crops.values()]
+
+
+def transform_crops_to_list(crops_dict):
+    """
+    Transforms a crops dictionary into a list of lists of lists in the format [[[x0, y0], [x1, y1]], ...].
+
+    Parameters:
+    - crops_dict: Dictionary of crops with keys like 'crop1', 'crop2', etc.
+
+    Returns:
+    - List of lists of lists in the format [[[x0, y0], [x1, y1]], ...]
+    """
+    # Convert coordinates to integers
+    crops_list = [
+        [
+            [int(round(x0)), int(round(y0))],
+            [int(round(x1)), int(round(y1))]
+        ]
+        for (x0, y0), (x1, y1) in crops_dict.values()
+    ]
+
+    return crops_list
+
+
+def normalize_coordinates(crops_xyxy, image_width, image_height):
+    normalized_crops = []
+    for crop in crops_xyxy:
+        # Divide the first coordinate through image_width and the second through image_height
+        normalized_crop = [
+            [round(crop[0][0] / image_width, 2), round(crop[0][1] / image_height, 2)],
+            [round(crop[1][0] / image_width, 2), round(crop[1][1] / image_height, 2)]
+        ]
+        normalized_crops.append(normalized_crop)
+    return normalized_crops
@@ -0,0 +1,353 @@
+from collections import OrderedDict
+from threading import Lock
+from datetime import datetime
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceNotModifiedError
+from settings import BLOB_CACHE_DIR, BLOB_CACHE_SIZE_MB, BLOB_CACHE_MAX_ITEM_MB
+from lazy_import import lazy_import
+import hashlib
+import tempfile
+import json
+import glob
+import os
+
+storage_blob = lazy_import("azure.storage.blob")
+
+# Size of the reads when a cached blob is sent to the client
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class CachedBlob:
+    """Blob stored in the cache with the properties it had when it was downloaded"""
+
+    def __init__(self, path, etag, size, content_type, last_modified, file_path):
+        self.path = path
+        self.etag = etag
+        self.size = size
+        self.content_type = content_type
+        self.last_modified = last_modified
+        self.file_path = file_path
+
+    def properties(self):
+        # Return the stored properties in the form the storage client returns them
+        properties = storage_blob.BlobProperties()
+        properties.name = self.path
+        properties.etag = self.etag
+        properties.size = self.size
+        properties.last_modified = self.last_modified
+        properties.content_settings = storage_blob.ContentSettings(content_type=self.content_type)
+        return properties
+
+    def to_json(self):
+        return {"path": self.path, "etag": self.etag, "size": self.size, "content_type": self.content_type,
+                "last_modified": self.last_modified.isoformat() if self.last_modified else None}
+
+
+class BlobCache:
+    """Thread safe LRU cache of blobs on local disk, keyed by blob path and ETag
+
+        Every blob path has at most one cached version. Its file is named after the path and the ETag, so
+        a newer version never overwrites a file another request is still reading. The properties of every
+        blob are stored next to it, so the cache survives restarts of the server.
+    """
+
+    def __init__(self, directory, max_bytes, max_item_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = Lock()
+        self.reset_counters()
+
+    def reset_counters(self):
+        # Reset the hit, miss and eviction counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _file_prefix(self, path, etag):
+        # Return the path of the files of one version of a blob, without extension
+        return os.path.join(self.directory, hashlib.sha1(f"{path}\n{etag}".encode("utf-8")).hexdigest())
+
+    def _load(self):
+        # Register the blobs cached by earlier runs, least recently used first (called with the lock held)
+        self._loaded = True
+        found = []
+        for meta_path in glob.glob(os.path.join(self.directory, "*.json")):
+            file_path = meta_path[:-len(".json")] + ".blob"
+            try:
+                with open(meta_path) as file:
+                    meta = json.load(file)
+                mtime = os.path.getmtime(file_path)
+            except (OSError, ValueError):
+                continue
+            last_modified = datetime.fromisoformat(meta["last_modified"]) if meta["last_modified"] else None
+            found.append((mtime, CachedBlob(meta["path"], meta["etag"], meta["size"], meta["content_type"],
+                                            last_modified, file_path)))
+
+        for _, entry in sorted(found, key=lambda item: item[0]):
+            self._add(entry)
+        self._evict()
+
+    def _add(self, entry):
+        # Register an entry as most recently used, replacing the older version of its blob
+        old = self._entries.pop(entry.path, None)
+        if old is not None:
+            self._size -= old.size
+            if old.file_path != entry.file_path:
+                self._remove_files(old)
+        self._entries[entry.path] = entry
+        self._size += entry.size
+
+    def _evict(self):
+        # Remove least recently used blobs until the cache fits its size limit
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= entry.size
+            self._remove_files(entry)
+            self.evictions += 1
+
+    @staticmethod
+    def _remove_files(entry):
+        # Open files stay readable after their removal, so requests streaming them aren't interrupted
+        for file_path in (entry.file_path, entry.file_path[:-len(".blob")] + ".json"):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def lookup(self, path):
+        # Return the cached version of a blob path, None when it isn't cached
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return self._entries.get(path)
+
+    def open(self, entry):
+        """Opens the file of a cached blob and marks it as most recently used, counts a hit
+
+            Args:
+                entry: cached blob as returned by lookup
+
+            Returns:
+                binary file object, None when the blob was evicted meanwhile
+        """
+
+        with self._lock:
+            if self._entries.get(entry.path) is not entry:
+                return None
+            try:
+                file = open(entry.file_path, "rb")
+            except FileNotFoundError:
+                self._entries.pop(entry.path)
+                self._size -= entry.size
+                return None
+
+            self._entries.move_to_end(entry.path)
+            self.hits += 1
+
+        # The modification time keeps the order of use across restarts
+        os.utime(entry.file_path)
+        return file
+
+    def discard(self, path):
+        # Remove the cached version of a blob path
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._size -= entry.size
+                self._remove_files(entry)
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def store(self, path, properties, chunks):
+        """Passes on the chunks of a blob download while writing them to the cache
+
+            The blob is only added once every chunk was passed on, a download that is cut off leaves nothing behind.
+            Blobs larger than the item size limit are passed on without being cached.
+
+            Args:
+                path: path of the blob
+                properties: properties of the blob the chunks belong to
+                chunks: iterable of the bytes of the whole blob
+
+            Yields:
+                the chunks
+        """
+
+        if properties.size > self.max_item_bytes:
+            yield from chunks
+            return
+
+        entry, tmp = self._start_store(path, properties)
+        try:
+            with tmp:
+                for chunk in chunks:
+                    tmp.write(chunk)
+                    yield chunk
+            self._finish_store(entry, tmp.name)
+        finally:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+
+    async def store_async(self, path, properties, chunks):
+        """Async variant of store, for the chunks of a download by the async storage client
+
+            Args:
+                path: path of the blob
+                properties: properties of the blob the chunks belong to
+                chunks: async iterable of the bytes of the whole blob
+
+            Yields:
+                the chunks
+        """
+
+        if properties.size > self.max_item_bytes:
+            async for chunk in chunks:
+                yield chunk
+            return
+
+        entry, tmp = self._start_store(path, properties)
+        try:
+            with tmp:
+                async for chunk in chunks:
+                    tmp.write(chunk)
+                    yield chunk
+            self._finish_store(entry, tmp.name)
+        finally:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+
+    def _start_store(self, path, properties):
+        # Return the entry of a blob about to be stored and the temporary file its chunks are written to first,
+        # so other requests never read a half written blob
+        os.makedirs(self.directory, exist_ok=True)
+        entry = CachedBlob(path, properties.etag, properties.size, properties.content_settings.content_type,
+                           properties.last_modified, self._file_prefix(path, properties.etag) + ".blob")
+        return entry, tempfile.NamedTemporaryFile(dir=self.directory, suffix=".part", delete=False)
+
+    def _finish_store(self, entry, tmp_path):
+        # Move a completely written blob to its place and add it to the cache
+        with open(entry.file_path[:-len(".blob")] + ".json", "w") as file:
+            json.dump(entry.to_json(), file)
+        os.replace(tmp_path, entry.file_path)
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._add(entry)
+            self._evict()
+
+    def clear(self):
+        # Remove every cached blob
+        with self._lock:
+            for entry in self._entries.values():
+                self._remove_files(entry)
+            self._entries.clear()
+            self._size = 0
+            self._loaded = False
+
+    def snapshot(self):
+        # Return the counters and the size of the cache
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / requests if requests else None,
+                "evictions": self.evictions,
+                "blobs": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes
+            }
+
+
+blob_cache = BlobCache(BLOB_CACHE_DIR, BLOB_CACHE_SIZE_MB * 1024 * 1024, BLOB_CACHE_MAX_ITEM_MB * 1024 * 1024)
+
+
+def revalidate_cached_blob(blob_client, path):
+    """Returns the current properties of a blob and, when its cached version is still current, its open file
+
+        A cached blob is revalidated with a conditional request on its ETag, which blob storage answers
+        with 304 and no body when the blob didn't change.
+
+        Args:
+            blob_client: storage client of the blob
+            path: path of the blob
+
+        Returns:
+            (properties, file) where file is None when the blob has to be downloaded
+    """
+
+    entry = blob_cache.lookup(path)
+    if entry is not None:
+        try:
+            properties = blob_client.get_blob_properties(etag=entry.etag, match_condition=MatchConditions.IfModified)
+        except ResourceNotModifiedError:
+            file = blob_cache.open(entry)
+            if file is not None:
+                return entry.properties(), file
+            properties = blob_client.get_blob_properties()
+        else:
+            blob_cache.discard(path)
+    else:
+        properties = blob_client.get_blob_properties()
+
+    blob_cache.record_miss()
+    return properties, None
+
+
+async def revalidate_cached_blob_async(blob_client, path):
+    """Async variant of revalidate_cached_blob, for the async storage client
+
+        Args:
+            blob_client: async storage client of the blob
+            path: path of the blob
+
+        Returns:
+            (properties, file) where file is None when the blob has to be downloaded
+    """
+
+    entry = blob_cache.lookup(path)
+    if entry is not None:
+        try:
+            properties = await blob_client.get_blob_properties(etag=entry.etag,
+                                                               match_condition=MatchConditions.IfModified)
+        except ResourceNotModifiedError:
+            file = blob_cache.open(entry)
+            if file is not None:
+                return entry.properties(), file
+            properties = await blob_client.get_blob_properties()
+        else:
+            blob_cache.discard(path)
+    else:
+        properties = await blob_client.get_blob_properties()
+
+    blob_cache.record_miss()
+    return properties, None
+
+
+def read_file_range(file, offset, length):
+    """Reads a byte range of an open file in chunks and closes it afterwards
+
+        Args:
+            file: binary file object
+            offset: first byte to read
+            length: amount of bytes to read
+
+        Yields:
+            chunks of at most READ_CHUNK_SIZE bytes
+    """
+
+    with file:
+        file.seek(offset)
+        while length > 0:
+            chunk = file.read(min(READ_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
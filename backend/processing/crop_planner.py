@@ -0,0 +1,141 @@
+from .autocrop import clip_edges_to_x_interval, polygon_edges
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Highest amount of crops planned, the search grows with the amount of crops times the candidate splits squared
+MAX_CROPS = 10
+
+
+def letterbox(width, height, image_size):
+    """Returns the detector input pixels and letterbox waste of one crop
+
+        The detector resizes every crop so its longest side equals image_size and pads the rest,
+        so each crop costs image_size² input pixels no matter how big it is.
+
+        Args:
+            width: width of the crop in pixels, a number or an array
+            height: height of the crop in pixels, a number or an array
+            image_size: input size of the detector
+
+        Returns:
+            (scale, input_pixels, waste) with scale the amount of crop pixels per detector pixel
+    """
+
+    scale = np.maximum(width, height) / image_size
+    input_pixels = image_size * image_size
+    waste = input_pixels - (width / scale) * (height / scale)
+
+    return scale, input_pixels, waste
+
+
+def _strip_y_ranges(starts, ends, splits):
+    # Return the y-range of the polygon inside every strip between two neighbouring split positions
+    y_low = np.full(len(splits) - 1, np.inf)
+    y_high = np.full(len(splits) - 1, -np.inf)
+
+    for index in range(len(splits) - 1):
+        clipped_starts, clipped_ends = clip_edges_to_x_interval(starts, ends, splits[index], splits[index + 1])
+        if len(clipped_starts):
+            ys = np.concatenate((clipped_starts[:, 1], clipped_ends[:, 1]))
+            y_low[index], y_high[index] = ys.min(), ys.max()
+
+    return y_low, y_high
+
+
+def plan_crops(points, image_width, image_height, image_size, max_scale=2.0, max_crops=6, crop_count=None,
+               steps=48, margin=0.02):
+    """Plans the crops covering the pitch polygon with the least detector work
+
+        The polygon is cut in vertical strips at candidate x positions and every strip gets the crop
+        covering the polygon inside it. Dynamic programming over the split positions finds the strips
+        with the fewest detector input pixels, then the least letterbox waste, while no crop is scaled
+        down more than max_scale.
+
+        Args:
+            points: list of outer field points in pixels
+            image_width: width of the camera image in pixels
+            image_height: height of the camera image in pixels
+            image_size: input size of the detector
+            max_scale: maximum amount of crop pixels per detector pixel
+            max_crops: maximum amount of crops to search
+            crop_count: exact amount of crops, overrides the search over counts
+            steps: amount of equally spaced candidate split positions
+            margin: overlap added around every crop as a fraction of the image size
+
+        Returns:
+            (crops, input_pixels, waste) with crops as [[x0, y0], [x1, y1]] in pixels,
+            crops is None when no plan within max_scale exists
+    """
+
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 3:
+        raise ValueError("At least 3 outer field points are needed")
+    if image_size <= 0:
+        raise ValueError("Detector image size must be positive")
+    if not 0 < (crop_count if crop_count is not None else max_crops) <= MAX_CROPS:
+        raise ValueError(f"Amount of crops must be between 1 and {MAX_CROPS}")
+
+    starts, ends = polygon_edges(points)
+    x_min = max(0.0, points[:, 0].min())
+    x_max = min(float(image_width), points[:, 0].max())
+
+    # Candidate split positions are an even grid plus every vertex inside the polygon x-range
+    splits = np.unique(np.concatenate((np.linspace(x_min, x_max, steps + 1), np.clip(points[:, 0], x_min, x_max))))
+    count = len(splits)
+    max_crops = crop_count if crop_count is not None else max_crops
+
+    # The polygon part between splits i and j is the union of the strips in between,
+    # so the y-range of every crop follows from running minima and maxima over the strips
+    y_low, y_high = _strip_y_ranges(starts, ends, splits)
+    margin_x, margin_y = margin * image_width, margin * image_height
+
+    strip_cost = {}
+    strip_rect = {}
+    for i in range(count - 1):
+        x0 = np.full(count - i - 1, max(0.0, splits[i] - margin_x))
+        x1 = np.minimum(float(image_width), splits[i + 1:] + margin_x)
+        y0 = np.maximum(0.0, np.minimum.accumulate(y_low[i:]) - margin_y)
+        y1 = np.minimum(float(image_height), np.maximum.accumulate(y_high[i:]) + margin_y)
+
+        scale, input_pixels, waste = letterbox(x1 - x0, y1 - y0, image_size)
+        for offset in np.flatnonzero((scale <= max_scale) & (y1 > y0)):
+            j = i + 1 + offset
+            strip_cost[i, j] = (input_pixels, waste[offset])
+            strip_rect[i, j] = (x0[offset], y0[offset], x1[offset], y1[offset])
+
+    # best[k][j]: cheapest (input_pixels, waste) covering splits[0]..splits[j] with k crops
+    infinite = (np.inf, np.inf)
+    best = [[infinite] * count for _ in range(max_crops + 1)]
+    previous = [[None] * count for _ in range(max_crops + 1)]
+    best[0][0] = (0, 0.0)
+
+    for k in range(1, max_crops + 1):
+        for j in range(1, count):
+            for i in range(j):
+                if best[k - 1][i] == infinite or (i, j) not in strip_cost:
+                    continue
+
+                cost = strip_cost[i, j]
+                total = (best[k - 1][i][0] + cost[0], best[k - 1][i][1] + cost[1])
+                if total < best[k][j]:
+                    best[k][j] = total
+                    previous[k][j] = i
+
+    counts = [crop_count] if crop_count is not None else range(1, max_crops + 1)
+    options = [(best[k][count - 1], k) for k in counts if best[k][count - 1] != infinite]
+    if not options:
+        return None, 0, 0.0
+
+    (input_pixels, waste), k = min(options)
+
+    # Walk back through the split positions of the cheapest plan
+    crops = []
+    j = count - 1
+    while k > 0:
+        i = previous[k][j]
+        x0, y0, x1, y1 = strip_rect[i, j]
+        crops.append([[float(x0), float(y0)], [float(x1), float(y1)]])
+        j, k = i, k - 1
+
+    return crops[::-1], int(input_pixels), float(waste)
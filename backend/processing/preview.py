@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from threading import Lock
+from types import SimpleNamespace
+from data_classes.undistortion import undistortion_model
+from settings import PREVIEW_CACHE_SIZE
+from .remap_store import undistort_image
+from .undistortion import optimal_new_camera_matrix, undistortion_parameters
+import hashlib
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Encoding used by cv2.imencode and the mimetype of every supported preview format
+PREVIEW_FORMATS = {
+    "webp": (".webp", "image/webp"),
+    "jpeg": (".jpg", "image/jpeg"),
+    "png": (".png", "image/png")
+}
+
+PREVIEW_STAGES = ("undistortion", "homography")
+
+
+class PreviewCache:
+    """Thread safe LRU cache of encoded previews keyed by their parameter hash"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._items[key] = data
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+preview_cache = PreviewCache(PREVIEW_CACHE_SIZE)
+
+
+def preview_key(undistortion, source_points, destination_points, image_etag, width, image_format, stage):
+    """Returns the hash of every value that changes the rendered preview
+
+        Args:
+            undistortion: Undistortion row of the projection
+            source_points: list of normalized (x, y) homography source points
+            destination_points: list of normalized (x, y) homography destination points
+            image_etag: ETag of the config image blob
+            width: requested preview width
+            image_format: requested encoding (see PREVIEW_FORMATS)
+            stage: "undistortion" or "homography"
+
+        Returns:
+            hex digest used as cache key and ETag
+    """
+
+    values = (
+        tuple(float(getattr(undistortion, field)) for field in undistortion_model.keys()),
+        tuple(source_points), tuple(destination_points), image_etag, width, image_format, stage
+    )
+    return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()
+
+
+def _draw_points(image, points):
+    # Draw the numbered points the same way the frontend draws them on the distortion canvas
+    radius = max(2, image.shape[1] // 200)
+    for index, (x, y) in enumerate(points):
+        center = (int(round(x)), int(round(y)))
+        cv2.circle(image, center, radius, (255, 0, 0), -1)
+        cv2.circle(image, center, radius, (0, 0, 0), 1)
+        cv2.putText(image, str(index + 1), center, cv2.FONT_HERSHEY_SIMPLEX, radius / 10, (0, 255, 255), 1)
+
+
+def render_preview(image, undistortion, source_points, destination_points, width, stage):
+    """Renders the undistortion or homography of a projection at preview resolution
+
+        Args:
+            image: decoded config image
+            undistortion: Undistortion row of the projection
+            source_points: list of normalized (x, y) homography source points
+            destination_points: list of normalized (x, y) homography destination points
+            width: preview width, the height follows the aspect ratio of the image
+            stage: "undistortion" or "homography"
+
+        Returns:
+            rendered preview image, None when the homography points don't define a homography
+    """
+
+    # Scale down before any other step so every step runs at preview resolution
+    height = max(1, round(image.shape[0] * width / image.shape[1]))
+    if width != image.shape[1]:
+        image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+    undistorted = undistort_image(image, undistortion)
+
+    # Undistort the source points the same way the undistort_points endpoint does
+    cam_matrix, dis_coeffs, zoom = undistortion_parameters(undistortion, width, height)
+    undist_cam = optimal_new_camera_matrix(cam_matrix, dis_coeffs, (width, height), zoom)
+    src_pts = np.array(source_points, dtype=np.float64).reshape(-1, 1, 2) * (width, height)
+    if len(src_pts):
+        src_pts = cv2.undistortPoints(
+            src_pts,
+            np.array(cam_matrix, dtype=np.float64).reshape(3, 3),
+            np.array(dis_coeffs, dtype=np.float64).reshape(1, -1),
+            None, None, undist_cam
+        )
+    src_pts = src_pts.reshape(-1, 2)
+
+    if stage == "undistortion":
+        _draw_points(undistorted, src_pts)
+        return undistorted
+
+    dst_pts = np.array(destination_points, dtype=np.float64).reshape(-1, 2) * (width, height)
+    if len(src_pts) < 4 or len(src_pts) != len(dst_pts):
+        return None
+
+    homography, _ = cv2.findHomography(src_pts, dst_pts, cv2.RANSAC, 5.0)
+    if homography is None:
+        return None
+
+    return cv2.warpPerspective(undistorted, homography, (width, height))
+
+
+def encode_preview(image, image_format):
+    """Encodes a rendered preview
+
+        Args:
+            image: rendered preview image
+            image_format: one of the PREVIEW_FORMATS keys
+
+        Returns:
+            encoded image bytes
+    """
+
+    extension, _ = PREVIEW_FORMATS[image_format]
+    success, encoded = cv2.imencode(extension, image)
+    if not success:
+        raise ValueError(f"Preview could not be encoded as {image_format}")
+
+    return encoded.tobytes()
+
+
+def undistortion_values(undistortion):
+    # Return the parameters of an Undistortion row as a plain object that can be sent to a worker process
+    return SimpleNamespace(**{field: getattr(undistortion, field) for field in undistortion_model.keys()})
+
+
+def render_encoded_preview(data, undistortion, source_points, destination_points, width, image_format, stage):
+    """Decodes the config image, renders the preview and encodes it, run in a worker process
+
+        Args:
+            data: encoded config image
+            undistortion: undistortion parameters as returned by undistortion_values
+            source_points, destination_points, stage: see render_preview
+            width: requested preview width, limited to the width of the image
+            image_format: one of the PREVIEW_FORMATS keys
+
+        Returns:
+            encoded preview, None when the homography points don't define a homography
+    """
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    preview = render_preview(image, undistortion, source_points, destination_points, min(width, image.shape[1]), stage)
+    if preview is None:
+        return None
+
+    return encode_preview(preview, image_format)
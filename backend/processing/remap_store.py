@@ -0,0 +1,119 @@
+from data_classes.undistortion import undistortion_model
+from settings import REMAP_CACHE_DIR
+from .undistortion import optimal_new_camera_matrix, undistortion_parameters
+import hashlib
+import tempfile
+import glob
+import os
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+
+def remap_key(undistortion):
+    """Returns the hash of the undistortion parameters used to name the stored remap maps
+
+        Args:
+            undistortion: Undistortion row of a projection
+
+        Returns:
+            hex digest of the parameter values
+    """
+
+    values = tuple(float(getattr(undistortion, field)) for field in undistortion_model.keys())
+    return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()
+
+
+def _map_paths(key, width, height):
+    # Return the file paths of both maps for one parameter hash and resolution
+    prefix = os.path.join(REMAP_CACHE_DIR, f"{key}_{width}x{height}")
+    return prefix + "_map1.npy", prefix + "_map2.npy"
+
+
+def _save_map(path, data):
+    # Write to a temporary file first so other workers never load a half written map
+    with tempfile.NamedTemporaryFile(dir=REMAP_CACHE_DIR, suffix=".npy", delete=False) as tmp:
+        np.save(tmp, data)
+    os.replace(tmp.name, path)
+
+
+def build_remap_maps(undistortion, width, height):
+    """Builds the undistortion maps of a projection in the compact fixed-point format
+
+        Args:
+            undistortion: Undistortion row of a projection
+            width: width of the image in pixels
+            height: height of the image in pixels
+
+        Returns:
+            (map1, map2) with map1 as CV_16SC2 coordinates and map2 as CV_16UC1 interpolation weights
+    """
+
+    cam_matrix, dis_coeffs, zoom = undistortion_parameters(undistortion, width, height)
+    undist_cam = optimal_new_camera_matrix(cam_matrix, dis_coeffs, (width, height), zoom)
+
+    return cv2.initUndistortRectifyMap(
+        np.array(cam_matrix, dtype=np.float64).reshape(3, 3),
+        np.array(dis_coeffs, dtype=np.float64).reshape(1, -1),
+        None, undist_cam, (width, height), cv2.CV_16SC2
+    )
+
+
+def get_remap_maps(undistortion, width, height):
+    """Returns the stored remap maps of the undistortion parameters, building and storing them when missing
+
+        Args:
+            undistortion: Undistortion row of a projection
+            width: width of the image in pixels
+            height: height of the image in pixels
+
+        Returns:
+            (map1, map2) memory-mapped from disk when they were stored before
+    """
+
+    map1_path, map2_path = _map_paths(remap_key(undistortion), width, height)
+
+    try:
+        return np.load(map1_path, mmap_mode="r"), np.load(map2_path, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        pass
+
+    map1, map2 = build_remap_maps(undistortion, width, height)
+
+    os.makedirs(REMAP_CACHE_DIR, exist_ok=True)
+    _save_map(map1_path, map1)
+    _save_map(map2_path, map2)
+
+    return map1, map2
+
+
+def undistort_image(image, undistortion):
+    """Undistorts an image with the stored remap maps of its resolution
+
+        Args:
+            image: image array as read by cv2
+            undistortion: Undistortion row of a projection
+
+        Returns:
+            undistorted image with the same size as the given image
+    """
+
+    height, width = image.shape[:2]
+    map1, map2 = get_remap_maps(undistortion, width, height)
+
+    return cv2.remap(image, map1, map2, cv2.INTER_LINEAR)
+
+
+def invalidate_remap_maps(key):
+    """Removes the stored remap maps of one parameter hash for every resolution
+
+        Args:
+            key: parameter hash as returned by remap_key
+    """
+
+    for path in glob.glob(os.path.join(REMAP_CACHE_DIR, f"{key}_*.npy")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,52 @@
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+# Widths of the downscaled variants of a config image, the full size is the original blob
+PYRAMID_WIDTHS = (256, 640, 1280)
+
+# Encoding of the variants, WebP keeps tiles at a few kilobytes
+PYRAMID_FORMAT = (".webp", "image/webp")
+PYRAMID_QUALITY = 80
+
+
+def variant_path(config_path, width):
+    # Return the blob path of the variant of a config image, stored next to the original
+    return f"{config_path}@{width}{PYRAMID_FORMAT[0]}"
+
+
+def build_pyramid(data):
+    """Builds the downscaled variants of an encoded image
+
+        Every width is made from the previous, larger level, so each level only scales down by a small factor.
+        Widths that aren't smaller than the image are skipped, the original serves those.
+
+        Args:
+            data: encoded image bytes
+
+        Returns:
+            dictionary of width to encoded variant, ordered from large to small
+
+        Raises:
+            ValueError: when the data isn't an image
+    """
+
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Config image could not be decoded")
+
+    variants = {}
+    level = image
+    for width in sorted(PYRAMID_WIDTHS, reverse=True):
+        if width >= image.shape[1]:
+            continue
+
+        height = max(1, round(image.shape[0] * width / image.shape[1]))
+        level = cv2.resize(level, (width, height), interpolation=cv2.INTER_AREA)
+        success, encoded = cv2.imencode(PYRAMID_FORMAT[0], level, [cv2.IMWRITE_WEBP_QUALITY, PYRAMID_QUALITY])
+        if not success:
+            raise ValueError(f"Variant of width {width} could not be encoded")
+        variants[width] = encoded.tobytes()
+
+    return variants
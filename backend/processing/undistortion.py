@@ -0,0 +1,58 @@
+from functools import lru_cache
+from settings import UNDIST_CAM_CACHE_SIZE
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+cv2 = lazy_import("cv2")
+
+
+@lru_cache(maxsize=UNDIST_CAM_CACHE_SIZE)
+def optimal_new_camera_matrix(cam_matrix, dis_coeffs, image_size, zoom):
+    """Returns the cached result of cv2.getOptimalNewCameraMatrix for one parameter tuple
+
+        Args:
+            cam_matrix: tuple of the 9 camera matrix values
+            dis_coeffs: tuple of the distortion coefficients
+            image_size: (width, height) of the image
+            zoom: free scaling parameter (alpha) between 0 and 1
+
+        Returns:
+            read-only 3x3 float64 array of the new camera matrix
+    """
+
+    undist_cam, _ = cv2.getOptimalNewCameraMatrix(
+        np.array(cam_matrix, dtype=np.float64).reshape(3, 3),
+        np.array(dis_coeffs, dtype=np.float64).reshape(1, -1),
+        image_size, zoom, image_size
+    )
+
+    # The same array is handed out to every caller, so it may never be changed in place
+    undist_cam = np.array(undist_cam, dtype=np.float64)
+    undist_cam.flags.writeable = False
+
+    return undist_cam
+
+
+def undistortion_parameters(undistortion, width, height):
+    """Converts the stored undistortion parameters to the cv2 camera matrix and distortion coefficients
+
+        The focal point (x, y) and focal length (w, h) are stored as percentages of the image size,
+        the same way the frontend formats them before calling cv.undistort.
+
+        Args:
+            undistortion: Undistortion row of a projection
+            width: width of the image in pixels
+            height: height of the image in pixels
+
+        Returns:
+            (cam_matrix, dis_coeffs, zoom) with the matrices as tuples so they can be used as cache keys
+    """
+
+    cam_matrix = (
+        undistortion.w / 100 * width, 0.0, undistortion.x / 100 * width,
+        0.0, undistortion.h / 100 * height, undistortion.y / 100 * height,
+        0.0, 0.0, 1.0
+    )
+    dis_coeffs = (undistortion.k1, undistortion.k2, undistortion.p1, undistortion.p2, undistortion.k3)
+
+    return tuple(float(v) for v in cam_matrix), tuple(float(v) for v in dis_coeffs), float(undistortion.zoom)
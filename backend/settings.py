@@ -1,10 +1,46 @@
 # This file contains configuration for environment variables and the secret key
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 DATABASE_URL = os.getenv("CONF_TOOL_DB_URL")
+
+# Connection pool of the database engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 SECRET_KEY = "test-test-test"
+
+# Amount of optimal new camera matrices kept in memory by the undistort_points endpoints
+UNDIST_CAM_CACHE_SIZE = int(os.getenv("UNDIST_CAM_CACHE_SIZE", "256"))
+
+# Folder where the undistortion remap maps of the projections are stored
+REMAP_CACHE_DIR = os.getenv("REMAP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "conf_tool_remap"))
+
+# Amount of encoded projection previews kept in memory
+PREVIEW_CACHE_SIZE = int(os.getenv("PREVIEW_CACHE_SIZE", "128"))
+
+# Amount of threads running background jobs such as deleting large setups
+JOB_THREADS = int(os.getenv("JOB_THREADS", "2"))
+
+# Size of the blocks large camera media is uploaded in and the amount of blocks uploaded at the same time
+UPLOAD_BLOCK_SIZE = int(os.getenv("UPLOAD_BLOCK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# Folder where downloaded blobs are cached, the size of the cache and the largest blob that is cached, in MB
+BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", os.path.join(tempfile.gettempdir(), "conf_tool_blobs"))
+BLOB_CACHE_SIZE_MB = int(os.getenv("BLOB_CACHE_SIZE_MB", "1024"))
+BLOB_CACHE_MAX_ITEM_MB = int(os.getenv("BLOB_CACHE_MAX_ITEM_MB", "64"))
+
+# Amount of worker processes running CPU heavy calibration work and the most jobs that may wait at the same time
+JOB_PROCESSES = int(os.getenv("JOB_PROCESSES", str(min(4, os.cpu_count() or 1))))
+JOB_QUEUE_LIMIT = int(os.getenv("JOB_QUEUE_LIMIT", "32"))
+
+# Days changes are kept in the change feed, clients syncing less often start over with a full download
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "7"))
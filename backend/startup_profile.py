@@ -0,0 +1,73 @@
+# This module reports how long importing the backend takes per module, to find what slows down worker startup
+# Run with: python main.py --profile-startup, or python -m startup_profile --module asgi --top 30
+
+import argparse
+import subprocess
+import sys
+
+# Modules shown by default, sorted by the time they took including their own imports
+DEFAULT_TOP = 25
+
+
+def parse_importtime(output):
+    """Parses the report python -X importtime writes to stderr
+
+        Args:
+            output: stderr of the profiled interpreter
+
+        Returns:
+            list of (module, self microseconds, cumulative microseconds) in import order
+    """
+
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or line.endswith("| imported package"):
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_startup(module="main"):
+    """Imports a module in a fresh interpreter and returns its import times
+
+        A fresh interpreter is used so modules already imported by the caller are measured too.
+
+        Args:
+            module: module to import, e.g. "main" or "asgi"
+
+        Returns:
+            list of (module, self microseconds, cumulative microseconds) in import order
+    """
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def format_report(module, modules, top=DEFAULT_TOP):
+    # Return the total import time and the slowest modules by cumulative and by own time as text
+    total = sum(self_us for _, self_us, _ in modules)
+    lines = [f"Importing {module} took {total / 1000:.1f} ms over {len(modules)} modules", ""]
+
+    for title, key in (("cumulative", 2), ("self", 1)):
+        lines.append(f"Slowest {top} modules by {title} time:")
+        for name, self_us, cumulative_us in sorted(modules, key=lambda entry: entry[key], reverse=True)[:top]:
+            lines.append(f"  {cumulative_us / 1000:9.1f} ms cumulative {self_us / 1000:8.1f} ms self  {name}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the import time of the backend per module")
+    parser.add_argument("--module", default="main", help="module to profile, main (Flask) or asgi")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="amount of modules shown per table")
+    args = parser.parse_args(argv)
+
+    print(format_report(args.module, profile_startup(args.module), args.top))
+
+
+if __name__ == "__main__":
+    main()
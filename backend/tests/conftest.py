@@ -3,7 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 from data_classes.base import Base
 from main import app as flask_app
-import test_session as db_module  # Adjust to your actual import path
+import database.session as db_module
 
 TEST_DATABASE_URL = "sqlite:///:memory:"
 
@@ -36,8 +36,8 @@ def db_session(engine, tables):
 
 @pytest.fixture()
 def client(db_session, monkeypatch):
-    # Patch your app's DB session factory to use the test session
-    monkeypatch.setattr(db_module, "start_session", lambda: db_session)
+    # Patch the session factory of the app so every request uses the test session
+    monkeypatch.setattr(db_module, "SessionLocal", lambda: db_session)
 
     flask_app.config["TESTING"] = True
 
@@ -0,0 +1,153 @@
+import pytest
+import asyncio
+from datetime import datetime, timezone
+from http import HTTPStatus
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+from azure.storage.blob import BlobProperties, ContentSettings
+from sqlalchemy import event, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.testclient import TestClient
+import database.async_session as async_db
+import database.session as db_module
+from data_classes import Base, Setup, Camera
+from processing.blob_cache import blob_cache
+from processing.thumbnails import variant_path
+from database.async_session import enable_aiosqlite_foreign_keys
+
+
+@pytest.fixture()
+def async_client(db_session, monkeypatch):
+    from asgi import app
+
+    # Starting the app fails the jobs a previous run left unfinished, on the session of the test
+    monkeypatch.setattr(db_module, "SessionLocal", lambda: db_session)
+
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    event.listen(engine.sync_engine, "connect", enable_aiosqlite_foreign_keys)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    monkeypatch.setattr(async_db, "AsyncSessionLocal", session_factory)
+
+    with TestClient(app) as client:
+        client.session_factory = session_factory
+        yield client
+
+    asyncio.run(engine.dispose())
+
+
+def create_setup(client):
+    async def create():
+        async with client.session_factory() as session_db:
+            setup = Setup(setup_name="Async Setup")
+            session_db.add(setup)
+            await session_db.flush()
+            session_db.add(Camera(camera_name="Async Camera", setup_id=setup.setup_id, position="Left corner"))
+            await session_db.commit()
+            return setup.setup_id
+
+    # Run on the event loop of the app, which owns the connection of the in-memory database
+    return client.portal.call(create)
+
+
+def test_async_all_config(async_client):
+    setup_id = create_setup(async_client)
+
+    response = async_client.get(f"/api/setup/{setup_id}/all-config", headers={"Origin": "http://localhost:3000"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["cameras"][0]["position"] == "Left corner"
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+    etag = response.headers["etag"]
+    response = async_client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = async_client.get("/api/setup/00000000-0000-0000-0000-000000000000/all-config")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_async_config_img_not_found(async_client):
+    setup_id = create_setup(async_client)
+    response = async_client.get(f"/api/setup/{setup_id}/all-config")
+    camera_id = response.json()["cameras"][0]["id"]
+
+    # The camera has no config image yet, so blob storage isn't asked
+    response = async_client.get(f"/api/camera/{camera_id}/cam_cfg_path")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+class AsyncInMemoryBlob:
+    # Async blob client serving a blob from memory, a blob without data doesn't exist
+    def __init__(self, data=None, etag='"0x1"'):
+        self.data = data
+        self.downloads = 0
+        self.properties = BlobProperties()
+        self.properties.size = len(data) if data is not None else 0
+        self.properties.etag = etag
+        self.properties.last_modified = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.properties.content_settings = ContentSettings(content_type="image/png")
+
+    async def get_blob_properties(self, etag=None, match_condition=None):
+        if self.data is None:
+            raise ResourceNotFoundError()
+        if etag is not None and etag == self.properties.etag:
+            raise ResourceNotModifiedError()
+        return self.properties
+
+    async def download_blob(self, offset, length, etag=None, match_condition=None):
+        self.downloads += 1
+        data = self.data[offset:offset + length]
+
+        class Downloader:
+            async def chunks(self):
+                yield data
+
+        return Downloader()
+
+
+def test_async_config_img(async_client, tmp_path, monkeypatch):
+    import asgi
+
+    monkeypatch.setattr(blob_cache, "directory", str(tmp_path))
+    blob_cache.clear()
+    blobs = {"config/camera": AsyncInMemoryBlob(b"original"),
+             variant_path("config/camera", 256): AsyncInMemoryBlob(b"small", etag='"0x2"')}
+
+    class BlobServiceClient:
+        def get_blob_client(self, container, blob):
+            return blobs.setdefault(blob, AsyncInMemoryBlob())
+
+    monkeypatch.setattr(asgi, "get_blob_service_client", BlobServiceClient)
+
+    setup_id = create_setup(async_client)
+    camera_id = async_client.get(f"/api/setup/{setup_id}/all-config").json()["cameras"][0]["id"]
+
+    async def set_config_img_path():
+        async with async_client.session_factory() as session_db:
+            await session_db.execute(update(Camera).values(config_img_path="config/camera"))
+            await session_db.commit()
+
+    async_client.portal.call(set_config_img_path)
+    url = f"/api/camera/{camera_id}/cam_cfg_path"
+
+    # A size is served from its variant, a size without a variant from the original
+    assert async_client.get(f"{url}?size=256").content == b"small"
+    assert async_client.get(f"{url}?size=640").content == b"original"
+    assert async_client.get(f"{url}?size=300").status_code == HTTPStatus.BAD_REQUEST
+
+    # Views after the first are read from the local blob cache
+    assert async_client.get(url, headers={"Range": "bytes=1-3"}).content == b"rig"
+    assert blobs["config/camera"].downloads == 1
+    assert blob_cache.lookup("config/camera").etag == '"0x1"'
+    blob_cache.clear()
+
+
+def test_flask_routes_are_mounted(async_client):
+    response = async_client.get("/api/metrics/db_pool")
+    assert response.status_code == HTTPStatus.OK
+    assert "checkouts" in response.json()
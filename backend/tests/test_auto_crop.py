@@ -0,0 +1,142 @@
+import uuid
+from http import HTTPStatus
+import numpy as np
+from processing.autocrop import (auto_crop, generate_polygon_with_details, find_smallest_y_value_between_interval,
+                                 find_right_point_closest_to_y_third)
+from processing.crop_planner import plan_crops, MAX_CROPS
+
+# Example outer field points of a camera filming the left side of the pitch (1920x1080)
+LEFT_OUTER_POINTS = [[1764, 166], [1330, 1079], [1255, 1078], [861, 872], [698, 826], [106, 242], [1000, 77]]
+
+
+def create_camera(client, position):
+    response = client.post("/api/setup", json={"setup_name": f"Auto Crop Setup {position}"})
+    setup_id = response.get_json()["setup_id"]
+
+    response = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": "Auto Crop Camera"})
+    camera_id = uuid.UUID(response.get_json()["camera_id"])
+
+    client.patch(f"/api/camera/{camera_id}", json={"resolution_width": 1920, "resolution_height": 1080,
+                                                    "position": position})
+    return camera_id
+
+
+def test_generate_polygon_with_details():
+    detailed_points = generate_polygon_with_details([[0, 0], [10, 0], [10, 10]], 11)
+
+    assert detailed_points.shape == (3 * 11 + 1, 2)
+    assert np.allclose(detailed_points[:11, 0], np.arange(11))
+    assert np.allclose(detailed_points[-1], [0, 0])
+
+
+def test_polygon_extrema_are_exact():
+    triangle = [[0, 10], [10, 0], [20, 10]]
+
+    # The minimum inside the interval lies on an edge, between the vertices
+    assert np.allclose(find_smallest_y_value_between_interval(triangle, 0, 5), [5, 5])
+    assert np.allclose(find_smallest_y_value_between_interval(triangle, 2, 18), [10, 0])
+
+    # Closest to y=5 in the right half of a 20 pixel wide image is the point on the right edge
+    assert np.allclose(find_right_point_closest_to_y_third(triangle, 0, 10, 20), [15, 5])
+
+
+def test_auto_crop_stays_inside_image():
+    crops = auto_crop(LEFT_OUTER_POINTS, 1920, 1080, "left")
+
+    assert len(crops) == 3
+    for (x0, y0), (x1, y1) in crops:
+        assert 0 <= x0 < x1 <= 1920
+        assert 0 <= y0 < y1
+
+
+def test_post_auto_crop(client):
+    camera_id = create_camera(client, "Left corner")
+
+    normalized_points = [{"x": x / 1920, "y": y / 1080} for x, y in LEFT_OUTER_POINTS]
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[], normalized_points])
+
+    response = client.post(f"/api/camera/{camera_id}/auto_crop", json={})
+    assert response.status_code == HTTPStatus.OK
+    crops = response.get_json()
+
+    expected = auto_crop(LEFT_OUTER_POINTS, 1920, 1080, "left")
+    assert len(crops) == len(expected)
+    assert abs(crops[0]["top_left_x"] - expected[0][0][0] / 1920) < 1e-6
+
+    # The crops are saved for the camera
+    response = client.get(f"/api/camera/{camera_id}")
+    assert len(response.get_json()["crops"]) == 3
+
+
+def test_post_auto_crop_invalid(client):
+    camera_id = create_camera(client, "Main stand")
+
+    response = client.post(f"/api/camera/{camera_id}/auto_crop", json={})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post(f"/api/camera/{camera_id}/auto_crop", json={"side": "right"})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.post(f"/api/camera/{uuid.uuid4()}/auto_crop", json={"side": "right"})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_post_auto_crop_small_polygon(client):
+    camera_id = create_camera(client, "Left corner")
+
+    # A small square leaves most crop intervals without any outer field point in them
+    square = [[10, 10], [100, 10], [100, 100], [10, 100]]
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[], [{"x": x / 1920, "y": y / 1080} for x, y in square]])
+
+    for side in ("left", "right"):
+        response = client.post(f"/api/camera/{camera_id}/auto_crop", json={"side": side})
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert "error" in response.get_json()
+
+
+def test_plan_crops():
+    crops, input_pixels, waste = plan_crops(LEFT_OUTER_POINTS, 1920, 1080, 640, max_scale=2.0)
+
+    # Each crop costs a full detector input, and none is scaled down more than allowed
+    assert input_pixels == len(crops) * 640 * 640
+    for (x0, y0), (x1, y1) in crops:
+        assert max(x1 - x0, y1 - y0) / 640 <= 2.0
+
+    # The crops cover the polygon from its most left to its most right point
+    assert crops[0][0][0] <= 106 and crops[-1][1][0] >= 1764
+
+    # A bigger detector input covers the pitch with fewer crops
+    assert len(plan_crops(LEFT_OUTER_POINTS, 1920, 1080, 1280)[0]) < len(crops)
+
+    fixed_crops, _, _ = plan_crops(LEFT_OUTER_POINTS, 1920, 1080, 640, crop_count=3)
+    assert len(fixed_crops) == 3
+
+    assert plan_crops(LEFT_OUTER_POINTS, 1920, 1080, 320, max_scale=1.0)[0] is None
+
+
+def test_post_crop_plan(client):
+    camera_id = create_camera(client, "Left corner")
+    normalized_points = [{"x": x / 1920, "y": y / 1080} for x, y in LEFT_OUTER_POINTS]
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[], normalized_points])
+
+    # Without a detector there is no image size to plan for
+    response = client.post(f"/api/camera/{camera_id}/crop_plan", json={})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    detector_id = client.post("/api/detector").get_json()
+    client.patch(f"/api/detector/{detector_id}", json={"model_name": "yolo", "image_size": 640})
+    setup_id = client.get("/api/setup").get_json()[-1]["setup_id"]
+    client.patch(f"/api/setup/{setup_id}", json={"detector_id": detector_id})
+
+    response = client.post(f"/api/camera/{camera_id}/crop_plan", json={"max_scale": 2.0})
+    assert response.status_code == HTTPStatus.OK
+    plan = response.get_json()
+    assert plan["detector_pixels"] == len(plan["crops"]) * 640 * 640
+
+    response = client.get(f"/api/camera/{camera_id}")
+    assert len(response.get_json()["crops"]) == len(plan["crops"])
+
+    # The search grows with the amount of crops, so it is bounded
+    for body in ({"max_crops": MAX_CROPS + 1}, {"crop_count": 1000000}, {"crop_count": 0}):
+        response = client.post(f"/api/camera/{camera_id}/crop_plan", json=body)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import random
+import uuid
+from http import HTTPStatus
+import httpx
+from sqlalchemy import func, select
+from data_classes import Camera, InnerPoints, PointSet, Projection
+from benchmarks.endpoints import regressions, run_database
+from benchmarks.load import Editor, Recorder
+from benchmarks.venue import generate_venue, Venue
+
+
+def test_generate_venue(db_session):
+    venue = generate_venue(db_session, cameras=3, projections=2, pitch_points=50, crops=4)
+
+    assert len(venue.camera_ids) == 3
+    assert all(len(projection_ids) == 2 for projection_ids in venue.projection_ids.values())
+    assert db_session.scalar(select(func.count()).select_from(Camera).where(Camera.setup_id == venue.setup_id)) == 3
+    assert db_session.scalar(select(func.count()).select_from(Projection)
+                             .where(Projection.camera_id.in_(venue.camera_ids))) == 6
+    assert db_session.scalar(select(func.count()).select_from(InnerPoints)
+                             .where(InnerPoints.camera_id == venue.camera_ids[0])) == 50
+    assert db_session.scalar(select(PointSet.count).where(PointSet.camera_id == venue.camera_ids[0],
+                                                          PointSet.kind == "inner")) == 50
+
+
+def test_endpoint_benchmark(tmp_path):
+    args = argparse.Namespace(cameras=2, projections=2, pitch_points=20, crops=2, requests=3)
+    results = run_database(f"sqlite:///{tmp_path / 'benchmark.db'}", args)
+
+    assert set(results) == {"all-config", "all-config rebuilt", "camera GET", "homography PUT", "pitch PUT",
+                            "crop PUT", "undistort_points"}
+    assert results["undistort_points"]["statements"] == 0
+    assert results["all-config"]["statements"] < results["all-config rebuilt"]["statements"]
+    assert all(measured["p95_ms"] >= measured["p50_ms"] > 0 for measured in results.values())
+
+    # One more statement is a regression, latency within the tolerance isn't
+    slower = {case: dict(measured) for case, measured in results.items()}
+    slower["pitch PUT"]["statements"] += 1
+    slower["crop PUT"]["p95_ms"] *= 1.1
+    assert regressions({"sqlite": slower}, {"sqlite": results}, 0.25) == [
+        f"sqlite pitch PUT: {results['pitch PUT']['statements']} -> {slower['pitch PUT']['statements']} statements"
+    ]
+
+
+def test_load_editor_actions():
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        return httpx.Response(HTTPStatus.INTERNAL_SERVER_ERROR if "undistortion" in request.url.path else HTTPStatus.OK)
+
+    venue = Venue(uuid.uuid4(), [uuid.uuid4()], {})
+    venue.projection_ids[venue.camera_ids[0]] = [uuid.uuid4()]
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://test") as client:
+            editor = Editor(client, recorder, venue, random.Random(0), images=False)
+            await editor.homography_drag()
+            await editor.slider_sweep()
+
+    recorder = Recorder(0)
+    asyncio.run(scenario())
+
+    # Every drag step undistorts the points and stores the homography, failed requests count as errors
+    drag_steps = len(recorder.latencies["homography PUT"])
+    assert 10 <= drag_steps <= 40
+    assert requests[:2] == [("POST", "/api/undistort_points"),
+                            ("PUT", f"/api/projection/{venue.projection_ids[venue.camera_ids[0]][0]}/homography")]
+    assert set(recorder.errors) == {"undistortion PUT"}
+
+    summary = recorder.summary(1.0, {"homography PUT", "undistortion PUT"})
+    assert summary["requests"] == drag_steps + recorder.errors["undistortion PUT"]
+    assert summary["error_rate"] == round(recorder.errors["undistortion PUT"] / summary["requests"], 4)
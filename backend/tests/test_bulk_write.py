@@ -0,0 +1,115 @@
+from http import HTTPStatus
+from contextlib import contextmanager
+import math
+from sqlalchemy import event
+from data_classes import Setup, Camera, OuterPoints, Crop
+from database.bulk_write import write_indexed_points, write_crops
+
+CROP_FIELDS = ["top_left_x", "top_left_y", "bottom_right_x", "bottom_right_y"]
+
+
+@contextmanager
+def count_queries(engine):
+    # Count the statements sent to the database inside the with block
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_camera(db_session):
+    setup = Setup(setup_name="Bulk Write Setup")
+    db_session.add(setup)
+    db_session.flush()
+    camera = Camera(camera_name="Bulk Write Camera", setup_id=setup.setup_id)
+    db_session.add(camera)
+    db_session.flush()
+    return camera
+
+
+def stored_points(db_session, camera):
+    points = db_session.query(OuterPoints).filter_by(camera_id=camera.camera_id).order_by(OuterPoints.index)
+    return [(point.index, point.x, point.y) for point in points]
+
+
+def test_write_indexed_points_statements(db_session, engine):
+    camera = create_camera(db_session)
+    points = [{"x": 0.5 + 0.4 * math.cos(i / 32), "y": 0.5 + 0.4 * math.sin(i / 32)} for i in range(200)]
+
+    # Select the stored points, insert all 200 in one executemany, store the packed point set
+    # (an update finding nothing and an insert), bump the config version and add the change to the feed
+    with count_queries(engine) as statements:
+        assert write_indexed_points(db_session, OuterPoints, camera, points) == 200
+    assert len(statements) == 6
+
+    # Unchanged points only cost the select
+    with count_queries(engine) as statements:
+        assert write_indexed_points(db_session, OuterPoints, camera, points) == 0
+    assert len(statements) == 1
+
+    # Moved points are updated in one executemany, removed points deleted in one statement
+    moved = [dict(point) for point in points[:150]]
+    moved[3]["x"] = 0.0
+    moved[7]["y"] = 1.0
+    with count_queries(engine) as statements:
+        assert write_indexed_points(db_session, OuterPoints, camera, moved) == 50 + 2
+    assert len(statements) == 6
+
+    stored = stored_points(db_session, camera)
+    assert len(stored) == 150
+    assert stored[3] == (4, 0.0, moved[3]["y"])
+    assert [index for index, x, y in stored] == list(range(1, 151))
+
+
+def test_write_crops(db_session):
+    camera = create_camera(db_session)
+    crops = [dict(zip(CROP_FIELDS, values)) for values in ([0, 0, 0.5, 0.5], [0.5, 0, 1, 0.5], [0, 0.5, 1, 1])]
+
+    assert write_crops(db_session, Crop, camera, crops, CROP_FIELDS) == 3
+    assert write_crops(db_session, Crop, camera, crops, CROP_FIELDS) == 0
+    # Crops keep the order they are sent in, reversing them rewrites the first and last one
+    assert write_crops(db_session, Crop, camera, crops[::-1], CROP_FIELDS) == 2
+    # One changed crop is updated in place, one removed crop deleted
+    assert write_crops(db_session, Crop, camera, [crops[2], dict(crops[1], top_left_y=0.1)], CROP_FIELDS) == 2
+
+    stored = [tuple(getattr(crop, field) for field in CROP_FIELDS)
+              for crop in db_session.query(Crop).filter_by(camera_id=camera.camera_id).order_by(Crop.index)]
+    assert stored == [(0, 0.5, 1, 1), (0.5, 0.1, 1, 0.5)]
+
+
+def test_put_reordered_crops(client):
+    setup_id = client.post("/api/setup", json={"setup_name": "Crop Order Setup"}).get_json()["setup_id"]
+    camera_id = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": "Crop Camera"}).get_json()["camera_id"]
+    crops = [dict(zip(CROP_FIELDS, values)) for values in ([0, 0, 0.5, 0.5], [0.5, 0, 1, 0.5], [0, 0.5, 1, 1])]
+    client.put(f"/api/camera/{camera_id}/crop", json=crops)
+
+    client.put(f"/api/camera/{camera_id}/crop", json=crops[::-1])
+    assert client.get(f"/api/camera/{camera_id}").get_json()["crops"] == crops[::-1]
+    all_config = client.get(f"/api/setup/{setup_id}/all-config").get_json()
+    assert all_config["cameras"][0]["cropping"]["crops_xyxy"] == [
+        [[crop["top_left_x"], crop["top_left_y"]], [crop["bottom_right_x"], crop["bottom_right_y"]]] for crop in crops[::-1]
+    ]
+
+
+def test_put_pitch_reports_changed_rows(client):
+    setup_id = client.post("/api/setup", json={"setup_name": "Pitch Setup"}).get_json()["setup_id"]
+    camera_id = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": "Pitch Camera"}).get_json()["camera_id"]
+    data = [[{"x": 0.1, "y": 0.1}], [{"x": 0.2, "y": 0.2}, {"x": 0.3, "y": 0.3}, {"x": 0.4, "y": 0.4}]]
+
+    response = client.put(f"/api/camera/{camera_id}/pitch", json=data)
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()["changed_rows"] == 4
+
+    data[1][1] = {"x": 0.35, "y": 0.3}
+    response = client.put(f"/api/camera/{camera_id}/pitch", json=data)
+    assert response.get_json()["changed_rows"] == 1
+
+    response = client.put(f"/api/camera/{camera_id}/crop", json=[dict(zip(CROP_FIELDS, [0, 0, 1, 1]))])
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()["changed_rows"] == 1
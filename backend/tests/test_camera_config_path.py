@@ -0,0 +1,309 @@
+import itertools
+import pytest
+import numpy as np
+import cv2
+from datetime import datetime, timezone
+from http import HTTPStatus
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError, ResourceNotModifiedError
+from azure.storage.blob import BlobProperties, ContentSettings
+from data_classes import Setup, Camera
+import api.api_camera_config_path as cfg_path_module
+from processing.blob_cache import BlobCache, blob_cache
+from processing.thumbnails import build_pyramid, variant_path
+
+IMAGE = bytes(range(256)) * 40
+
+# Every replaced blob gets a new ETag
+ETAGS = itertools.count(1)
+
+
+class InMemoryBlob:
+    # Blob client serving a blob from memory, downloads are split in chunks like the storage client does
+    def __init__(self, data, content_type=None, chunk_size=1000):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.downloads = []
+        self.properties_requests = 0
+        self.properties = BlobProperties()
+        self.properties.size = len(data)
+        self.properties.etag = '"0x8DC0FFEE"'
+        self.properties.last_modified = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.properties.content_settings = ContentSettings(content_type=content_type)
+
+    def get_blob_properties(self, etag=None, match_condition=None):
+        # A conditional request on the current ETag is answered with 304
+        self.properties_requests += 1
+        if etag is not None and etag == self.properties.etag:
+            raise ResourceNotModifiedError()
+        return self.properties
+
+    def replace(self, data):
+        self.data = data
+        self.properties.size = len(data)
+        self.properties.etag = f'"0x{next(ETAGS):08X}"'
+
+    def upload_blob(self, data, overwrite, content_settings, metadata=None):
+        self.replace(data)
+        self.properties.content_settings = content_settings
+        self.properties.metadata = metadata or {}
+
+    def download_blob(self, offset=0, length=None, etag=None, match_condition=None):
+        assert etag == self.properties.etag
+        length = self.properties.size - offset if length is None else length
+        self.downloads.append((offset, length))
+        data = self.data[offset:offset + length]
+        blob = self
+
+        class Downloader:
+            def chunks(self):
+                for start in range(0, len(data), blob.chunk_size):
+                    yield data[start:start + blob.chunk_size]
+
+        return Downloader()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Cache the downloaded blobs of every test in its own folder
+    monkeypatch.setattr(blob_cache, "directory", str(tmp_path))
+    blob_cache.clear()
+    blob_cache.reset_counters()
+    yield
+    blob_cache.clear()
+
+
+@pytest.fixture()
+def camera(db_session):
+    setup = Setup(setup_name="Config Image Setup")
+    db_session.add(setup)
+    db_session.flush()
+    camera = Camera(camera_name="Config Image Camera", setup_id=setup.setup_id, config_img_path="config/camera")
+    db_session.add(camera)
+    db_session.commit()
+    return camera
+
+
+@pytest.fixture()
+def blob(monkeypatch):
+    blob = InMemoryBlob(IMAGE)
+    monkeypatch.setattr(cfg_path_module, "get_config_blob_client", lambda config_path: blob)
+    return blob
+
+
+def test_get_whole_image(client, camera, blob):
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path")
+    assert response.status_code == HTTPStatus.OK
+    assert response.data == IMAGE
+    assert response.headers["Content-Length"] == str(len(IMAGE))
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.mimetype == "image/png"
+    assert response.get_etag() == ("0x8DC0FFEE", False)
+    assert blob.downloads == [(0, len(IMAGE))]
+
+
+def test_get_image_range(client, camera, blob):
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path", headers={"Range": "bytes=100-2099"})
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert response.data == IMAGE[100:2100]
+    assert response.headers["Content-Range"] == f"bytes 100-2099/{len(IMAGE)}"
+    assert response.headers["Content-Length"] == "2000"
+    assert blob.downloads == [(100, 2000)]
+
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path", headers={"Range": "bytes=-10"})
+    assert response.status_code == HTTPStatus.PARTIAL_CONTENT
+    assert response.data == IMAGE[-10:]
+
+
+def test_get_image_range_not_satisfiable(client, camera, blob):
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path",
+                          headers={"Range": f"bytes={len(IMAGE)}-"})
+    assert response.status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response.headers["Content-Range"] == f"bytes */{len(IMAGE)}"
+    assert blob.downloads == []
+
+
+def test_get_image_conditional(client, camera, blob):
+    url = f"/api/camera/{camera.camera_id}/cam_cfg_path"
+    response = client.get(url, headers={"If-None-Match": '"0x8DC0FFEE"'})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert blob.downloads == []
+
+    # A range of an older version of the blob gets the whole current blob
+    response = client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"0xOLD"'})
+    assert response.status_code == HTTPStatus.OK
+    assert response.data == IMAGE
+
+
+def test_get_image_content_type(client, camera, monkeypatch):
+    blob = InMemoryBlob(b"\x00" * 10, content_type="video/mp4")
+    monkeypatch.setattr(cfg_path_module, "get_config_blob_client", lambda config_path: blob)
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path")
+    assert response.mimetype == "video/mp4"
+
+
+def test_get_image_without_path(client, db_session, camera, blob):
+    camera.config_img_path = ""
+    db_session.commit()
+    response = client.get(f"/api/camera/{camera.camera_id}/cam_cfg_path")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_image_from_cache(client, camera, blob):
+    url = f"/api/camera/{camera.camera_id}/cam_cfg_path"
+    assert client.get(url).data == IMAGE
+
+    # The second view only revalidates the ETag, the image is read from local disk
+    response = client.get(url)
+    assert response.data == IMAGE
+    assert response.get_etag() == ("0x8DC0FFEE", False)
+    assert client.get(url, headers={"Range": "bytes=10-19"}).data == IMAGE[10:20]
+    assert blob.downloads == [(0, len(IMAGE))]
+    assert blob_cache.snapshot()["hits"] == 2 and blob_cache.snapshot()["misses"] == 1
+
+    # A replaced blob is downloaded again and replaces the cached version
+    blob.replace(IMAGE[::-1])
+    assert client.get(url).data == IMAGE[::-1]
+    assert client.get(url).data == IMAGE[::-1]
+    assert len(blob.downloads) == 2
+    assert blob_cache.snapshot()["blobs"] == 1
+
+    metrics = client.get("/api/metrics/blob_cache").get_json()
+    assert metrics["hits"] == 3 and metrics["misses"] == 2
+
+
+def test_blob_cache_eviction(tmp_path, monkeypatch):
+    blobs = {path: InMemoryBlob(IMAGE) for path in ("a", "b", "c")}
+    monkeypatch.setattr(cfg_path_module, "get_config_blob_client", lambda config_path: blobs[config_path])
+    monkeypatch.setattr(blob_cache, "max_bytes", 2 * len(IMAGE))
+
+    # a is used again before c is added, so b is the least recently used blob
+    for path in ("a", "b", "a", "c"):
+        assert cfg_path_module.download_config_img(path) == IMAGE
+
+    assert blob_cache.lookup("b") is None
+    assert blob_cache.lookup("a") is not None and blob_cache.lookup("c") is not None
+    assert blob_cache.snapshot()["evictions"] == 1
+    assert blob_cache.snapshot()["size_bytes"] == 2 * len(IMAGE)
+
+    # The cached blobs are found again after a restart
+    restarted = BlobCache(str(tmp_path), 2 * len(IMAGE), len(IMAGE))
+    assert restarted.lookup("c").properties().etag == blobs["c"].properties.etag
+    assert restarted.snapshot()["blobs"] == 2
+
+
+def test_blob_cache_skips_large_blobs(monkeypatch):
+    blob = InMemoryBlob(IMAGE)
+    monkeypatch.setattr(cfg_path_module, "get_config_blob_client", lambda config_path: blob)
+    monkeypatch.setattr(blob_cache, "max_item_bytes", len(IMAGE) - 1)
+
+    assert cfg_path_module.download_config_img("clip") == IMAGE
+    assert blob_cache.lookup("clip") is None
+
+
+@pytest.fixture()
+def container(monkeypatch):
+    # Blobs by path, getting the client of a missing blob creates an empty one like the storage client does
+    blobs = {}
+
+    class MissingBlob(InMemoryBlob):
+        def get_blob_properties(self, etag=None, match_condition=None):
+            if not self.exists:
+                raise ResourceNotFoundError()
+            return super().get_blob_properties(etag, match_condition)
+
+        def upload_blob(self, data, overwrite, content_settings, metadata=None):
+            self.exists = True
+            super().upload_blob(data, overwrite, content_settings, metadata)
+
+        def delete_blob(self, etag=None, match_condition=None):
+            if not self.exists:
+                raise ResourceNotFoundError()
+            if etag is not None and etag != self.properties.etag:
+                raise ResourceModifiedError()
+            self.exists = False
+
+    def get_blob(path):
+        if path not in blobs:
+            blobs[path] = MissingBlob(b"")
+            blobs[path].exists = False
+        return blobs[path]
+
+    monkeypatch.setattr(cfg_path_module, "get_config_blob_client", get_blob)
+    return get_blob
+
+
+def test_build_pyramid():
+    image = np.random.default_rng(0).integers(0, 255, (720, 1000, 3), dtype=np.uint8)
+    variants = build_pyramid(cv2.imencode(".png", image)[1].tobytes())
+
+    # 1280 isn't smaller than the image, the original serves that size
+    assert list(variants) == [640, 256]
+    assert cv2.imdecode(np.frombuffer(variants[256], dtype=np.uint8), cv2.IMREAD_COLOR).shape == (184, 256, 3)
+
+    with pytest.raises(ValueError):
+        build_pyramid(b"not an image")
+
+
+def test_get_image_variant(client, camera, container, monkeypatch):
+    image = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    original = cv2.imencode(".png", image)[1].tobytes()
+    container("config/camera").upload_blob(original, overwrite=True, content_settings=ContentSettings("image/png"))
+    url = f"/api/camera/{camera.camera_id}/cam_cfg_path"
+
+    # Until the variants are made the original is sent
+    response = client.get(f"{url}?size=256")
+    assert response.status_code == HTTPStatus.OK and response.data == original
+
+    # The image is decoded and resized in a worker process
+    calls = []
+    run_in_process = cfg_path_module.run_in_process
+    monkeypatch.setattr(cfg_path_module, "run_in_process",
+                        lambda function, *args: calls.append(function) or run_in_process(function, *args))
+    result = cfg_path_module.build_config_img_variants(None, "config/camera")
+    assert result["widths"] == [256, 640]
+    assert calls == [cfg_path_module.build_pyramid]
+
+    response = client.get(f"{url}?size=256")
+    assert response.mimetype == "image/webp"
+    assert len(response.data) < len(original) // 10
+    assert response.data == container(variant_path("config/camera", 256)).data
+
+    # Sizes the image doesn't have a variant for, or unknown sizes
+    assert client.get(f"{url}?size=1280").data == original
+    assert client.get(f"{url}?size=300").status_code == HTTPStatus.BAD_REQUEST
+
+    # Replacing the image removes the variants of the old one
+    cfg_path_module.delete_config_img_variants("config/camera")
+    assert client.get(f"{url}?size=256").data == original
+
+
+def test_build_variants_of_replaced_image(container, monkeypatch):
+    images = [cv2.imencode(".png", np.full((720, 1280, 3), value, dtype=np.uint8))[1].tobytes() for value in (0, 255)]
+    original = container("config/camera")
+    original.upload_blob(images[0], overwrite=True, content_settings=ContentSettings("image/png"))
+    build = cfg_path_module.build_pyramid
+
+    # The replacing build below can't be sent to a worker process, so it runs in the job thread
+    monkeypatch.setattr(cfg_path_module, "run_in_process", lambda function, *args: function(*args))
+
+    # The image is replaced and the job of the new image finishes while the first job still builds its variants
+    def build_while_replaced(data):
+        variants = build(data)
+        monkeypatch.setattr(cfg_path_module, "build_pyramid", build)
+        original.upload_blob(images[1], overwrite=True, content_settings=ContentSettings("image/png"))
+        assert cfg_path_module.build_config_img_variants(None, "config/camera")["widths"] == [256, 640]
+        return variants
+
+    monkeypatch.setattr(cfg_path_module, "build_pyramid", build_while_replaced)
+    assert cfg_path_module.build_config_img_variants(None, "config/camera")["widths"] == []
+
+    # The stale job leaves the variants of the new image alone
+    variant = container(variant_path("config/camera", 256))
+    assert variant.exists and variant.data == build(images[1])[256]
+    assert variant.properties.metadata == {cfg_path_module.VARIANT_SOURCE_METADATA: original.properties.etag}
+
+    # Removing the variants of an old original keeps the ones of the current one
+    cfg_path_module.delete_config_img_variants("config/camera", '"0xOLD"')
+    assert variant.exists
+    cfg_path_module.delete_config_img_variants("config/camera", original.properties.etag)
+    assert not variant.exists
@@ -0,0 +1,162 @@
+import pytest
+import socket
+from http import HTTPStatus
+from urllib.parse import urlparse
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobBlock
+from data_classes import Setup, Camera, Upload
+import api.api_camera_upload as upload_module
+import api.api_camera_config_path as cfg_path_module
+
+BLOCK_SIZE = 1024
+MEDIA = bytes(range(256)) * 10
+
+
+class InMemoryBlockBlob:
+    # Block blob in memory, staged blocks only become the content of the blob when they are committed
+    def __init__(self):
+        self.uncommitted = {}
+        self.content = None
+        self.content_type = None
+
+    def stage_block(self, block_id, data, length):
+        self.uncommitted[block_id] = data.read(length)
+
+    def get_block_list(self, block_list_type):
+        # Like blob storage, a blob without content or staged blocks doesn't exist yet
+        if self.content is None and not self.uncommitted:
+            raise ResourceNotFoundError()
+        return [], [BlobBlock(block_id) for block_id in self.uncommitted]
+
+    def commit_block_list(self, blocks, content_settings):
+        self.content = b"".join(self.uncommitted[block.id] for block in blocks)
+        self.content_type = content_settings.content_type
+        self.uncommitted = {}
+
+    def delete_blob(self):
+        if self.content is None:
+            raise ResourceNotFoundError()
+        self.content = None
+
+
+def azurite_running():
+    # Return whether the blob endpoint of the connection string accepts connections, e.g. the Azurite container
+    endpoint = urlparse(cfg_path_module.get_blob_service_client().url)
+    try:
+        socket.create_connection((endpoint.hostname, endpoint.port or 443), timeout=0.5).close()
+        return True
+    except OSError:
+        return False
+
+
+@pytest.fixture(params=["memory", "azurite"])
+def blob(request, monkeypatch):
+    # The protocol runs against a block blob in memory and, when it runs, against Azurite from docker-compose.yml
+    monkeypatch.setattr(upload_module, "UPLOAD_BLOCK_SIZE", BLOCK_SIZE)
+    monkeypatch.setattr(upload_module, "ensure_container", lambda: None)
+
+    if request.param == "memory":
+        blobs = {}
+        for module in (upload_module, cfg_path_module):
+            monkeypatch.setattr(module, "get_config_blob_client",
+                                lambda config_path: blobs.setdefault(config_path, InMemoryBlockBlob()))
+        blob = blobs.setdefault("upload_test_setup/upload_test_camera", InMemoryBlockBlob())
+        return lambda: (blob.content, blob.content_type)
+
+    if not azurite_running():
+        pytest.skip("Azurite isn't running")
+
+    cfg_path_module.ensure_container()
+    blob_client = cfg_path_module.get_config_blob_client("upload_test_setup/upload_test_camera")
+    if blob_client.exists():
+        blob_client.delete_blob()
+    request.addfinalizer(lambda: blob_client.delete_blob() if blob_client.exists() else None)
+
+    def content():
+        return blob_client.download_blob().readall(), blob_client.get_blob_properties().content_settings.content_type
+
+    return content
+
+
+@pytest.fixture()
+def camera_id(db_session):
+    setup = Setup(setup_name="Upload Test Setup")
+    db_session.add(setup)
+    db_session.flush()
+    camera = Camera(camera_name="Upload Test Camera", setup_id=setup.setup_id)
+    db_session.add(camera)
+    db_session.commit()
+    return camera.camera_id
+
+
+def start_upload(client, camera_id, size=len(MEDIA)):
+    return client.post(f"/api/camera/{camera_id}/upload", json={
+        "setup": "Upload Test Setup", "camera": "Upload Test Camera", "size": size, "content_type": "video/mp4"
+    })
+
+
+def put_block(client, upload_id, index):
+    return client.put(f"/api/upload/{upload_id}/block/{index}", data=MEDIA[index * BLOCK_SIZE:(index + 1) * BLOCK_SIZE])
+
+
+def test_upload_in_blocks(client, db_session, camera_id, blob):
+    response = start_upload(client, camera_id)
+    assert response.status_code == HTTPStatus.CREATED
+    upload = response.get_json()
+    assert upload["block_count"] == 3 and upload["block_size"] == BLOCK_SIZE and upload["staged_blocks"] == []
+
+    # Blocks can arrive in any order
+    for index in (2, 0, 1):
+        assert put_block(client, upload["upload_id"], index).status_code == HTTPStatus.OK
+
+    response = client.post(f"/api/upload/{upload['upload_id']}/commit")
+    assert response.status_code == HTTPStatus.OK
+    assert blob() == (MEDIA, "video/mp4")
+
+    assert db_session.get(Camera, camera_id).config_img_path == "upload_test_setup/upload_test_camera"
+    assert db_session.query(Upload).count() == 0
+
+
+def test_resume_upload(client, camera_id, blob):
+    upload_id = start_upload(client, camera_id).get_json()["upload_id"]
+    put_block(client, upload_id, 0)
+    put_block(client, upload_id, 2)
+
+    # Committing before every block is stored fails, the state tells the client which blocks to send again
+    response = client.post(f"/api/upload/{upload_id}/commit")
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.get_json()["missing_blocks"] == [1]
+
+    assert client.get(f"/api/upload/{upload_id}").get_json()["staged_blocks"] == [0, 2]
+
+    # Sending a block again replaces it
+    put_block(client, upload_id, 2)
+    put_block(client, upload_id, 1)
+    assert client.post(f"/api/upload/{upload_id}/commit").status_code == HTTPStatus.OK
+    assert blob()[0] == MEDIA
+
+
+def test_upload_without_blocks(client, camera_id, blob):
+    upload_id = start_upload(client, camera_id).get_json()["upload_id"]
+
+    # The blob doesn't exist before the first block is stored
+    response = client.get(f"/api/upload/{upload_id}")
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()["staged_blocks"] == []
+
+    response = client.post(f"/api/upload/{upload_id}/commit")
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.get_json()["missing_blocks"] == [0, 1, 2]
+
+
+def test_upload_block_validation(client, camera_id, blob):
+    upload_id = start_upload(client, camera_id).get_json()["upload_id"]
+
+    response = client.put(f"/api/upload/{upload_id}/block/0", data=MEDIA[:10])
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    assert put_block(client, upload_id, 3).status_code == HTTPStatus.NOT_FOUND
+    assert start_upload(client, camera_id, size=0).status_code == HTTPStatus.BAD_REQUEST
+
+    assert client.delete(f"/api/upload/{upload_id}").status_code == HTTPStatus.OK
+    assert client.get(f"/api/upload/{upload_id}").status_code == HTTPStatus.NOT_FOUND
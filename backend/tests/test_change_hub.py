@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+import pytest
+from http import HTTPStatus
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from data_classes import Base
+from events.change_hub import ChangeHub, format_event
+from main import app as flask_app
+import database.async_session as async_db
+import database.session as db_module
+from tests.test_asgi import async_client  # noqa: F401, fixture
+
+
+@pytest.fixture()
+def shared_db(tmp_path, monkeypatch):
+    # Flask requests write through the sync engine and the hub reads through the async engine, both on one file
+    path = tmp_path / "events.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(db_module, "SessionLocal", sessionmaker(bind=engine))
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    monkeypatch.setattr(async_db, "AsyncSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+
+    # Without a with block the client keeps no request context, the requests are sent from other threads
+    client = flask_app.test_client()
+    setup_id = client.post("/api/setup", json={"setup_name": "Event Setup"}).get_json()["setup_id"]
+    camera_id = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": "Event Camera"}).get_json()
+    yield client, uuid.UUID(setup_id), camera_id["camera_id"]
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def put_pitch(client, camera_id, x):
+    return client.put(f"/api/camera/{camera_id}/pitch", json=[[{"x": x, "y": 0.5}], []])
+
+
+def test_hub_pushes_changes(shared_db):
+    client, setup_id, camera_id = shared_db
+
+    async def scenario():
+        hub = ChangeHub(poll_interval=0.05)
+        queue = await hub.subscribe(setup_id)
+        other_setup = await hub.subscribe(uuid.uuid4())
+
+        await asyncio.to_thread(put_pitch, client, camera_id, 0.1)
+        await asyncio.to_thread(client.patch, f"/api/camera/{camera_id}", json={"position": "Left corner"})
+        events = [await asyncio.wait_for(queue.get(), timeout=5) for _ in range(2)]
+
+        assert other_setup.empty()
+        await hub.close()
+        return events
+
+    events = {data["entity"]: (event, data) for event, data, seq in asyncio.run(scenario())}
+    assert events["inner_points"] == ("change", {"camera_id": camera_id, "entity": "inner_points", "op": "update",
+                                                 "values": [{"x": 0.1, "y": 0.5}]})
+    assert events["cameras"][1]["values"]["position"] == "Left corner"
+
+
+def test_hub_coalesces_changes(shared_db):
+    client, setup_id, camera_id = shared_db
+
+    async def scenario():
+        # Only an explicit wake reads the feed, so every drag step is read together
+        hub = ChangeHub(poll_interval=60)
+        queue = await hub.subscribe(setup_id)
+        for x in (0.1, 0.2, 0.3):
+            await asyncio.to_thread(put_pitch, client, camera_id, x)
+
+        hub.wake()
+        event = await asyncio.wait_for(queue.get(), timeout=5)
+        await asyncio.sleep(0.1)
+        assert queue.empty()
+        await hub.close()
+        return event
+
+    event, data, seq = asyncio.run(scenario())
+    assert data["values"] == [{"x": 0.3, "y": 0.5}]
+
+
+def test_slow_subscriber_reloads(shared_db):
+    client, setup_id, camera_id = shared_db
+
+    async def scenario():
+        hub = ChangeHub(poll_interval=60, queue_size=1)
+        queue = await hub.subscribe(setup_id)
+        await asyncio.to_thread(put_pitch, client, camera_id, 0.1)
+        await asyncio.to_thread(client.patch, f"/api/camera/{camera_id}", json={"position": "Left corner"})
+
+        hub.wake()
+        event = await asyncio.wait_for(queue.get(), timeout=5)
+        await hub.close()
+        return event
+
+    assert asyncio.run(scenario())[0] == "reload"
+
+
+def test_concurrent_subscribers_share_a_task(shared_db):
+    client, setup_id, camera_id = shared_db
+
+    async def scenario():
+        hub = ChangeHub(poll_interval=60)
+        queues = await asyncio.gather(*(hub.subscribe(setup_id) for _ in range(3)))
+        readers = [task for task in asyncio.all_tasks() if task.get_coro().__qualname__ == "ChangeHub._run"]
+
+        await asyncio.to_thread(put_pitch, client, camera_id, 0.1)
+        hub.wake()
+        events = [await asyncio.wait_for(queue.get(), timeout=5) for queue in queues]
+        await hub.close()
+        return readers, events
+
+    readers, events = asyncio.run(scenario())
+    assert len(readers) == 1
+    assert [event[1]["entity"] for event in events] == ["inner_points"] * 3
+
+
+def test_format_event():
+    assert format_event("change", {"op": "update"}, 7) == 'id: 7\nevent: change\ndata: {"op": "update"}\n\n'
+
+
+def test_setup_events_not_found(async_client):  # noqa: F811
+    response = async_client.get(f"/api/setup/{uuid.uuid4()}/events")
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,141 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from http import HTTPStatus
+import pytest
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import sessionmaker
+from data_classes import Base, Change, Projection, Setup
+from database.change_feed import read_changes, trim_changes
+
+HOMOGRAPHY_POINTS = [
+    {str(index): {"x": 10 * index, "y": 20 * index} for index in range(1, 5)},
+    {str(index): {"x": 30 * index, "y": 40 * index} for index in range(1, 5)}
+]
+
+
+def read_feed(client, since):
+    response = client.get(f"/api/changes?since={since}")
+    assert response.status_code == HTTPStatus.OK
+    return response.get_json()
+
+
+def entities(feed):
+    return {(change["camera_id"] is not None, change["entity"], change["op"]) for change in feed["changes"]}
+
+
+def test_change_feed(client, db_session):
+    since = read_feed(client, 0)["last_seq"]
+
+    setup_id = client.post("/api/setup", json={"setup_name": "Change Feed Setup"}).get_json()["setup_id"]
+    camera_id = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": "Changes"}).get_json()["camera_id"]
+
+    feed = read_feed(client, since)
+    assert {change["setup_id"] for change in feed["changes"]} == {setup_id}
+    assert {(False, "setups", "insert"), (True, "cameras", "insert"), (True, "projections", "insert"),
+            (True, "source_points", "insert")} <= entities(feed)
+    since = feed["last_seq"]
+    projection_id = db_session.query(Projection).filter_by(camera_id=uuid.UUID(camera_id)).one().projection_id
+
+    # Writes through the ORM and through the bulk statements both land in the feed, with the camera they belong to
+    client.put(f"/api/projection/{projection_id}/homography", json=HOMOGRAPHY_POINTS)
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[{"x": 0.1, "y": 0.2}], []])
+    client.patch(f"/api/camera/{camera_id}", json={"position": "Left corner"})
+
+    feed = read_feed(client, since)
+    assert {change["camera_id"] for change in feed["changes"]} == {camera_id}
+    assert entities(feed) == {(True, "source_points", "update"), (True, "destination_points", "update"),
+                              (True, "inner_points", "update"), (True, "cameras", "update")}
+    since = feed["last_seq"]
+
+    # Writing the same values again changes nothing
+    client.put(f"/api/projection/{projection_id}/homography", json=HOMOGRAPHY_POINTS)
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[{"x": 0.1, "y": 0.2}], []])
+    assert read_feed(client, since) == {"changes": [], "last_seq": since, "has_more": False}
+
+    client.delete(f"/api/setup/{setup_id}")
+    assert entities(read_feed(client, since)) == {(False, "setups", "delete")}
+
+
+def test_change_feed_pages(client):
+    since = read_feed(client, 0)["last_seq"]
+    for index in range(3):
+        client.post("/api/setup", json={"setup_name": f"Paged Setup {index}"})
+
+    response = client.get(f"/api/changes?since={since}&limit=2")
+    feed = response.get_json()
+    assert len(feed["changes"]) == 2 and feed["has_more"]
+    assert [change["seq"] for change in feed["changes"]] == sorted(change["seq"] for change in feed["changes"])
+
+    feed = read_feed(client, feed["last_seq"])
+    assert len(feed["changes"]) == 1 and not feed["has_more"]
+
+    assert client.get("/api/changes?limit=0").status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_trimmed_change_feed(client, db_session):
+    for index in range(3):
+        client.post("/api/setup", json={"setup_name": f"Trimmed Setup {index}"})
+    last_seq = read_feed(client, 0)["last_seq"]
+
+    db_session.execute(update(Change).values(changed_at=datetime.now() - timedelta(days=30)))
+    assert trim_changes(db_session.connection(), datetime.now() - timedelta(days=7)) > 0
+
+    # The newest change is kept, so an up to date client can tell it didn't miss anything
+    assert read_feed(client, last_seq - 1)["last_seq"] == last_seq
+    assert client.get("/api/changes?since=0").status_code == HTTPStatus.GONE
+
+
+def test_change_numbered_at_commit(db_session):
+    since = db_session.execute(select(func.max(Change.seq))).scalar() or 0
+    setup = Setup(setup_name="Numbered Setup")
+    db_session.add(setup)
+    db_session.flush()
+
+    # Until its transaction commits a change has no number, so no reader can pass it
+    assert db_session.execute(select(Change.seq).where(Change.setup_id == setup.setup_id)).scalar_one() is None
+    assert read_changes(db_session, since, 100) == []
+
+    db_session.commit()
+    changes = read_changes(db_session, since, 100)
+    assert [change.setup_id for change in changes] == [setup.setup_id]
+    assert changes[0].seq > since
+
+
+@pytest.fixture()
+def postgres_sessions():
+    # Write transactions only overlap on postgres, SQLite runs one at a time
+    url = os.getenv("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL isn't set")
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_changes_committed_out_of_order(postgres_sessions):
+    with postgres_sessions() as reader:
+        since = reader.execute(select(func.max(Change.seq))).scalar() or 0
+
+    # The first transaction writes its change before the second one but commits after it
+    first, second = postgres_sessions(), postgres_sessions()
+    setup_ids = []
+    for session_db in (first, second):
+        setup = Setup(setup_name="Overlapping Setup")
+        session_db.add(setup)
+        session_db.flush()
+        setup_ids.append(setup.setup_id)
+
+    # A reader following the feed after every commit gets both changes, in commit order
+    read = []
+    for session_db in (second, first):
+        session_db.commit()
+        session_db.close()
+        with postgres_sessions() as reader:
+            changes = read_changes(reader, since, 100)
+        read += [change.setup_id for change in changes]
+        since = changes[-1].seq if changes else since
+
+    assert read == setup_ids[::-1]
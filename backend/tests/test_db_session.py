@@ -0,0 +1,68 @@
+import pytest
+from http import HTTPStatus
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from main import app as flask_app
+from database.session import start_session
+from database.pool_metrics import pool_metrics, track_pool
+
+
+def test_session_per_app_context(monkeypatch):
+    sessions = []
+
+    class FakeSession:
+        closed = False
+        rolled_back = False
+
+        def close(self):
+            self.closed = True
+
+        def rollback(self):
+            self.rolled_back = True
+
+    def session_factory():
+        sessions.append(FakeSession())
+        return sessions[-1]
+
+    monkeypatch.setattr("database.session.SessionLocal", session_factory)
+
+    # Every call inside a request returns the same session, closed at the end of the request
+    with flask_app.app_context():
+        assert start_session() is start_session()
+    assert len(sessions) == 1 and sessions[0].closed and not sessions[0].rolled_back
+
+    # A failing request rolls its session back
+    with pytest.raises(RuntimeError):
+        with flask_app.app_context():
+            start_session()
+            raise RuntimeError("request failed")
+    assert sessions[1].closed and sessions[1].rolled_back
+
+
+def test_pool_metrics():
+    pool_metrics.reset()
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    track_pool(engine)
+
+    connection = engine.connect()
+    snapshot = pool_metrics.snapshot(engine.pool)
+    assert snapshot["checkouts"] == 1 and snapshot["in_use"] == 1
+    assert snapshot["checked_out"] == 1
+
+    # The pool is exhausted, so the next checkout waits and times out
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+
+    connection.close()
+    snapshot = pool_metrics.snapshot(engine.pool)
+    assert snapshot["in_use"] == 0 and snapshot["max_in_use"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["checkout_wait_max_ms"] >= 50
+    engine.dispose()
+
+
+def test_get_pool_metrics(client):
+    response = client.get("/api/metrics/db_pool")
+    assert response.status_code == HTTPStatus.OK
+    assert {"checkouts", "in_use", "checkout_wait_avg_ms"} <= response.get_json().keys()
@@ -0,0 +1,202 @@
+import os
+import socket
+import subprocess
+import sys
+import uuid
+import threading
+import pytest
+from http import HTTPStatus
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from data_classes import Base, Camera, Job, Setup
+from main import app as flask_app
+import database.session as db_module
+import jobs.queue as job_queue
+import api.api_setup as api_setup
+from jobs.queue import submit_job, wait_for_job, recover_jobs
+from tests.test_auto_crop import LEFT_OUTER_POINTS, create_camera
+from tests.test_setup import create_setup_with_cameras
+
+
+def blocking_job(session_db, started, release, camera_id=None):
+    # Job that waits until the test releases it, optionally renaming a camera without committing
+    started.set()
+    release.wait(10)
+    if camera_id is not None:
+        session_db.get(Camera, camera_id).camera_name = "Renamed By Job"
+    return "released"
+
+
+@pytest.fixture()
+def file_db(tmp_path, monkeypatch):
+    # Jobs that fail or are cancelled roll back their own session, so these tests need a database where every
+    # session has its own transaction instead of the shared test transaction
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(db_module, "SessionLocal", session_factory)
+
+    with flask_app.test_client() as client:
+        yield client, session_factory
+    engine.dispose()
+
+
+def camera_with_pitch(client):
+    camera_id = create_camera(client, "Left corner")
+    normalized_points = [{"x": x / 1920, "y": y / 1080} for x, y in LEFT_OUTER_POINTS]
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[], normalized_points])
+    return camera_id
+
+
+def test_auto_crop_in_background(client):
+    camera_id = camera_with_pitch(client)
+    inline = client.post(f"/api/camera/{camera_id}/auto_crop", json={}).get_json()
+
+    response = client.post(f"/api/camera/{camera_id}/auto_crop?background=true", json={})
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job_id = response.get_json()["job_id"]
+    wait_for_job(uuid.UUID(job_id), timeout=30)
+
+    # The result endpoint answers what the inline request answered
+    response = client.get(f"/api/job/{job_id}/result")
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json() == inline
+    assert client.get(f"/api/job/{job_id}").get_json()["status"] == "done"
+
+
+def test_failed_job_result(file_db):
+    client, session_factory = file_db
+    db_session = session_factory()
+    camera_id = camera_with_pitch(client)
+    detector_id = client.post("/api/detector").get_json()
+    client.patch(f"/api/detector/{detector_id}", json={"model_name": "yolo", "image_size": 640})
+    client.patch(f"/api/setup/{db_session.get(Camera, camera_id).setup_id}", json={"detector_id": detector_id})
+
+    # No crop of at most 1.01 crop pixels per detector pixel covers the pitch
+    response = client.post(f"/api/camera/{camera_id}/crop_plan?background=true", json={"max_scale": 0.01})
+    job_id = response.get_json()["job_id"]
+    wait_for_job(uuid.UUID(job_id), timeout=30)
+
+    response = client.get(f"/api/job/{job_id}/result")
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.get_json()["status"] == "failed"
+    db_session.close()
+
+
+def test_cancel_jobs(file_db):
+    client, session_factory = file_db
+    db_session = session_factory()
+    release = threading.Event()
+    started = [threading.Event() for _ in range(job_queue.JOB_THREADS)]
+    camera_id = camera_with_pitch(client)
+
+    try:
+        # Occupy every job thread, the first job renames a camera when it's released
+        running = [submit_job(db_session, "block", blocking_job, event, release, camera_id if i == 0 else None)
+                   for i, event in enumerate(started)]
+        queued = submit_job(db_session, "block", blocking_job, threading.Event(), release)
+        for event in started:
+            assert event.wait(10)
+
+        response = client.get(f"/api/job/{queued}/result")
+        assert response.status_code == HTTPStatus.ACCEPTED
+
+        # The queued job never starts, the running job finishes but its changes are discarded
+        response = client.post(f"/api/job/{queued}/cancel")
+        assert response.status_code == HTTPStatus.OK
+        assert response.get_json()["status"] == "cancelled"
+
+        response = client.post(f"/api/job/{running[0]}/cancel")
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert response.get_json()["cancel_requested"] is True
+    finally:
+        release.set()
+
+    for job_id in running:
+        wait_for_job(job_id, timeout=10)
+
+    db_session.expire_all()
+    assert db_session.get(Job, running[0]).status == "cancelled"
+    assert db_session.get(Job, running[1]).status == "done"
+    assert db_session.get(Job, queued).started_at is None
+    assert db_session.get(Camera, camera_id).camera_name == "Auto Crop Camera"
+
+    response = client.post(f"/api/job/{queued}/cancel")
+    assert response.status_code == HTTPStatus.CONFLICT
+    db_session.close()
+
+
+def test_cancel_setup_delete_between_cameras(file_db, monkeypatch):
+    client, session_factory = file_db
+    db_session = session_factory()
+    setup_id = uuid.UUID(create_setup_with_cameras(client, "Cancelled Delete Setup", 3))
+    version = db_session.get(Setup, setup_id).config_version
+    etag = client.get(f"/api/setup/{setup_id}/all-config").headers["ETag"]
+
+    # Ask for a cancel in the same transaction as the delete of the first camera
+    def record_and_cancel(session_db, changes):
+        session_db.query(Job).filter_by(kind="delete_setup").update({Job.cancel_requested: True})
+        record_changes(session_db, changes)
+
+    record_changes = api_setup.record_changes
+    monkeypatch.setattr(api_setup, "record_changes", record_and_cancel)
+
+    job_id = client.delete(f"/api/setup/{setup_id}?background=true").get_json()["job_id"]
+    wait_for_job(uuid.UUID(job_id), timeout=10)
+    assert client.get(f"/api/job/{job_id}").get_json()["status"] == "cancelled"
+
+    # One camera is gone and the all config of the setup is no longer the cached one
+    db_session.expire_all()
+    setup = db_session.get(Setup, setup_id)
+    assert setup is not None
+    assert setup.config_version == version + 1
+    assert db_session.query(Camera).filter_by(setup_id=setup_id).count() == 2
+
+    response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.get_json()["cameras"]) == 2
+    db_session.close()
+
+
+def test_recover_jobs_after_restart(file_db):
+    client, session_factory = file_db
+    db_session = session_factory()
+    host = socket.gethostname()
+    stopped = subprocess.Popen([sys.executable, "-c", "pass"])
+    stopped.wait()
+
+    # Jobs of a stopped process and of a version that didn't store the process, a live process and another host
+    workers = {"stopped": f"{host}:{stopped.pid}", "unknown": None, "live": f"{host}:{os.getppid()}",
+               "other_host": "other-host:1"}
+    jobs = {}
+    for name, worker in workers.items():
+        job = Job(kind=name)
+        job.worker = worker
+        job.status = "running" if name != "unknown" else "queued"
+        db_session.add(job)
+        jobs[name] = job
+    finished = Job(kind="finished")
+    finished.worker = workers["stopped"]
+    finished.status = "done"
+    db_session.add(finished)
+    db_session.commit()
+
+    assert recover_jobs() == 2
+
+    db_session.expire_all()
+    assert {name: job.status for name, job in jobs.items()} == {
+        "stopped": "failed", "unknown": "failed", "live": "running", "other_host": "running"}
+    assert jobs["stopped"].error == "The server stopped before the job finished"
+    assert finished.status == "done"
+    db_session.close()
+
+
+def test_job_queue_backpressure(client, monkeypatch):
+    camera_id = camera_with_pitch(client)
+    monkeypatch.setattr(job_queue, "JOB_QUEUE_LIMIT", 0)
+
+    response = client.post(f"/api/camera/{camera_id}/auto_crop?background=true", json={})
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "5"
+
+    assert client.get("/api/metrics/jobs").get_json()["job_limit"] == 0
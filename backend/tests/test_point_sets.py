@@ -0,0 +1,70 @@
+import numpy as np
+from data_classes import Setup, Camera, Projection, OuterPoints, SourcePoints, PointSet
+from database.point_sets import (pack_points, unpack_points, read_point_array, read_point_sets, migrate_point_sets,
+                                 write_point_set)
+from database.bulk_write import write_indexed_points
+
+
+def create_camera(db_session):
+    setup = Setup(setup_name="Point Set Setup")
+    db_session.add(setup)
+    db_session.flush()
+    camera = Camera(camera_name="Point Set Camera", setup_id=setup.setup_id)
+    db_session.add(camera)
+    db_session.flush()
+    projection = Projection(camera_id=camera.camera_id)
+    db_session.add(projection)
+    db_session.flush()
+    return camera, projection
+
+
+def test_pack_points():
+    points = [[0.1, 0.2], [0.3, 0.4], [0.5, 0.6]]
+    coords = pack_points(points)
+
+    assert len(coords) == 3 * 2 * 8
+    assert coords[:8] == np.float64(0.1).astype("<f8").tobytes()
+
+    array = unpack_points(coords)
+    assert array.shape == (3, 2) and np.array_equal(array, points)
+    # The array reads the bytes without copying them
+    assert not array.flags.writeable and not array.flags.owndata
+
+
+def test_write_and_read_point_sets(db_session):
+    camera, projection = create_camera(db_session)
+    connection = db_session.connection()
+
+    write_indexed_points(db_session, OuterPoints, camera, [{"x": 0.1, "y": 0.2}, {"x": 0.3, "y": 0.4}])
+    assert np.array_equal(read_point_array(connection, "outer", camera.camera_id), [[0.1, 0.2], [0.3, 0.4]])
+    assert db_session.query(PointSet).filter_by(camera_id=camera.camera_id, kind="outer").one().count == 2
+
+    write_point_set(connection, "source", projection.projection_id, np.array([[1.0, 2.0]]))
+    write_point_set(connection, "source", projection.projection_id, np.array([[3.0, 4.0]]))
+    point_sets = read_point_sets(connection, "source", [projection.projection_id])
+    assert np.array_equal(point_sets[projection.projection_id], [[3.0, 4.0]])
+
+
+def test_migrate_point_sets(db_session):
+    camera, projection = create_camera(db_session)
+    for index in (2, 1, 3):
+        db_session.add(OuterPoints(camera_id=camera.camera_id, index=index, x=index / 10, y=index / 20))
+        db_session.add(SourcePoints(projection_id=projection.projection_id, index=index, x=index, y=-index))
+    db_session.flush()
+    connection = db_session.connection()
+
+    # Without a packed set the points are read from the rows
+    assert np.array_equal(read_point_array(connection, "outer", camera.camera_id),
+                          [[0.1, 0.05], [0.2, 0.1], [0.3, 0.15]])
+
+    migrated = migrate_point_sets(connection)
+    assert migrated["outer"] == 1 and migrated["source"] == 1
+
+    assert np.array_equal(read_point_sets(connection, "outer", [camera.camera_id])[camera.camera_id],
+                          [[0.1, 0.05], [0.2, 0.1], [0.3, 0.15]])
+    assert np.array_equal(read_point_sets(connection, "source", [projection.projection_id])[projection.projection_id],
+                          [[1, -1], [2, -2], [3, -3]])
+
+    # Running it again replaces the packed sets
+    migrate_point_sets(connection)
+    assert db_session.query(PointSet).filter_by(camera_id=camera.camera_id).count() == 1
@@ -0,0 +1,103 @@
+import numpy as np
+import cv2
+import pytest
+from azure.core.exceptions import ResourceNotFoundError
+from http import HTTPStatus
+from data_classes import Setup, Camera, Projection, Undistortion, SourcePoints, DestinationPoints
+from processing import remap_store
+from processing.preview import preview_cache
+import api.api_projection_preview as preview_module
+
+SOURCE_POINTS = [(0.1, 0.1), (0.9, 0.1), (0.9, 0.9), (0.1, 0.9)]
+DESTINATION_POINTS = [(0.2, 0.2), (0.8, 0.2), (0.8, 0.8), (0.2, 0.8)]
+
+
+@pytest.fixture()
+def config_img(tmp_path, monkeypatch):
+    # Replace blob storage by an in memory image
+    image = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    downloads = []
+
+    def download_config_img(config_path):
+        downloads.append(config_path)
+        return cv2.imencode(".png", image)[1].tobytes()
+
+    monkeypatch.setattr(preview_module, "get_config_img_etag", lambda config_path: '"0x1"')
+    monkeypatch.setattr(preview_module, "download_config_img", download_config_img)
+    monkeypatch.setattr(remap_store, "REMAP_CACHE_DIR", str(tmp_path))
+    preview_cache.clear()
+    return downloads
+
+
+@pytest.fixture()
+def projection(db_session):
+    setup = Setup(setup_name="Preview Test Setup")
+    db_session.add(setup)
+    db_session.flush()
+
+    camera = Camera(camera_name="Preview Test Camera", setup_id=setup.setup_id, config_img_path="preview/camera")
+    db_session.add(camera)
+    db_session.flush()
+
+    projection = Projection(camera_id=camera.camera_id)
+    db_session.add(projection)
+    db_session.flush()
+
+    db_session.add(Undistortion(projection_id=projection.projection_id, k1=-0.1, zoom=0.5))
+    for i, ((sx, sy), (dx, dy)) in enumerate(zip(SOURCE_POINTS, DESTINATION_POINTS)):
+        db_session.add(SourcePoints(projection_id=projection.projection_id, index=i + 1, x=sx, y=sy))
+        db_session.add(DestinationPoints(projection_id=projection.projection_id, index=i + 1, x=dx, y=dy))
+    db_session.commit()
+    return projection
+
+
+def test_get_preview(client, projection, config_img):
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=320&format=png")
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "image/png"
+    etag, weak = response.get_etag()
+    assert etag and not weak
+
+    preview = cv2.imdecode(np.frombuffer(response.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert preview.shape == (180, 320, 3)
+
+    # A known ETag is answered without rendering
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=320&format=png",
+                          headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    # Repeated views are served from the cache
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=320&format=png")
+    assert response.status_code == HTTPStatus.OK
+    assert len(config_img) == 1
+
+
+def test_get_preview_formats_and_stages(client, projection, config_img):
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=160")
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "image/webp"
+
+    undistortion = client.get(f"/api/projection/{projection.projection_id}/preview?w=160&stage=undistortion")
+    assert undistortion.status_code == HTTPStatus.OK
+    assert undistortion.get_etag() != response.get_etag()
+
+
+def test_get_preview_invalid(client, projection, config_img, db_session):
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=0")
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    for point in projection.source_points:
+        point.x, point.y = 0, 0
+    db_session.commit()
+
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=160")
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_get_preview_missing_config_img(client, projection, config_img, monkeypatch):
+    def missing(config_path):
+        raise ResourceNotFoundError("The specified blob does not exist.")
+
+    monkeypatch.setattr(preview_module, "get_config_img_etag", missing)
+    response = client.get(f"/api/projection/{projection.projection_id}/preview?w=160")
+    assert response.status_code == HTTPStatus.NOT_FOUND
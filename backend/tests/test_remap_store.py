@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from http import HTTPStatus
+from data_classes import Setup, Camera, Projection, Undistortion
+from processing import remap_store
+
+UNDISTORTION_PAYLOAD = {
+    "x": 50.0, "y": 50.0, "w": 60.0, "h": 60.0,
+    "k1": -0.2, "k2": 0.05, "k3": 0.0, "p1": 0.0, "p2": 0.0,
+    "zoom": 0.5
+}
+
+
+@pytest.fixture()
+def remap_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(remap_store, "REMAP_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture()
+def projection(db_session):
+    setup = Setup(setup_name="Remap Test Setup")
+    db_session.add(setup)
+    db_session.flush()
+
+    camera = Camera(camera_name="Remap Test Camera", setup_id=setup.setup_id, resolution_width=320, resolution_height=180)
+    db_session.add(camera)
+    db_session.flush()
+
+    projection = Projection(camera_id=camera.camera_id)
+    db_session.add(projection)
+    db_session.flush()
+
+    db_session.add(Undistortion(projection_id=projection.projection_id, **UNDISTORTION_PAYLOAD))
+    db_session.commit()
+    return projection
+
+
+def test_remap_maps_are_stored_and_reused(projection, remap_dir):
+    undistortion = projection.undistortion
+
+    map1, map2 = remap_store.get_remap_maps(undistortion, 320, 180)
+    assert map1.dtype == np.int16 and map1.shape == (180, 320, 2)
+    assert map2.dtype == np.uint16 and map2.shape == (180, 320)
+    assert len(list(remap_dir.glob("*.npy"))) == 2
+
+    # The second request is served from the memory-mapped files
+    stored_map1, stored_map2 = remap_store.get_remap_maps(undistortion, 320, 180)
+    assert isinstance(stored_map1, np.memmap)
+    assert np.array_equal(stored_map1, map1) and np.array_equal(stored_map2, map2)
+
+    image = np.random.default_rng(0).integers(0, 255, (180, 320, 3), dtype=np.uint8)
+    assert remap_store.undistort_image(image, undistortion).shape == image.shape
+
+
+def test_put_undistortion_invalidates_remap_maps(client, projection, remap_dir):
+    remap_store.get_remap_maps(projection.undistortion, 320, 180)
+    assert len(list(remap_dir.glob("*.npy"))) == 2
+
+    payload = dict(UNDISTORTION_PAYLOAD, k1=-0.3)
+    response = client.put(f"/api/projection/{projection.projection_id}/undistortion", json=payload)
+    assert response.status_code == HTTPStatus.OK
+
+    assert list(remap_dir.glob("*.npy")) == []
@@ -3,6 +3,8 @@ import uuid
 from http import HTTPStatus
 import datetime
 from data_classes.setup import Setup
+from data_classes import Camera, Projection, SourcePoints, Undistortion
+from jobs.queue import wait_for_job
 
 
 def test_create_and_get_setup(client):
@@ -34,3 +36,82 @@ def test_update_setup_directly(db_session):
     updated = db_session.query(Setup).filter_by(setup_id=new_setup.setup_id).one()
     assert updated.device_type == "Drone"
     assert updated.debug_visualize is True
+
+
+def create_setup_with_cameras(client, name, camera_count):
+    setup_id = client.post("/api/setup", json={"setup_name": name}).get_json()["setup_id"]
+    for index in range(camera_count):
+        client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": f"Camera {index}"})
+    return setup_id
+
+
+def test_delete_setup_cascades(client, db_session):
+    setup_id = create_setup_with_cameras(client, "Delete Setup", 2)
+    assert db_session.query(SourcePoints).count() >= 8
+
+    response = client.delete(f"/api/setup/{setup_id}")
+    assert response.status_code == HTTPStatus.OK
+
+    # The database removed the cameras, projections and their calibration with the setup
+    assert db_session.query(Camera).filter_by(setup_id=uuid.UUID(setup_id)).count() == 0
+    assert db_session.query(Projection).count() == 0
+    assert db_session.query(SourcePoints).count() == 0
+    assert db_session.query(Undistortion).count() == 0
+
+    response = client.delete(f"/api/setup/{setup_id}")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_delete_setup_in_background(client, db_session):
+    setup_id = create_setup_with_cameras(client, "Background Delete Setup", 3)
+
+    response = client.delete(f"/api/setup/{setup_id}?background=true")
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job_id = response.get_json()["job_id"]
+
+    wait_for_job(uuid.UUID(job_id), timeout=10)
+
+    response = client.get(f"/api/job/{job_id}")
+    assert response.status_code == HTTPStatus.OK
+    job = response.get_json()
+    assert job["status"] == "done"
+    assert job["result"] == {"setup_id": setup_id, "deleted_cameras": 3}
+
+    db_session.expire_all()
+    assert db_session.get(Setup, uuid.UUID(setup_id)) is None
+    assert db_session.query(Projection).count() == 0
+
+
+def test_clone_setup(client, db_session):
+    setup_id = create_setup_with_cameras(client, "Venue Template", 2)
+    camera_id = client.get(f"/api/setup/{setup_id}/camera").get_json()[0]["camera_id"]
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[{"x": 0.1, "y": 0.2}], [{"x": 0.3, "y": 0.4}]])
+    client.put(f"/api/camera/{camera_id}/crop", json=[{"top_left_x": 0, "top_left_y": 0,
+                                                       "bottom_right_x": 0.5, "bottom_right_y": 1}])
+    detector_id = client.post("/api/detector").get_json()
+    client.patch(f"/api/detector/{detector_id}", json={"model_name": "yolo", "image_size": 640})
+    client.patch(f"/api/setup/{setup_id}", json={"detector_id": detector_id})
+
+    response = client.post(f"/api/setup/{setup_id}/clone", json={"setup_name": "Match 2"})
+    assert response.status_code == HTTPStatus.CREATED
+    clone_id = response.get_json()["setup_id"]
+    assert clone_id != setup_id
+
+    # The clone has the same config, with its own cameras and detector
+    original = client.get(f"/api/setup/{setup_id}/all-config").get_json()
+    clone = client.get(f"/api/setup/{clone_id}/all-config").get_json()
+    assert clone["detector"] == original["detector"]
+    for camera in original["cameras"] + clone["cameras"]:
+        del camera["id"]
+    assert sorted(clone["cameras"], key=str) == sorted(original["cameras"], key=str)
+
+    clone_setup = db_session.get(Setup, uuid.UUID(clone_id))
+    assert clone_setup.detector_id is not None and str(clone_setup.detector_id) != detector_id
+    assert db_session.query(Projection).count() == 4
+
+    # Deleting the original leaves the clone intact
+    client.delete(f"/api/setup/{setup_id}")
+    assert len(client.get(f"/api/setup/{clone_id}/all-config").get_json()["cameras"]) == 2
+
+    response = client.post(f"/api/setup/{clone_id}/clone", json={"setup_name": "Match 2"})
+    assert response.status_code == HTTPStatus.CONFLICT
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+from contextlib import contextmanager
+import uuid
+from sqlalchemy import event
+from data_classes import Camera, Projection
+
+# Queries building the all config may use, no matter how many cameras the setup has,
+# on top of the version lookup, the snapshot lookup and storing the new snapshot
+ALL_CONFIG_QUERY_BUDGET = 8 + 3
+
+
+@contextmanager
+def count_queries(engine):
+    # Count the statements sent to the database inside the with block
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_setup(client, name, camera_count):
+    response = client.post("/api/setup", json={"setup_name": name})
+    setup_id = response.get_json()["setup_id"]
+
+    for index in range(camera_count):
+        response = client.post(f"/api/setup/{setup_id}/camera", json={"camera_name": f"Camera {index}"})
+        camera_id = response.get_json()["camera_id"]
+        client.put(f"/api/camera/{camera_id}/pitch", json=[
+            [{"x": 0.1, "y": 0.2}, {"x": 0.3, "y": 0.4}],
+            [{"x": 0.0, "y": 0.5}, {"x": 1.0, "y": 0.5}, {"x": 0.5, "y": 1.0}]
+        ])
+
+    return setup_id
+
+
+def test_get_all_config(client):
+    setup_id = create_setup(client, "All Config Setup", 2)
+
+    response = client.get(f"/api/setup/{setup_id}/all-config")
+    assert response.status_code == HTTPStatus.OK
+
+    all_config = response.get_json()
+    assert len(all_config["cameras"]) == 2
+
+    camera = all_config["cameras"][0]
+    assert camera["field"]["line_points"] == [[0.1, 0.2], [0.3, 0.4]]
+    assert camera["field"]["outer_points"] == [[0.0, 0.5], [1.0, 0.5], [0.5, 1.0]]
+    assert len(camera["homography"]["source"]["points"]) == 4
+    assert len(camera["distortion"]["param"]) == 5
+    assert all_config["detector"] == {}
+
+
+def test_camera_projections_order(client, db_session):
+    setup_id = create_setup(client, "Projection Order Setup", 1)
+    camera_id = uuid.UUID(client.get(f"/api/setup/{setup_id}/all-config").get_json()["cameras"][0]["id"])
+
+    # The all config uses the first projection, the one first by name no matter when it was added
+    db_session.add_all([Projection(camera_id, "Wide"), Projection(camera_id, "Close up")])
+    db_session.flush()
+    db_session.expire_all()
+
+    names = [projection.projection_name for projection in db_session.get(Camera, camera_id).projections]
+    assert names == sorted(names)
+    assert names[0] == "Close up"
+
+
+def test_get_all_config_not_found(client):
+    response = client.get("/api/setup/00000000-0000-0000-0000-000000000000/all-config")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_all_config_query_budget(client, engine):
+    small_setup_id = create_setup(client, "Small Setup", 1)
+    large_setup_id = create_setup(client, "Large Setup", 10)
+
+    with count_queries(engine) as small_statements:
+        assert client.get(f"/api/setup/{small_setup_id}/all-config").status_code == HTTPStatus.OK
+
+    with count_queries(engine) as large_statements:
+        response = client.get(f"/api/setup/{large_setup_id}/all-config")
+        assert response.status_code == HTTPStatus.OK
+
+    assert len(response.get_json()["cameras"]) == 10
+    assert len(large_statements) == len(small_statements)
+    assert len(large_statements) <= ALL_CONFIG_QUERY_BUDGET
+
+
+def test_all_config_etag(client, engine):
+    setup_id = create_setup(client, "Snapshot Setup", 1)
+    camera_id = client.get(f"/api/setup/{setup_id}/camera").get_json()[0]["camera_id"]
+
+    response = client.get(f"/api/setup/{setup_id}/all-config")
+    etag = response.headers["ETag"]
+
+    # An unchanged config costs the version lookup only
+    with count_queries(engine) as statements:
+        response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert len(statements) == 1
+
+    # The snapshot is served again without rebuilding it
+    with count_queries(engine) as statements:
+        response = client.get(f"/api/setup/{setup_id}/all-config")
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 2
+
+    # Writes to the camera, its points and the setup detector all change the version
+    client.patch(f"/api/camera/{camera_id}", json={"position": "Left corner"})
+    response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()["cameras"][0]["position"] == "Left corner"
+    etag = response.headers["ETag"]
+
+    client.put(f"/api/camera/{camera_id}/pitch", json=[[], [{"x": 0.5, "y": 0.5}]])
+    response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.get_json()["cameras"][0]["field"]["outer_points"] == [[0.5, 0.5]]
+    etag = response.headers["ETag"]
+
+    detector_id = client.post("/api/detector").get_json()
+    client.patch(f"/api/setup/{setup_id}", json={"detector_id": detector_id})
+    response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.status_code == HTTPStatus.OK
+    etag = response.headers["ETag"]
+
+    client.patch(f"/api/detector/{detector_id}", json={"model_name": "yolo", "image_size": 640})
+    response = client.get(f"/api/setup/{setup_id}/all-config", headers={"If-None-Match": etag})
+    assert response.get_json()["detector"]["image_size"] == 640
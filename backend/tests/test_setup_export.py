@@ -0,0 +1,70 @@
+import json
+import uuid
+from http import HTTPStatus
+from data_classes import PointSet
+from tests.test_setup_all_config import count_queries, create_setup
+
+# Queries of an export of one batch of setups: setups, configurables, cameras, their three child tables,
+# projections and their three child tables
+EXPORT_QUERY_BUDGET = 1 + 3 + 1 + 3 + 1 + 3
+
+
+def export_lines(client):
+    response = client.get("/api/setups/export")
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/x-ndjson"
+    return [line for line in response.get_data(as_text=True).split("\n") if line]
+
+
+def by_camera_id(all_config):
+    # Cameras of a setup have no order, compare them by id
+    return {**all_config, "cameras": sorted(all_config["cameras"], key=lambda camera: camera["id"])}
+
+
+def test_export_and_import_setups(client, db_session, engine):
+    setup_ids = [create_setup(client, f"Export Setup {index}", index + 1) for index in range(3)]
+
+    detector_id = client.post("/api/detector").get_json()
+    client.patch(f"/api/detector/{detector_id}", json={"model_name": "yolo", "image_size": 640})
+    client.patch(f"/api/setup/{setup_ids[0]}", json={"detector_id": detector_id, "output_fps": 25})
+
+    camera_id = client.get(f"/api/setup/{setup_ids[2]}/camera").get_json()[0]["camera_id"]
+    client.put(f"/api/camera/{camera_id}/crop", json=[
+        {"top_left_x": 0, "top_left_y": 0, "bottom_right_x": 640, "bottom_right_y": 360}
+    ])
+
+    all_configs = {setup_id: by_camera_id(client.get(f"/api/setup/{setup_id}/all-config").get_json())
+                   for setup_id in setup_ids}
+
+    with count_queries(engine) as statements:
+        lines = export_lines(client)
+    assert len(statements) <= EXPORT_QUERY_BUDGET
+
+    records = [json.loads(line) for line in lines]
+    assert sorted(record["setup"]["setup_id"] for record in records) == sorted(setup_ids)
+    assert [len(record["cameras"]) for record in sorted(records, key=lambda r: r["setup"]["setup_name"])] == [1, 2, 3]
+
+    for setup_id in setup_ids:
+        client.delete(f"/api/setup/{setup_id}")
+
+    response = client.post("/api/setups/import", data="\n".join(lines) + "\n", content_type="application/x-ndjson")
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json() == {"imported": 3, "skipped": [], "failed": []}
+
+    # The imported setups have the same all config, the packed point sets are rebuilt for the geometry code
+    for setup_id in setup_ids:
+        assert by_camera_id(client.get(f"/api/setup/{setup_id}/all-config").get_json()) == all_configs[setup_id]
+    point_sets = db_session.query(PointSet).filter_by(camera_id=uuid.UUID(camera_id)).all()
+    assert sorted((point_set.kind, point_set.count) for point_set in point_sets) == [("inner", 2), ("outer", 3)]
+
+    # Importing the same setups again skips them
+    response = client.post("/api/setups/import", data="\n".join(lines), content_type="application/x-ndjson")
+    assert response.get_json()["imported"] == 0
+    assert [skipped["line"] for skipped in response.get_json()["skipped"]] == [1, 2, 3]
+
+
+def test_import_invalid_line(client):
+    response = client.post("/api/setups/import", data='{"cameras": []}\n', content_type="application/x-ndjson")
+    assert response.status_code == HTTPStatus.OK
+    assert response.get_json()["imported"] == 0
+    assert response.get_json()["failed"][0]["line"] == 1
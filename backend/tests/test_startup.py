@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from lazy_import import lazy_import
+from startup_profile import format_report, parse_importtime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK_LOADED = """
+import sys
+import main
+from database import session
+loaded = [name for name in ("cv2", "numpy", "azure.storage.blob") if name in sys.modules]
+print(loaded, session._engine is None)
+"""
+
+
+def test_app_starts_without_heavy_modules():
+    # Neither storage nor the database is configured, the app still imports and loads none of them
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("STORAGE_ACCOUNT_CONNECTION", "CONF_TOOL_DB_URL")}
+    result = subprocess.run([sys.executable, "-c", CHECK_LOADED], capture_output=True, text=True, cwd=BACKEND_DIR,
+                            env=env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[] True"
+
+
+def test_lazy_import():
+    json_module = lazy_import("json")
+    assert json_module is sys.modules["json"]
+
+    module = lazy_import("colorsys")
+    assert "colorsys" not in sys.modules
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert module.rgb_to_hsv is sys.modules["colorsys"].rgb_to_hsv
+
+    with pytest.raises(ImportError):
+        lazy_import("not_a_module")
+
+
+def test_lazy_import_threads():
+    # Threads using a lazy module at the same time all get the fully loaded module
+    module = lazy_import("pydoc_data.topics")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: len(module.topics), range(32)))
+    assert len(set(results)) == 1
+
+
+def test_parse_importtime():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   settings",
+        "import time:      3000 |       3120 | main",
+    ])
+    modules = parse_importtime(output)
+    assert modules == [("settings", 120, 120), ("main", 3000, 3120)]
+
+    report = format_report("main", modules, top=1)
+    assert report.startswith("Importing main took 3.1 ms over 2 modules")
+    assert "3.1 ms cumulative      3.0 ms self  main" in report
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+from api.api_undistort_points import MAX_BATCH_JOBS
+from processing.undistortion import optimal_new_camera_matrix
+
+# Camera matrix of a 1920x1080 image with the principal point in the center
+CAM_MATRIX = [960, 0, 960, 0, 540, 540, 0, 0, 1]
+DIST_COEFFS = [-0.2, 0.05, 0, 0, 0]
+
+
+def make_job(points, zoom=0.5):
+    return {
+        "points": points,
+        "camMatrix": CAM_MATRIX,
+        "distCoeffs": DIST_COEFFS,
+        "zoom": zoom,
+        "imageWidth": 1920,
+        "imageHeight": 1080
+    }
+
+
+def test_undistort_points(client):
+    response = client.post("/api/undistort_points", json=make_job([[960, 540], [100, 100]]))
+    assert response.status_code == HTTPStatus.OK
+    data = response.get_json()
+
+    assert len(data["undistorted_points"]) == 2
+    assert len(data["undist_cam"]) == 3
+    # The principal point is not affected by radial distortion
+    assert abs(data["undistorted_points"][0][0] - data["undist_cam"][0][2]) < 1e-6
+
+
+def test_undistort_points_batch(client):
+    jobs = [make_job([[10, 20], [30, 40]]), make_job([[50, 60]], zoom=1), make_job([])]
+
+    response = client.post("/api/undistort_points/batch", json={"jobs": jobs})
+    assert response.status_code == HTTPStatus.OK
+    results = response.get_json()["results"]
+
+    assert [len(result["undistorted_points"]) for result in results] == [2, 1, 0]
+
+    # Every batch result matches the single request of the same job
+    for job, result in zip(jobs, results):
+        single = client.post("/api/undistort_points", json=job).get_json()
+        assert single == result
+
+
+def test_undistort_points_batch_invalid(client):
+    response = client.post("/api/undistort_points/batch", json={})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    response = client.post("/api/undistort_points/batch", json={"jobs": [{"points": [[1, 2]]}]})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    job = make_job([[1, 2]])
+    job["distCoeffs"] = [0.1, 0.01, 0.0]
+    response = client.post("/api/undistort_points/batch", json={"jobs": [job]})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    response = client.post("/api/undistort_points/batch", json={"jobs": [make_job([[1, 2]])] * (MAX_BATCH_JOBS + 1)})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_optimal_new_camera_matrix_is_cached(client):
+    optimal_new_camera_matrix.cache_clear()
+
+    for _ in range(3):
+        client.post("/api/undistort_points", json=make_job([[1, 2]], zoom=0.25))
+
+    info = optimal_new_camera_matrix.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
@@ -0,0 +1,93 @@
+# Script that uploads large camera media, such as reference video clips, with the chunked upload endpoints
+# Blocks are uploaded at the same time and retried, a failed upload is resumed by running it again with --upload-id
+# Run with: python upload_media.py <api url> <camera id> <setup name> <camera name> <file>
+
+import argparse
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from settings import UPLOAD_CONCURRENCY
+
+BLOCK_RETRIES = 3
+
+
+def read_block(path, index, block_size):
+    # Read the block at the index of the file
+    with open(path, "rb") as file:
+        file.seek(index * block_size)
+        return file.read(block_size)
+
+
+def put_block(session, api_url, upload_id, path, index, block_size):
+    # Upload one block, retrying failed attempts
+    for attempt in range(BLOCK_RETRIES):
+        try:
+            response = session.put(f"{api_url}/api/upload/{upload_id}/block/{index}",
+                                   data=read_block(path, index, block_size), timeout=300)
+            response.raise_for_status()
+            return index
+        except requests.RequestException:
+            if attempt == BLOCK_RETRIES - 1:
+                raise
+
+
+def upload_file(api_url, camera_id, setup_name, camera_name, path, upload_id=None, concurrency=UPLOAD_CONCURRENCY):
+    """Uploads a file as the config media of a camera
+
+        Args:
+            api_url: url of the backend, e.g. http://localhost:5000
+            camera_id: id of the camera
+            setup_name: name of the setup of the camera
+            camera_name: name of the camera
+            path: path of the file
+            upload_id: id of an earlier upload of the file to resume, a new upload is started when None
+            concurrency: amount of blocks uploaded at the same time
+
+        Returns:
+            id of the upload
+    """
+
+    session = requests.Session()
+
+    if upload_id is None:
+        response = session.post(f"{api_url}/api/camera/{camera_id}/upload", json={
+            "setup": setup_name, "camera": camera_name, "size": os.path.getsize(path),
+            "content_type": mimetypes.guess_type(path)[0]
+        })
+    else:
+        response = session.get(f"{api_url}/api/upload/{upload_id}")
+    response.raise_for_status()
+    upload = response.json()
+    upload_id = upload["upload_id"]
+    print(f"Upload {upload_id}, resume it with --upload-id {upload_id} when it fails")
+
+    # Only the blocks that aren't stored yet are sent
+    missing = [index for index in range(upload["block_count"]) if index not in set(upload["staged_blocks"])]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in executor.map(lambda i: put_block(session, api_url, upload_id, path, i, upload["block_size"]),
+                                  missing):
+            print(f"Block {index + 1}/{upload['block_count']} uploaded")
+
+    session.post(f"{api_url}/api/upload/{upload_id}/commit").raise_for_status()
+    return upload_id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("api_url")
+    parser.add_argument("camera_id")
+    parser.add_argument("setup_name")
+    parser.add_argument("camera_name")
+    parser.add_argument("path")
+    parser.add_argument("--upload-id", help="resume this upload instead of starting a new one")
+    parser.add_argument("--concurrency", type=int, default=UPLOAD_CONCURRENCY)
+    args = parser.parse_args()
+
+    upload_id = upload_file(args.api_url.rstrip("/"), args.camera_id, args.setup_name, args.camera_name, args.path,
+                            args.upload_id, args.concurrency)
+    print(f"Upload {upload_id} committed")
+
+
+if __name__ == "__main__":
+    main()